@@ -0,0 +1,74 @@
+"""
+Load Alert Monitor
+Polls the database, forecasts only the feeders with new data and reports
+when a feeder forecast or a transfer combination will reach its warning
+level or capacity. Events are appended to alerts/alerts.jsonl.
+
+Usage:
+    python alert_monitor.py               # terus berjalan, cek setiap 15 menit
+    python alert_monitor.py --once        # satu kali evaluasi
+"""
+
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from constants import ALERT_DIR, ALERT_POLL_MINUTES, FEEDER_PAIRS, FORECAST_HOURS
+from utils.alerts import AlertEngine, FileSink
+from utils.db_util import load_data_from_db
+from utils.network_forecast import network_forecast
+
+
+def changed_histories(feeders, seen: dict) -> dict:
+    """Histories of the feeders whose last timestamp moved since the previous poll"""
+    histories = {}
+    for feeder in feeders:
+        try:
+            df = load_data_from_db(feeder)
+        except Exception as e:
+            print(f"Warning: data '{feeder}' gagal dimuat ({e})")
+            continue
+        if df.empty:
+            continue
+        df["arus"] = pd.to_numeric(df["arus"], errors="coerce")
+        df = df.dropna(subset=["arus"])
+        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        last = df["timestamp"].max()
+        if seen.get(feeder) == last:
+            continue
+        seen[feeder] = last
+        histories[feeder] = df.set_index("timestamp")
+    return histories
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Monitor alert beban feeder dan manuver")
+    parser.add_argument("--once", action="store_true",
+                        help="Evaluasi satu kali lalu keluar")
+    parser.add_argument("--interval", type=float, default=ALERT_POLL_MINUTES,
+                        help="Jeda antar pengecekan (menit)")
+    parser.add_argument("--output", default=str(ALERT_DIR / "alerts.jsonl"),
+                        help="File tujuan event alert")
+    args = parser.parse_args(argv)
+
+    feeders = sorted(set(FEEDER_PAIRS) | {p for partners in FEEDER_PAIRS.values() for p in partners})
+    engine = AlertEngine(sinks=[FileSink(args.output)])
+    seen, forecasts = {}, {}
+
+    while True:
+        histories = changed_histories(feeders, seen)
+        if histories:
+            # Hanya feeder dengan data baru yang di-forecast ulang
+            forecasts.update(network_forecast(histories, FORECAST_HOURS).forecasts)
+            for event in engine.update(forecasts):
+                print(f"{event.state:8} {event.level:8} {event.subject}: "
+                      f"{event.start:%d-%m %H:%M}–{event.end:%H:%M} puncak {event.peak:.0f} A")
+        if args.once:
+            return 0
+        time.sleep(args.interval * 60)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
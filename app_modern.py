@@ -10,9 +10,27 @@ import numpy as np
 from datetime import timedelta, datetime, time
 from pathlib import Path
 import base64
+import time as timer
 
 # Import custom modules
 from utils.db_util import get_unique_feeders, load_data_from_db
+from utils.forecast_cache import forecast_key
+from utils.forecast_deadline import (
+    ready_forecast,
+    record_failure,
+    resolve_forecast,
+    start_forecast,
+)
+from utils.model_store import artifact_key, version_label
+from utils import baseline_forecast
+from utils.forecast_contract import ForecastResult, PartnerResult
+from utils.transfer_matrix import cached_transfer_matrix
+from utils.maneuver_chain import search_chains
+from utils.load_split import optimal_splits
+from utils.quarter_hour import quarter_hour_check
+from utils.contingency import outage_options
+from utils.capacity import capacity_index, load_status
+from utils.coincidence import coincidence_index
 from feeders import (
     birem,
     gegger,
@@ -33,12 +51,14 @@ from feeders import (
 )
 
 # Import our new design system and components
-from design_system import Colors, generate_modern_css, get_status_color
+from design_system import Colors, generate_modern_css, status_style
 from constants import (
+    CHAIN_MAX_HOPS,
+    COINCIDENCE_PRUNE_RATE,
+    FORECAST_BUDGET_SECONDS,
     FORECAST_HOURS,
     HIST_DAYS,
-    MAX_CAPACITY,
-    WARNING_THRESHOLD,
+    MANEUVER_WINDOW_HOURS,
     FEEDER_PAIRS,
     LOGO_PATH,
     SECTION_TITLES,
@@ -87,33 +107,31 @@ st.markdown(generate_modern_css(logo_base64), unsafe_allow_html=True)
 # ============================================================
 
 
-def normalize_forecast_df(fc):
-    """Normalize forecast dataframe columns"""
+def as_forecast_result(fc):
+    """Check the forecast contract (ForecastResult), None if empty"""
     if fc is None:
         return None
-    df = fc.copy()
-
-    # Normalize datetime column
-    if "datetime" not in df.columns:
-        for alt in ["timestamp", "ds", "date"]:
-            if alt in df.columns:
-                df = df.rename(columns={alt: "datetime"})
-                break
-    df["datetime"] = pd.to_datetime(df["datetime"], errors="coerce")
-
-    # Normalize forecast column
-    if "forecast" not in df.columns:
-        num_cols = df.select_dtypes(include=[np.number]).columns.tolist()
-        if num_cols:
-            df = df.rename(columns={num_cols[0]: "forecast"})
-        else:
-            return None
+    if not isinstance(fc, ForecastResult):
+        raise TypeError(f"Modul forecast harus mengembalikan ForecastResult, bukan {type(fc).__name__}")
+    return fc if len(fc) else None
 
-    return df.dropna().sort_values("datetime").reset_index(drop=True)
+
+def run_forecast_module(module, history, start_datetime, model_key):
+    """Run a feeder module and stamp model version and compute time on the result"""
+    started = timer.perf_counter()
+    fc = as_forecast_result(
+        module.forecast(history, steps=FORECAST_HOURS, start_datetime=start_datetime)
+    )
+    if fc is None:
+        return None
+    return fc.replace(
+        model_version=version_label(model_key),
+        elapsed_ms=(timer.perf_counter() - started) * 1000,
+    )
 
 
-def call_forecast_module(name, historical_df, start_datetime=None):
-    """Call appropriate forecast module for feeder"""
+def start_forecast_module(name, historical_df, start_datetime=None):
+    """Start the forecast of a feeder in the background (PendingForecast or None)"""
     if historical_df is None or historical_df.empty:
         return None
 
@@ -138,32 +156,92 @@ def call_forecast_module(name, historical_df, start_datetime=None):
         "parseh": parseh,
     }
 
-    module = module_map.get(name)
-    if not module:
-        return None
+    history = historical_df.set_index("timestamp")
 
-    try:
-        raw_fc = module.forecast(
-            historical_df.set_index("timestamp"),
-            steps=FORECAST_HOURS,
-            start_datetime=start_datetime,
+    def baseline():
+        # Baseline profil musiman (selalu tersedia, < 1 ms)
+        return as_forecast_result(
+            baseline_forecast.forecast(
+                name, history, steps=FORECAST_HOURS, start_datetime=start_datetime
+            )
         )
-        return normalize_forecast_df(raw_fc)
-    except Exception as e:
-        st.error(f"Error model '{name}': {e}")
-        return None
 
+    module = module_map.get(name)
+    if module is None or not Path(module.MODEL_PATH).exists():
+        return ready_forecast(name, baseline())
+
+    model_key = artifact_key(module.MODEL_PATH)
+    key = forecast_key(history.index.max(), FORECAST_HOURS, start_datetime, model_key)
+
+    # Mean + interval dihitung sekali per data terbaru; model yang melewati
+    # batas waktu diganti forecast cache terakhir / baseline
+    return start_forecast(
+        name,
+        key,
+        lambda: run_forecast_module(module, history, start_datetime, model_key),
+        baseline,
+    )
 
-def resample_to_hourly(df, datetime_col="datetime", value_col="forecast"):
-    """Resample data to hourly frequency"""
-    if df is None or df.empty:
+
+def call_forecast_module(name, historical_df, start_datetime=None, deadline=None):
+    """Forecast of a feeder within the time budget (None if no data)"""
+    pending = start_forecast_module(name, historical_df, start_datetime)
+    if pending is None:
         return None
-    df = df.copy()
-    df[datetime_col] = pd.to_datetime(df[datetime_col])
-    df = df.set_index(datetime_col)
-    df_hourly = df[value_col].resample("H").mean().reset_index()
-    df_hourly.columns = [datetime_col, value_col]
-    return df_hourly
+    return resolve_forecast(pending, deadline)
+
+
+def degraded_note(name, fc):
+    """Warning text for a replacement forecast, empty for a regular one"""
+    if fc is None or fc.degraded is None:
+        return ""
+    reason = "melebihi batas waktu" if fc.degraded == "timeout" else "gagal"
+    source = "baseline" if fc.model_version == "baseline" else "forecast terakhir"
+    return f"Model '{name}' {reason}, menampilkan {source}."
+
+
+def search_maneuver_chains(source, fc_period, known):
+    """
+    Multi-hop maneuver chains of a feeder within the displayed period
+
+    Forecasts of feeders up to CHAIN_MAX_HOPS away are started together and
+    share one time budget; ``known`` holds the forecasts already resolved.
+    """
+    source = source.lower()
+    forecasts = {source: fc_period, **known}
+
+    # Feeder dalam jangkauan CHAIN_MAX_HOPS dari sumber
+    ring, reachable = {source}, set()
+    for _ in range(CHAIN_MAX_HOPS):
+        ring = {p for f in ring for p in FEEDER_PAIRS.get(f, [])} - reachable - {source}
+        reachable |= ring
+
+    pending = []
+    for feeder in sorted(reachable - set(forecasts)):
+        try:
+            df_feeder = load_data_from_db(feeder)
+            if df_feeder.empty:
+                continue
+            df_feeder["arus"] = pd.to_numeric(df_feeder["arus"], errors="coerce")
+            df_feeder.dropna(subset=["arus"], inplace=True)
+            df_feeder["timestamp"] = pd.to_datetime(df_feeder["timestamp"])
+            started = start_forecast_module(feeder, df_feeder)
+            if started is not None:
+                pending.append((feeder, started))
+        except Exception as e:
+            record_failure(feeder, e)
+
+    deadline = timer.perf_counter() + FORECAST_BUDGET_SECONDS
+    for feeder, started in pending:
+        try:
+            fc = resolve_forecast(started, deadline)
+        except Exception as e:
+            record_failure(feeder, e)
+            continue
+        if fc is not None:
+            forecasts[feeder] = fc
+
+    return search_chains(forecasts, source, fc_period.start, len(fc_period))
 
 
 def generate_hour_options():
@@ -242,21 +320,19 @@ if selected_feeder and start_date and end_date:
 
     # Forecast main feeder
     fc_main = call_forecast_module(selected_feeder, df_hist)
-    if fc_main is None or fc_main.empty:
+    if fc_main is None:
         st.warning(f"⚠ Feeder '{selected_feeder}' belum memiliki model forecast.")
         st.stop()
+    if fc_main.degraded:
+        st.warning(f"⚠ {degraded_note(selected_feeder, fc_main)}")
 
-    # Normalize and resample
-    if "datetime" in fc_main.columns:
-        fc_main = fc_main.rename(columns={"datetime": "timestamp"})
-    fc_main["timestamp"] = pd.to_datetime(fc_main["timestamp"])
-    fc_main_hourly = resample_to_hourly(fc_main, "timestamp", "forecast")
+    # Batas arus per feeder (iset/inom atau override)
+    limits = capacity_index()
+    main_warning, main_capacity = limits.limits(selected_feeder)
 
-    # Filter by user period
-    fc_filtered = fc_main_hourly[
-        (fc_main_hourly["timestamp"] >= period_start)
-        & (fc_main_hourly["timestamp"] <= period_end)
-    ].copy()
+    # Filter by user period (slice indeks, array tidak disalin)
+    fc_period = fc_main.between(period_start, period_end)
+    fc_filtered = fc_period.to_frame()
 
     # ========================================================
     # ROW 1: REKOMENDASI (BAR CHART) + PREDIKSI MANUVER (2x2)
@@ -270,76 +346,89 @@ if selected_feeder and start_date and end_date:
         # Get partner feeders
         partner_list = FEEDER_PAIRS.get(selected_feeder.lower(), [])
 
-        if partner_list:
-            for partner in partner_list:
-                try:
-                    df_partner = load_data_from_db(partner)
-                    if df_partner.empty:
-                        continue
-
-                    # Preprocessing
-                    df_partner["arus"] = pd.to_numeric(
-                        df_partner["arus"], errors="coerce"
-                    )
-                    df_partner.dropna(subset=["arus"], inplace=True)
-                    df_partner["timestamp"] = pd.to_datetime(df_partner["timestamp"])
-
-                    # Forecast partner
-                    fc_partner = call_forecast_module(partner, df_partner)
-                    if fc_partner is None or fc_partner.empty:
-                        continue
-
-                    # Normalize
-                    if "datetime" in fc_partner.columns:
-                        fc_partner = fc_partner.rename(
-                            columns={"datetime": "timestamp"}
-                        )
-                    fc_partner["timestamp"] = pd.to_datetime(fc_partner["timestamp"])
-
-                    # Resample
-                    fc_partner_hourly = resample_to_hourly(
-                        fc_partner, "timestamp", "forecast"
-                    )
-                    if fc_partner_hourly is None or fc_partner_hourly.empty:
-                        continue
-
-                    # Filter by period
-                    fc_partner_filtered = fc_partner_hourly[
-                        (fc_partner_hourly["timestamp"] >= period_start)
-                        & (fc_partner_hourly["timestamp"] <= period_end)
-                    ].copy()
-
-                    if fc_partner_filtered.empty:
-                        continue
-
-                    # Merge and calculate total
-                    merged = pd.merge(
-                        fc_filtered,
-                        fc_partner_filtered,
-                        on="timestamp",
-                        suffixes=("_main", "_partner"),
-                    )
+        partner_notes = []
 
-                    if merged.empty:
-                        continue
-
-                    merged["total_transfer"] = (
-                        merged["forecast_main"] + merged["forecast_partner"]
-                    )
-                    max_load = round(merged["total_transfer"].max(), 2)
-
-                    # Determine status
-                    status, color, label = get_status_color(
-                        max_load, WARNING_THRESHOLD, MAX_CAPACITY
-                    )
+        # Urutkan partner dari yang paling jarang berbarengan puncaknya; partner
+        # yang hampir selalu puncak bersamaan DAN historisnya melebihi
+        # kapasitas saat digabung tidak di-forecast
+        partner_list, skipped = coincidence_index().rank_partners(
+            selected_feeder,
+            partner_list,
+            prune_rate=COINCIDENCE_PRUNE_RATE,
+            capacities=limits.lookup(partner_list)[1],
+        )
+        if skipped:
+            partner_notes.append(
+                f"Dilewati karena puncak bersamaan dengan {selected_feeder} dan beban gabungan "
+                f"historis melebihi kapasitas: " + ", ".join(skipped)
+            )
 
-                    # Store results
-                    partner_results.append(
-                        (partner, max_load, status, label, fc_partner_filtered)
-                    )
+        # Semua forecast partner dimulai bersamaan dan berbagi satu batas waktu
+        pending_partners = []
+        for partner in partner_list:
+            try:
+                df_partner = load_data_from_db(partner)
+                if df_partner.empty:
+                    continue
 
-                except Exception as e:
+                # Preprocessing
+                df_partner["arus"] = pd.to_numeric(df_partner["arus"], errors="coerce")
+                df_partner.dropna(subset=["arus"], inplace=True)
+                df_partner["timestamp"] = pd.to_datetime(df_partner["timestamp"])
+
+                pending = start_forecast_module(partner, df_partner)
+                if pending is not None:
+                    pending_partners.append((partner, pending))
+            except Exception as e:
+                record_failure(partner, e)
+                partner_notes.append(f"Data '{partner}' gagal dimuat: {e}")
+
+        partner_deadline = timer.perf_counter() + FORECAST_BUDGET_SECONDS
+
+        partner_full, partner_forecasts = {}, {}
+        for partner, pending in pending_partners:
+            try:
+                # Forecast partner
+                fc_partner = resolve_forecast(pending, partner_deadline)
+                if fc_partner is None:
                     continue
+                if fc_partner.degraded:
+                    partner_notes.append(degraded_note(partner, fc_partner))
+                partner_full[partner] = fc_partner
+                partner_forecasts[partner] = fc_partner.between(period_start, period_end)
+            except Exception as e:
+                record_failure(partner, e)
+                partner_notes.append(f"Rekomendasi '{partner}' gagal dihitung: {e}")
+
+        if partner_forecasts:
+            # Semua edge feeder -> partner dihitung sekaligus dalam satu array;
+            # matriks 72 jam dipakai ulang, ganti periode cukup lookup indeks
+            transfers = cached_transfer_matrix(
+                {selected_feeder.lower(): fc_main, **partner_full},
+                fc_main.start,
+                len(fc_main),
+                pairs={selected_feeder.lower(): list(partner_full)},
+            ).between(period_start, period_end)
+            for e in transfers.edges_from(selected_feeder):
+                style = transfers.status_style(e)
+                if style is None:  # Tidak ada jam yang sama di kedua feeder
+                    continue
+                status, color, label = style
+                upper_peak = transfers.upper_peak[e]
+                partner = transfers.partner(e)
+
+                # Store results
+                partner_results.append(
+                    PartnerResult(
+                        partner=partner,
+                        max_load=round(float(transfers.peak[e]), 2),
+                        status=status,
+                        label=label,
+                        forecast=partner_forecasts[partner],
+                        upper_load=None if np.isnan(upper_peak) else round(float(upper_peak), 2),
+                        capacity=float(transfers.capacity[e]),
+                    )
+                )
 
         st.markdown(
             f"""
@@ -352,7 +441,11 @@ if selected_feeder and start_date and end_date:
 
         # Chart atau pesan kosong
         if partner_results:
-            fig_rec = create_recommendation_bar_chart(partner_results)
+            # Garis batas: partner dengan kapasitas terendah
+            lowest = min(partner_results, key=lambda r: r.capacity)
+            fig_rec = create_recommendation_bar_chart(
+                partner_results, *limits.limits(lowest.partner)
+            )
             st.plotly_chart(
                 fig_rec, 
                 use_container_width=True, 
@@ -367,6 +460,88 @@ if selected_feeder and start_date and end_date:
         # Tutup div
         st.markdown("</div></div>", unsafe_allow_html=True)
 
+        for note in partner_notes:
+            st.caption(f"⚠ {note}")
+
+        # Jendela manuver dengan puncak gabungan terendah untuk partner terbaik
+        if partner_results:
+            best = min(partner_results, key=lambda r: r.max_load)
+            edge = next(e for e in transfers.edges_from(selected_feeder) if transfers.partner(e) == best.partner)
+            window_start, window_peak = transfers.best_window(edge, MANEUVER_WINDOW_HOURS)
+            if window_start is not None:
+                window_end = window_start + pd.Timedelta(hours=MANEUVER_WINDOW_HOURS)
+                st.caption(
+                    f"Jendela manuver {MANEUVER_WINDOW_HOURS} jam terbaik ke {best.partner}: "
+                    f"{window_start:%d-%m %H:%M}–{window_end:%H:%M} (puncak {window_peak:.0f} A)"
+                )
+
+        # Puncak 15 menit yang tidak terlihat pada forecast per jam
+        if partner_results:
+            quarter_check = quarter_hour_check(
+                {selected_feeder.lower(): fc_period, **partner_forecasts},
+                transfers.start,
+                transfers.load.shape[1],
+                pairs={selected_feeder.lower(): list(partner_forecasts)},
+                hourly=transfers,
+            )
+            for e in quarter_check.hidden():
+                _, _, label = quarter_check.quarter.status_style(e)
+                over = quarter_check.exceedances[e]
+                st.caption(
+                    f"⚠ Puncak 15 menit ke {quarter_check.quarter.partner(e)}: "
+                    f"{quarter_check.quarter.peak[e]:.0f} A pukul "
+                    f"{quarter_check.quarter.peak_time(e):%d-%m %H:%M} ({label})"
+                    + (f", {over} langkah 15 menit di atas kapasitas" if over else "")
+                )
+
+        # Pembagian beban ke beberapa partner (utilisasi puncak minimum),
+        # dinilai pada band atas seperti transfer ke satu partner
+        if len(partner_forecasts) > 1:
+            split = optimal_splits(
+                {selected_feeder.lower(): fc_period, **partner_forecasts},
+                fc_period.start,
+                len(fc_period),
+                sources=[selected_feeder],
+                upper_band=True,
+            ).get(selected_feeder.lower())
+            if split is not None and len(split.partners) > 1:
+                shares = ", ".join(
+                    f"{partner} {fraction:.0%}"
+                    for partner, fraction in zip(split.partners, split.fractions)
+                )
+                st.caption(
+                    f"Pembagian beban terbaik: {shares} · utilisasi puncak "
+                    f"{split.utilization:.0%} · sisa kapasitas minimum {np.nanmin(split.headroom.values):.0f} A"
+                )
+
+        # Semua mitra langsung melebihi kapasitas: cari manuver bertingkat
+        if partner_results and all(r.status == "danger" for r in partner_results):
+            chain_search = search_maneuver_chains(selected_feeder, fc_period, partner_forecasts)
+            if chain_search.chains:
+                st.markdown("**Manuver bertingkat**")
+                for chain in chain_search.chains:
+                    _, color, label = status_style(chain.status)
+                    st.markdown(
+                        f'<span style="color: {color};">●</span> {chain.label()} '
+                        f"— beban tertinggi {chain.peak:.0f} A di {chain.bottleneck} ({label})",
+                        unsafe_allow_html=True,
+                    )
+            else:
+                st.caption("⚠ Tidak ada manuver bertingkat yang aman untuk periode ini.")
+            if not chain_search.complete:
+                st.caption("⚠ Pencarian manuver dihentikan oleh batas waktu, hasil belum lengkap.")
+
+        # Hasil sweep N-1 pagi (dibaca dari file, tanpa forecast ulang)
+        sweep = outage_options(selected_feeder)
+        if sweep is not None and not sweep[0].empty:
+            options, written = sweep
+            with st.expander(f"Kontingensi N-1 (sweep {written:%d-%m-%Y %H:%M})"):
+                st.dataframe(
+                    options[["rank", "partners", "utilization", "headroom", "status"]],
+                    hide_index=True,
+                    use_container_width=True,
+                )
+
     # ========================================================
     # KOLOM KIRI: PREDIKSI MANUVER (2x2 GRID)
     # ========================================================
@@ -378,12 +553,16 @@ if selected_feeder and start_date and end_date:
             )
 
             cols = st.columns(2)
-            for idx, (partner, max_load, status, label, df_fc) in enumerate(
-                partner_results
-            ):
+            for idx, result in enumerate(partner_results):
                 with cols[idx % 2]:
+                    # DataFrame partner baru dibuat saat chart digambar
                     fig_partner = create_partner_forecast_chart(
-                        partner, fc_filtered, df_fc, status, max_load
+                        result.partner,
+                        fc_filtered,
+                        result.forecast.to_frame(),
+                        result.status,
+                        result.max_load,
+                        warning_threshold=limits.limits(result.partner)[0],
                     )
                     st.plotly_chart(
                         fig_partner,
@@ -403,10 +582,13 @@ if selected_feeder and start_date and end_date:
         )
 
         if not fc_filtered.empty:
-            fig_main = create_main_forecast_chart(fc_filtered, selected_feeder)
+            fig_main = create_main_forecast_chart(fc_filtered, selected_feeder, main_warning)
             st.plotly_chart(
                 fig_main, use_container_width=True, config={"displayModeBar": False}
             )
+            if fc_main.model_version:
+                timing = "" if fc_main.elapsed_ms is None else f" · {fc_main.elapsed_ms:.0f} ms"
+                st.caption(f"Model: {fc_main.model_version}{timing}")
         else:
             st.warning("⚠ Tidak ada data forecast dalam rentang tanggal yang dipilih.")
 
@@ -418,25 +600,14 @@ if selected_feeder and start_date and end_date:
             '<thead><tr><th>Waktu</th><th>Arus (A)</th></tr></thead><tbody>'
         )
 
-            for _, row in fc_filtered.iterrows():
-                dt = row["timestamp"]
-                forecast_val = round(row["forecast"], 2)
-                time_str = dt.strftime("%d %b %H:%M")
+            # Status semua jam sekaligus terhadap batas feeder ini
+            forecast_vals = fc_filtered["forecast"].round(2).to_numpy()
+            statuses = load_status(forecast_vals, main_warning, main_capacity)
+            load_classes = ("low-load", "medium-load", "high-load")
 
-                # Determine status badge
-                if forecast_val < WARNING_THRESHOLD:
-                    status_badge = '<span class="status-badge badge-safe">AMAN</span>'
-                    load_class = "low-load"
-                elif forecast_val < MAX_CAPACITY:
-                    status_badge = (
-                        '<span class="status-badge badge-warning">WARNING</span>'
-                    )
-                    load_class = "medium-load"
-                else:
-                    status_badge = (
-                        '<span class="status-badge badge-danger">BAHAYA</span>'
-                    )
-                    load_class = "high-load"
+            for dt, forecast_val, status in zip(fc_filtered["timestamp"], forecast_vals, statuses):
+                time_str = dt.strftime("%d %b %H:%M")
+                load_class = load_classes[status]
 
                 table_html += (
                     f"<tr>"
@@ -0,0 +1,72 @@
+"""
+Rolling-Origin Backtest
+Replays the database history through every feeder forecast module and
+writes a per-feeder accuracy and latency report.
+
+Usage:
+    python backtest_models.py                        # all feeders, all cores
+    python backtest_models.py --feeders birem gegger --days 30 --stride 24
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+from constants import (
+    BACKTEST_DAYS,
+    BACKTEST_DIR,
+    BACKTEST_STRIDE_HOURS,
+    BACKTEST_WARMUP_DAYS,
+    FEEDER_MODULES,
+    FORECAST_HOURS,
+)
+from utils.backtest import run_backtest
+from utils.db_util import get_training_data
+from utils.model_refit import training_frame
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backtest forecast semua feeder")
+    parser.add_argument("--feeders", nargs="+", choices=sorted(FEEDER_MODULES),
+                        metavar="FEEDER", help="Feeder yang diuji (default: semua)")
+    parser.add_argument("--days", type=int, default=BACKTEST_DAYS,
+                        help="Rentang hari yang diputar ulang")
+    parser.add_argument("--stride", type=int, default=BACKTEST_STRIDE_HOURS,
+                        help="Jarak antar origin forecast (jam)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Jumlah proses paralel (default: jumlah core)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Hitung ulang semua origin")
+    parser.add_argument("--per-origin", action="store_true",
+                        help="Panggil forecast() di setiap origin (tanpa jalur batch)")
+    args = parser.parse_args(argv)
+
+    feeders = args.feeders or list(FEEDER_MODULES)
+    load_days = args.days + BACKTEST_WARMUP_DAYS + FORECAST_HOURS // 24 + 1
+    histories = {
+        feeder: training_frame(get_training_data(feeder, load_days))['arus']
+        for feeder in feeders
+    }
+
+    report, by_horizon = run_backtest(
+        histories,
+        days=args.days,
+        stride=args.stride,
+        workers=args.workers,
+        cache_dir=None if args.no_cache else BACKTEST_DIR,
+        batched=not args.per_origin,
+    )
+
+    BACKTEST_DIR.mkdir(parents=True, exist_ok=True)
+    report.to_csv(BACKTEST_DIR / "report.csv", index=False)
+    by_horizon.to_csv(BACKTEST_DIR / "mae_by_horizon.csv")
+
+    with pd.option_context("display.width", 200):
+        print(report.to_string(index=False))
+    print(f"\nLaporan disimpan di {BACKTEST_DIR}/")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,13 +14,16 @@ from constants import WARNING_THRESHOLD, MAX_CAPACITY
 # RECOMMENDATION BAR CHART (Horizontal Stacked)
 # ============================================================
 
-def create_recommendation_bar_chart(partner_results: List[Tuple]) -> go.Figure:
+def create_recommendation_bar_chart(partner_results: List, warning_threshold: float = WARNING_THRESHOLD,
+                                    max_capacity: float = MAX_CAPACITY) -> go.Figure:
     """
     Create horizontal bar chart for maneuver recommendations
     Similar to ThingsBoard's 'Electricity usage by device' visualization
     
     Args:
-        partner_results: List of tuples (partner_name, max_load, status, label, dataframe)
+        partner_results: List of PartnerResult (utils.forecast_contract)
+        warning_threshold: Warning line (A)
+        max_capacity: Capacity line (A)
         
     Returns:
         Plotly Figure object
@@ -45,7 +48,7 @@ def create_recommendation_bar_chart(partner_results: List[Tuple]) -> go.Figure:
         return fig
     
     # Sort by max_load descending
-    sorted_results = sorted(partner_results, key=lambda x: x[1], reverse=True)
+    sorted_results = sorted(partner_results, key=lambda r: r.max_load, reverse=True)
     
     # Prepare data
     feeders = []
@@ -60,14 +63,17 @@ def create_recommendation_bar_chart(partner_results: List[Tuple]) -> go.Figure:
         'danger': Colors.DANGER
     }
     
-    for partner, max_load, status, label, _ in sorted_results:
+    for result in sorted_results:
+        partner, max_load, status, label = result.partner, result.max_load, result.status, result.label
         feeders.append(partner.upper())
         loads.append(max_load)
         colors.append(color_map.get(status, Colors.INFO))
         texts.append(f"{max_load:.1f} A")
+        capacity = "" if result.capacity is None else f"Kapasitas: {result.capacity:.0f} A<br>"
         hovertemplates.append(
             f"<b>{partner.upper()}</b><br>"
             f"Beban Maksimal: {max_load:.1f} A<br>"
+            f"{capacity}"
             f"Status: {label}"
             "<extra></extra>"
         )
@@ -98,11 +104,11 @@ def create_recommendation_bar_chart(partner_results: List[Tuple]) -> go.Figure:
     
     # Add reference line at warning threshold
     fig.add_vline(
-        x=WARNING_THRESHOLD,
+        x=warning_threshold,
         line_dash="dash",
         line_color=Colors.WARNING,
         line_width=2,
-        annotation_text=f"Batas Warning ({WARNING_THRESHOLD:.0f}A)",
+        annotation_text=f"Batas Warning ({warning_threshold:.0f}A)",
         annotation_position="top",
         annotation=dict(
             font=dict(size=9, color=Colors.WARNING, family=Typography.FONT_FAMILY),
@@ -113,11 +119,11 @@ def create_recommendation_bar_chart(partner_results: List[Tuple]) -> go.Figure:
     
     # Add reference line at max capacity
     fig.add_vline(
-        x=MAX_CAPACITY,
+        x=max_capacity,
         line_dash="dot",
         line_color=Colors.DANGER,
         line_width=2,
-        annotation_text=f"Kapasitas Max ({MAX_CAPACITY:.0f}A)",
+        annotation_text=f"Kapasitas Max ({max_capacity:.0f}A)",
         annotation_position="bottom",
         annotation=dict(
             font=dict(size=9, color=Colors.DANGER, family=Typography.FONT_FAMILY),
@@ -149,7 +155,7 @@ def create_recommendation_bar_chart(partner_results: List[Tuple]) -> go.Figure:
                     family=Typography.FONT_FAMILY
                 )
             ),
-            range=[0, max(MAX_CAPACITY * 1.1, max(loads) * 1.1) if loads else MAX_CAPACITY * 1.1],
+            range=[0, max(max_capacity * 1.1, max(loads) * 1.1) if loads else max_capacity * 1.1],
             tickfont=dict(size=11, color=Colors.TEXT_SECONDARY)
         ),
         yaxis=dict(
@@ -184,7 +190,8 @@ def create_partner_forecast_chart(
     df_main: pd.DataFrame,
     df_partner: pd.DataFrame,
     status: str,
-    max_load: float
+    max_load: float,
+    warning_threshold: float = WARNING_THRESHOLD,
 ) -> go.Figure:
     """
     Create individual forecast chart for partner feeder
@@ -196,6 +203,7 @@ def create_partner_forecast_chart(
         df_partner: Partner feeder forecast dataframe
         status: Status code ('safe', 'warning', 'danger')
         max_load: Maximum total load value
+        warning_threshold: Warning line of the partner (A)
         
     Returns:
         Plotly Figure object
@@ -277,9 +285,9 @@ def create_partner_forecast_chart(
     
     # Add warning threshold line
     fig.add_hline(
-        y=WARNING_THRESHOLD,
+        y=warning_threshold,
         line=dict(color=Colors.DANGER, dash="dash", width=2),
-        annotation_text=f"Batas ({WARNING_THRESHOLD:.0f}A)",
+        annotation_text=f"Batas ({warning_threshold:.0f}A)",
         annotation_position="top right",
         annotation=dict(
             font=dict(size=8, color=Colors.DANGER, family=Typography.FONT_FAMILY, weight=600),
@@ -381,13 +389,15 @@ def create_partner_forecast_chart(
 # MAIN FORECAST CHART (72 Hours)
 # ============================================================
 
-def create_main_forecast_chart(df: pd.DataFrame, feeder_name: str) -> go.Figure:
+def create_main_forecast_chart(df: pd.DataFrame, feeder_name: str,
+                               warning_threshold: float = WARNING_THRESHOLD) -> go.Figure:
     """
     Create main 72-hour forecast chart
     
     Args:
         df: Forecast dataframe with 'timestamp' and 'forecast' columns
         feeder_name: Name of the feeder
+        warning_threshold: Warning line of the feeder (A)
         
     Returns:
         Plotly Figure object
@@ -422,9 +432,9 @@ def create_main_forecast_chart(df: pd.DataFrame, feeder_name: str) -> go.Figure:
     
     # Add warning threshold
     fig.add_hline(
-        y=WARNING_THRESHOLD,
+        y=warning_threshold,
         line=dict(color=Colors.DANGER, dash="dash", width=2.5),
-        annotation_text=f"Batas Aman ({WARNING_THRESHOLD:.0f} A)",
+        annotation_text=f"Batas Aman ({warning_threshold:.0f} A)",
         annotation_position="top right",
         annotation=dict(
             font=dict(size=10, color=Colors.DANGER, family=Typography.FONT_FAMILY, weight=600),
@@ -434,7 +444,7 @@ def create_main_forecast_chart(df: pd.DataFrame, feeder_name: str) -> go.Figure:
     )
     
     # Find and annotate peak if above warning
-    if df["forecast"].max() > WARNING_THRESHOLD:
+    if df["forecast"].max() > warning_threshold:
         peak_idx = df["forecast"].idxmax()
         peak_value = df.loc[peak_idx, "forecast"]
         peak_time = df.loc[peak_idx, "timestamp"]
@@ -494,7 +504,7 @@ def create_main_forecast_chart(df: pd.DataFrame, feeder_name: str) -> go.Figure:
             gridcolor='#f0f0f0',
             tickfont=dict(size=10, color=Colors.TEXT_PRIMARY, family=Typography.FONT_FAMILY),
             title_font=dict(size=11, color=Colors.TEXT_PRIMARY, family=Typography.FONT_FAMILY),
-            range=[0, max(df["forecast"].max() * 1.15, WARNING_THRESHOLD * 1.1)]
+            range=[0, max(df["forecast"].max() * 1.15, warning_threshold * 1.1)]
         ),
         plot_bgcolor='white',
         paper_bgcolor='white',
@@ -11,12 +11,66 @@ from pathlib import Path
 
 FORECAST_HOURS = 72          # Forecast duration in hours
 HIST_DAYS = 7               # Historical data display window (days)
+FORECAST_INTERVAL_ALPHA = 0.10  # Prediction interval level (0.10 = 90% band)
+COMPILED_FORECASTER = True     # Numpy forecast recursion instead of statsmodels get_forecast()
+
+# ============================================================
+# FORECAST DEADLINE
+# ============================================================
+# Slower models are replaced by the cached or baseline forecast on the page
+
+FORECAST_BUDGET_SECONDS = 3.0  # Time budget per forecast (partners share one budget)
+FORECAST_THREADS = 8           # Background threads running feeder forecasts
+
+# ============================================================
+# SEASONAL DECOMPOSITION CACHE
+# ============================================================
+
+DECOMP_PERIOD = 24            # Seasonal period (hours)
+DECOMP_WINDOW_HOURS = 1440    # History window decomposed per feeder (60 days)
+DECOMP_MAX_SHIFT_HOURS = 168  # Full recompute once the window shifted more than this
+
+# ============================================================
+# SCENARIO FORECASTING
+# ============================================================
+
+SCENARIO_COUNT = 500                 # Exog realizations per scenario forecast
+SCENARIO_QUANTILES = (0.1, 0.5, 0.9) # Lowest/highest form the band reported with the scenario mean
+
+# ============================================================
+# BASELINE FORECAST
+# ============================================================
+# Seasonal-profile forecast for feeders without a model module
+
+BASELINE_PROFILE_DAYS = 28          # History window for the hour-of-day profiles
+BASELINE_NAIVE_WEIGHT = 0.5         # Weight of the weekly seasonal naive value vs. the profile median
+BASELINE_BAND_QUANTILES = (0.1, 0.9) # Profile quantiles used as the prediction band
+
+# ============================================================
+# MODEL REFIT
+# ============================================================
+
+MODEL_DIR = Path("models")                   # Live artifacts read by the feeder modules
+MODEL_VERSIONS_DIR = MODEL_DIR / "versions"  # Versioned artifacts written by the refit pipeline
+REFIT_HISTORY_DAYS = 180                     # Days of history used to refit each model
+REFIT_MAXITER = 50                           # Optimizer iterations (warm start needs far fewer than a cold fit)
+REFIT_KEEP_VERSIONS = 14                     # Versions kept per model before the oldest are pruned
+
+# ============================================================
+# BACKTESTING
+# ============================================================
+
+BACKTEST_DIR = Path("backtests")     # Reports and cached backtest forecasts
+BACKTEST_DAYS = 60                   # Span of history replayed with forecast origins
+BACKTEST_STRIDE_HOURS = 6            # Hours between consecutive forecast origins
+BACKTEST_WARMUP_DAYS = 60            # History available to the model before the first origin
+BACKTEST_CHUNK_ORIGINS = 40          # Origins per worker task
 
 # ============================================================
 # ELECTRICAL THRESHOLDS
 # ============================================================
 
-MAX_CAPACITY = 400.0        # Maximum feeder capacity (Amperes)
+MAX_CAPACITY = 400.0        # Default feeder capacity (Amperes), per feeder see utils/capacity.py
 WARNING_THRESHOLD = 320.0   # Warning threshold (80% of capacity)
 SAFE_THRESHOLD = 256.0      # Safe threshold (64% of capacity)
 
@@ -24,6 +78,13 @@ SAFE_THRESHOLD = 256.0      # Safe threshold (64% of capacity)
 WARNING_PCT = 0.80          # 80% capacity
 SAFE_PCT = 0.64             # 64% capacity
 
+# Per-feeder capacity (A), wins over iset/inom from data_bebanrst.
+# Feeders without override or metadata use MAX_CAPACITY.
+CAPACITY_OVERRIDES = {
+    # "sekarbungu": 320.0,
+}
+CAPACITY_RETRY_SECONDS = 300  # Metadata query retried after this when it failed (MAX_CAPACITY meanwhile)
+
 # ============================================================
 # FEEDER RELATIONSHIPS
 # ============================================================
@@ -51,6 +112,58 @@ FEEDER_PAIRS = {
 # Normalize all feeder names to lowercase for consistency
 FEEDER_PAIRS = {k.lower(): [t.lower() for t in v] for k, v in FEEDER_PAIRS.items()}
 
+# ============================================================
+# MANEUVER CHAINS
+# ============================================================
+# Multi-hop transfers, searched when no direct partner stays below capacity
+
+CHAIN_MAX_HOPS = 3            # Longest chain (source -> partner -> ... ), in hops
+CHAIN_TOP_K = 3               # Chains shown per search
+CHAIN_SEARCH_SECONDS = 0.5    # Time budget of one search
+MANEUVER_WINDOW_HOURS = 4     # Length of the suggested maneuver window (lowest combined peak)
+
+# ============================================================
+# LOAD SPLIT
+# ============================================================
+# Source load spread over several partners at fixed fractions
+
+SPLIT_MAX_PARTNERS = 3        # Largest partner set per split
+SPLIT_TOLERANCE = 1e-4        # Bisection tolerance on the peak utilization
+
+# ============================================================
+# N-1 CONTINGENCY
+# ============================================================
+# Morning sweep: transfer options for the outage of every feeder
+
+CONTINGENCY_DIR = Path("contingency")  # Table written by contingency_sweep.py, read by the dashboard
+CONTINGENCY_OPTIONS = 5                # Ranked options kept per outage
+
+# ============================================================
+# ALERTS
+# ============================================================
+# Threshold crossings of feeder forecasts and transfer loads
+
+ALERT_DIR = Path("alerts")    # alert_monitor.py appends events to alerts.jsonl here
+ALERT_POLL_MINUTES = 15       # Database poll interval of the monitor
+
+# ============================================================
+# LOAD COINCIDENCE
+# ============================================================
+# Pairwise correlation and peak coincidence, used to rank partners before forecasting
+
+COINCIDENCE_DIR = Path("coincidence")  # Running sums, updated with each new complete day
+COINCIDENCE_PEAK_HOURS = 1             # Daily peaks at most this many hours apart coincide
+COINCIDENCE_PRUNE_RATE = 0.9           # Skip partners peaking together this often AND whose mean combined peak reaches capacity
+
+# ============================================================
+# QUARTER-HOUR MODE
+# ============================================================
+# Hourly forecasts spread over 15-minute steps with learned intra-hour profiles
+
+QUARTER_PROFILE_DAYS = 28     # Days of 15-minute readings per feeder profile
+QUARTER_PEAK_QUANTILE = 0.9   # Ratio quantile applied to the upper band
+QUARTER_RETRY_SECONDS = 300   # Readings query retried after this when it failed (flat profile meanwhile)
+
 # ============================================================
 # FEEDER MODULE MAPPING
 # ============================================================
@@ -0,0 +1,74 @@
+"""
+N-1 Contingency Sweep
+Forecasts every feeder and writes, per feeder outage, the ranked transfer
+options over the next 72 hours to contingency/n1_sweep.csv. The dashboard
+shows the options of the selected feeder from that file.
+
+Usage:
+    python contingency_sweep.py               # semua feeder
+    python contingency_sweep.py --no-split    # hanya transfer ke satu partner
+
+Schedule it with cron / Task Scheduler every morning, after the data load.
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+from constants import CONTINGENCY_DIR, FEEDER_PAIRS, FORECAST_HOURS
+from utils.contingency import run_sweep, write_sweep
+from utils.db_util import load_data_from_db
+
+
+def load_history(feeder: str) -> pd.DataFrame:
+    """History of one feeder in the format of the forecast modules"""
+    df = load_data_from_db(feeder)
+    df["arus"] = pd.to_numeric(df["arus"], errors="coerce")
+    df = df.dropna(subset=["arus"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    return df.set_index("timestamp")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Sweep kontingensi N-1 semua feeder")
+    parser.add_argument("--hours", type=int, default=FORECAST_HOURS,
+                        help="Horizon forecast (jam)")
+    parser.add_argument("--output", default=str(CONTINGENCY_DIR),
+                        help="Folder hasil sweep")
+    parser.add_argument("--no-split", action="store_true",
+                        help="Tanpa opsi pembagian beban ke beberapa partner")
+    args = parser.parse_args(argv)
+
+    feeders = sorted(set(FEEDER_PAIRS) | {p for partners in FEEDER_PAIRS.values() for p in partners})
+    histories = {}
+    for feeder in feeders:
+        try:
+            df = load_history(feeder)
+        except Exception as e:
+            print(f"Warning: data '{feeder}' gagal dimuat ({e})")
+            continue
+        if df.empty:
+            print(f"Warning: data '{feeder}' kosong, dilewati")
+            continue
+        histories[feeder] = df
+
+    if not histories:
+        print("Tidak ada data feeder yang dapat dimuat.")
+        return 1
+
+    table, timings = run_sweep(histories, args.hours, splits=not args.no_split)
+    path = write_sweep(table, args.output)
+
+    with pd.option_context("display.width", 200, "display.max_rows", 200):
+        print(table[table["rank"] == 1].to_string(index=False))
+    print(
+        f"\n{timings['feeders']} feeder ({timings['batched']} batch) · forecast "
+        f"{timings['forecast_ms']:.0f} ms · evaluasi {timings['evaluate_ms']:.0f} ms"
+    )
+    print(f"Hasil disimpan di {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -440,7 +440,8 @@ def get_chart_gradient(color_hex: str, intensity: str = 'medium') -> dict:
     )
 
 
-def get_status_color(max_load: float, warning_threshold: float = 320.0, max_capacity: float = 400.0) -> tuple:
+def get_status_color(max_load: float, warning_threshold: float = 320.0, max_capacity: float = 400.0,
+                     upper_load: float = None) -> tuple:
     """
     Determine status color based on load value
     
@@ -448,13 +449,33 @@ def get_status_color(max_load: float, warning_threshold: float = 320.0, max_capa
         max_load: Maximum load value
         warning_threshold: Warning threshold (default 320A)
         max_capacity: Maximum capacity (default 400A)
+        upper_load: Maximum of the upper prediction band (optional). When
+            given, the status is judged on the band so a load that may
+            exceed a threshold is not reported as safe
         
     Returns:
         Tuple of (status_code, color_hex, label)
     """
+    if upper_load is not None:
+        max_load = max(max_load, upper_load)
+
     if max_load < warning_threshold:
-        return ('safe', Colors.SUCCESS, 'Aman')
+        return status_style('safe')
     elif warning_threshold <= max_load < max_capacity:
-        return ('warning', Colors.WARNING, 'Mendekati Batas')
+        return status_style('warning')
     else:
-        return ('danger', Colors.DANGER, 'Tidak Aman')
\ No newline at end of file
+        return status_style('danger')
+
+
+STATUS_LEVELS = ('safe', 'warning', 'danger')  # Index = status code of the transfer engine
+
+
+def status_style(status: str) -> tuple:
+    """(status, color_hex, label) of a status name, as returned by get_status_color"""
+    styles = {
+        'safe': (Colors.SUCCESS, 'Aman'),
+        'warning': (Colors.WARNING, 'Mendekati Batas'),
+        'danger': (Colors.DANGER, 'Tidak Aman'),
+    }
+    color, label = styles[status]
+    return (status, color, label)
\ No newline at end of file
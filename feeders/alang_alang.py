@@ -1,8 +1,13 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
 
+from utils.model_store import artifact_key, cached_artifact
+from utils.state_refresh import refresh_state
+from utils.state_space import forecast_with_intervals
+from utils.forecast_contract import make_forecast
+
+FEEDER_NAME = "alang-alang"
 MODEL_PATH = "models/model_alang_alang.pkl"
 
 FORECAST_HORIZON = 72
@@ -13,13 +18,11 @@ def load_model():
     """Load model SARIMA feeder Alang dari file pickle."""
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(f"Model file tidak ditemukan: {MODEL_PATH}")
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-    return model
-
+    return cached_artifact(MODEL_PATH)
 
-def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
 
+def forecast_inputs(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
+    """Model dengan state terbaru, indeks waktu dan exog periode forecast"""
     model = load_model()
 
     if not isinstance(df_historical.index, pd.DatetimeIndex):
@@ -27,17 +30,26 @@ def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
 
     df_historical = df_historical.tail(HISTORY_LENGTH).copy()
 
+    # Refresh state model dengan data terbaru (filter saja, tanpa refit)
+    model = refresh_state(FEEDER_NAME, model, df_historical["arus"], None, artifact_key(MODEL_PATH))
+
     if start_datetime is None:
         start_datetime = df_historical.index.max() + pd.Timedelta(hours=1)
 
     future_index = pd.date_range(start=start_datetime, periods=steps, freq="H")
 
-    forecast_values = model.forecast(steps=steps)
+    return model, future_index, None
+
+
+def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
+    model, future_index, _ = forecast_inputs(df_historical, steps, start_datetime)
 
-    forecast_df = pd.DataFrame({
-        "datetime": future_index,
-        "forecast": np.maximum(forecast_values, 0).round(2)
-    })
+    forecast_values, lower, upper = forecast_with_intervals(model, steps)
 
-    return forecast_df
+    return make_forecast(
+        future_index[0],
+        np.maximum(forecast_values, 0).round(2),
+        lower=np.maximum(lower, 0).round(2),
+        upper=np.maximum(upper, 0).round(2)
+    )
  
\ No newline at end of file
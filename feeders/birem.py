@@ -1,17 +1,29 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
 
+from constants import SCENARIO_COUNT, SCENARIO_QUANTILES
+from utils.exog_fallback import first_working
+from utils.model_store import artifact_key, cached_artifact
+from utils.scenario_forecast import stable_seed, scenario_paths, summarize_paths
+from utils.state_refresh import refresh_state
+from utils.state_space import forecast_mean, forecast_with_intervals
+from utils.forecast_contract import make_forecast
+
+FEEDER_NAME = "birem"
 MODEL_PATH = "models/model_birem.pkl"
 
+EXOG_VARS = [
+    'kamis_pagi_malam', 'jumat_pagi_malam', 'minggu_pagi_malam',
+    'senin_pagi_sore', 'rabu_malam', 'sabtu_pagi_malam',
+    'selasa_pagi_sore', 'is_peak_sore', 'is_low_pagi', 'is_drop_now'
+]
+
 def load_model():
     """Load model pickle feeder Birem"""
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-    return model
+    return cached_artifact(MODEL_PATH)
 
 
 def get_time_period(hour):
@@ -26,7 +38,7 @@ def get_time_period(hour):
         return 'malam'
 
 
-def create_birem_features(datetime_index, historical_data=None):
+def create_birem_features(datetime_index, historical_data=None, seed=42):
     """Generate exogenous features khusus feeder Birem"""
     df_feat = pd.DataFrame(index=datetime_index)
 
@@ -54,33 +66,46 @@ def create_birem_features(datetime_index, historical_data=None):
     df_feat['is_low_pagi'] = (df_feat['time_period'] == 'pagi').astype(int)
 
     # Drop probability detection (based on last 7 days)
+    drop_rate = get_drop_rate(historical_data)
+    df_feat['is_drop_now'] = sample_drops(datetime_index, drop_rate, np.random.RandomState(seed))[0]
+
+    return df_feat
+
+
+def get_drop_rate(historical_data=None):
+    """Laju drop terbaru (beban < 60% median rolling 24 jam)"""
     if historical_data is not None and len(historical_data) > 24:
         recent_data = historical_data.tail(1440)
         roll_med = recent_data.rolling(24, min_periods=1).median().iloc[-1]
-        recent_drop_rate = ((recent_data / roll_med) < 0.6).mean()
-    else:
-        recent_drop_rate = 0.05
+        return ((recent_data / roll_med) < 0.6).mean()
+    return 0.05
 
-    np.random.seed(42)
+
+def sample_drops(datetime_index, drop_rate, rng, n_scenarios=1):
+    """Sampling is_drop_now untuk n_scenarios realisasi, shape (n_scenarios, len(index))"""
     base_drop_prob = np.where(
         (datetime_index.hour >= 22) | (datetime_index.hour <= 5),
-        recent_drop_rate * 2,
-        recent_drop_rate
+        drop_rate * 2,
+        drop_rate
     )
-    df_feat['is_drop_now'] = (np.random.random(len(datetime_index)) < base_drop_prob).astype(int)
+    return (rng.random_sample((n_scenarios, len(datetime_index))) < base_drop_prob).astype(int)
 
-    return df_feat
+
+def history_exog(df):
+    """
+    Exog untuk data historis (index datetime, kolom 'arus'), dipakai saat refresh state.
+    is_drop_now diambil dari drop yang teramati, bukan hasil sampling.
+    """
+    features = create_birem_features(df.index)
+    roll_med = df['arus'].rolling(24, min_periods=1).median()
+    features['is_drop_now'] = ((df['arus'] / roll_med) < 0.6).astype(int)
+    return features[EXOG_VARS].fillna(0)
 
 
 def prepare_exog(future_index, historical_data=None):
     """Siapkan exogenous variables sesuai kolom yang digunakan model Birem"""
-    exog_vars = [
-        'kamis_pagi_malam', 'jumat_pagi_malam', 'minggu_pagi_malam',
-        'senin_pagi_sore', 'rabu_malam', 'sabtu_pagi_malam',
-        'selasa_pagi_sore', 'is_peak_sore', 'is_low_pagi', 'is_drop_now'
-    ]
     features = create_birem_features(future_index, historical_data)
-    return features[exog_vars].fillna(0)
+    return features[EXOG_VARS].fillna(0)
 
 
 def forecast(df_historical, steps=72, start_datetime=None):
@@ -90,22 +115,63 @@ def forecast(df_historical, steps=72, start_datetime=None):
     """
     model = load_model()
 
+    # Refresh state model dengan data terbaru (filter saja, tanpa refit)
+    model = refresh_state(FEEDER_NAME, model, df_historical['arus'], history_exog, artifact_key(MODEL_PATH))
+
     if start_datetime is None:
         start_datetime = df_historical.index.max() + pd.Timedelta(hours=1)
 
     # Buat future index
     future_index = pd.date_range(start=start_datetime, periods=steps, freq='H')
 
-    try:
+    # Dengan exog, lalu tanpa exog (level yang berhasil diingat per model)
+    forecast_values, lower, upper = first_working(FEEDER_NAME, artifact_key(MODEL_PATH), [
+        lambda: forecast_with_intervals(model, steps, prepare_exog(future_index, df_historical['arus'])),
+        lambda: forecast_with_intervals(model, steps),
+    ])
+
+    return make_forecast(
+        future_index[0],
+        np.round(forecast_values, 2),
+        lower=np.round(lower, 2),
+        upper=np.round(upper, 2)
+    )
+
+
+def forecast_scenarios(df_historical, steps=72, start_datetime=None,
+                       n_scenarios=SCENARIO_COUNT, seed=None, quantiles=SCENARIO_QUANTILES):
+    """
+    Forecast Birem untuk n_scenarios realisasi is_drop_now sekaligus (Monte Carlo).
+    seed: seed reproducible (default = turunan dari feeder + waktu mulai)
+    Return ForecastResult: rata-rata skenario, band kuantil terendah/tertinggi sebagai lower/upper.
+    """
+    model = load_model()
+
+    # Refresh state model dengan data terbaru (filter saja, tanpa refit)
+    model = refresh_state(FEEDER_NAME, model, df_historical['arus'], history_exog, artifact_key(MODEL_PATH))
+
+    if start_datetime is None:
+        start_datetime = df_historical.index.max() + pd.Timedelta(hours=1)
+
+    future_index = pd.date_range(start=start_datetime, periods=steps, freq='H')
+
+    if seed is None:
+        seed = stable_seed("birem", future_index[0])
+
+    def with_exog():
         exog = prepare_exog(future_index, df_historical['arus'])
-        forecast_values = model.forecast(steps=steps, exog=exog)
-    except Exception as e:
-        print(f"Warning: Forecast dengan exog gagal ({e}), mencoba tanpa exog.")
-        forecast_values = model.forecast(steps=steps)
+        drops = sample_drops(
+            future_index, get_drop_rate(df_historical['arus']), np.random.RandomState(seed), n_scenarios
+        )
+        scenarios = np.repeat(exog.to_numpy(dtype=float)[None], n_scenarios, axis=0)
+        scenarios[:, :, EXOG_VARS.index('is_drop_now')] = drops
+        return scenario_paths(model, steps, exog, scenarios)
+
+    def without_exog():
+        base = forecast_mean(model, steps)
+        return np.repeat(base[None], n_scenarios, axis=0)
 
-    forecast_df = pd.DataFrame({
-        'datetime': future_index,
-        'forecast': np.round(forecast_values, 2)
-    })
+    # Tangga fallback sendiri, level forecast() biasa tidak ikut terpengaruh
+    paths = first_working(f"{FEEDER_NAME}:scenarios", artifact_key(MODEL_PATH), [with_exog, without_exog])
 
-    return forecast_df
+    return summarize_paths(future_index, paths, quantiles)
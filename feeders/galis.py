@@ -1,22 +1,79 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
+import threading
 from pathlib import Path
 
+from utils.pattern_tables import compile_pattern_tables, blend_with_patterns, lookup_pattern
+from utils.exog_fallback import first_working
+from utils.model_store import artifact_key, cached_artifact
+from utils.state_space import forecast_with_intervals
+from utils.forecast_contract import make_forecast
+
 MODEL_PATH = Path(__file__).parent.parent / "models" / "model_Galis.pkl"
 
+# Pola beban per jam Galis (fallback jika model tidak menyimpan pola)
+GALIS_HOURLY_PROFILE = {
+    0:130, 1:122, 2:119, 3:117, 4:115, 5:116, 6:118, 7:95, 8:96, 9:99, 
+    10:102, 11:104, 12:101, 13:98, 14:96, 15:98, 16:107, 17:156, 18:164, 
+    19:154, 20:147, 21:141, 22:138, 23:134
+}
+GALIS_PROFILE_ARRAY = np.array([GALIS_HOURLY_PROFILE[h] for h in range(24)], dtype=float)
+
+# Batas clip khusus Galis per kelompok jam
+GALIS_BOUND_OVERRIDES = {
+    (17, 18): (150, 170),               # Peak
+    (19, 20): (140, 165),               # Post-peak
+    (0, 1, 2, 3, 4, 5, 6): (95, 130),   # Dini hari / pagi
+}
+
 def load_model():
     """Load model pickle feeder Galis"""
     if not MODEL_PATH.exists():
         raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
     
-    with open(MODEL_PATH, "rb") as f:
-        data = pickle.load(f)
+    data = cached_artifact(MODEL_PATH)
+    
+    # Artefak dipakai bersama: tabel pola masuk ke salinan dict, bukan ke artefaknya
+    if isinstance(data, dict):
+        data = {**data, 'pattern_tables': galis_tables(data)}
     
     return data
 
 
+_TABLES = None  # (artifact_key, tabel pola), dikompilasi sekali per file model
+_TABLES_LOCK = threading.Lock()
+
+
+def galis_tables(model_data):
+    """Compiled pattern tables of the current model file, built once per artifact"""
+    global _TABLES
+    key = artifact_key(MODEL_PATH)
+    with _TABLES_LOCK:
+        if _TABLES is None or _TABLES[0] != key:
+            _TABLES = (key, compile_galis_tables(model_data))
+        return _TABLES[1]
+
+
+def compile_galis_tables(model_data):
+    """Compile dict pola Galis menjadi lookup array (2, 24)"""
+    config = model_data.get('config', ((1,0,1), (1,0,1,24), 0.35, 0.45))
+    
+    peak_weight = config[2] if len(config) > 2 else 0.35
+    post_weight = config[3] if len(config) > 3 else 0.45
+    
+    return compile_pattern_tables(
+        model_data,
+        default_weight=0.45,
+        hour_weights={
+            (17, 18): 1 - peak_weight,
+            (19, 20, 21): 1 - post_weight,
+            (6, 7, 8, 9): 0.40,
+        },
+        bound_overrides=GALIS_BOUND_OVERRIDES,
+    )
+
+
 def create_galis_features(datetime_index, historical_data=None):
     """Generate exogenous features untuk feeder Galis"""
     df = pd.DataFrame(index=datetime_index)
@@ -49,13 +106,7 @@ def create_galis_features(datetime_index, historical_data=None):
     df['is_night'] = np.isin(hours, [0, 1, 2, 3, 4, 5]).astype(np.int8)
     
     # Historical patterns dari model (fallback values)
-    galis_hourly = {
-        0:130, 1:122, 2:119, 3:117, 4:115, 5:116, 6:118, 7:95, 8:96, 9:99, 
-        10:102, 11:104, 12:101, 13:98, 14:96, 15:98, 16:107, 17:156, 18:164, 
-        19:154, 20:147, 21:141, 22:138, 23:134
-    }
-    
-    df['hist_med'] = pd.Series(hours).map(lambda h: galis_hourly.get(h, 115)).values
+    df['hist_med'] = GALIS_PROFILE_ARRAY[hours]
     df['hist_std'] = 8.0  # Default std
     
     # Lag features - gunakan historical data jika tersedia
@@ -107,68 +158,12 @@ def prepare_exog(future_index, historical_data=None):
 
 def apply_galis_patterns(base_forecast, datetime_index, model_data):
     """Terapkan pola historis Galis untuk memperbaiki prediksi"""
-    hours = datetime_index.hour.values
-    is_weekend = datetime_index.dayofweek.values >= 5
+    tables = model_data.get('pattern_tables')
+    if tables is None:
+        tables = compile_galis_tables(model_data)
     
-    # Load patterns dari model
-    hourly_patterns = model_data.get('patterns', {})
-    weekday_patterns = model_data.get('weekday', {})
-    weekend_patterns = model_data.get('weekend', {})
-    config = model_data.get('config', ((1,0,1), (1,0,1,24), 0.35, 0.45))
-    
-    peak_weight = config[2] if len(config) > 2 else 0.35
-    post_weight = config[3] if len(config) > 3 else 0.45
-    
-    # Buat pattern array
-    pattern = np.zeros(len(datetime_index))
-    for i, (h, we) in enumerate(zip(hours, is_weekend)):
-        if we and h in weekend_patterns:
-            pattern[i] = weekend_patterns[h]
-        elif not we and h in weekday_patterns:
-            pattern[i] = weekday_patterns[h]
-        elif h in hourly_patterns:
-            pattern[i] = hourly_patterns[h].get('median', 115)
-        else:
-            pattern[i] = 115
-    
-    # Weighted ensemble
-    w_sar = np.where(
-        np.isin(hours, [17, 18]), 1 - peak_weight,
-        np.where(
-            np.isin(hours, [19, 20, 21]), 1 - post_weight,
-            np.where(np.isin(hours, [6, 7, 8, 9]), 0.40, 0.45)
-        )
-    )
-    
-    ensemble = w_sar * base_forecast + (1 - w_sar) * pattern
-    
-    # Trend smoothing (antar hari)
-    for i in range(24, len(ensemble)):
-        ensemble[i] = 0.92 * ensemble[i] + 0.08 * ensemble[i-24]
-    
-    # Apply bounds berdasarkan jam
-    lower = np.array([hourly_patterns.get(h, {}).get('min', 80) for h in hours])
-    upper = np.array([hourly_patterns.get(h, {}).get('max', 180) for h in hours])
-    
-    # Peak hours bounds
-    peak_mask = np.isin(hours, [17, 18])
-    lower[peak_mask] = 150
-    upper[peak_mask] = 170
-    
-    # Post-peak bounds
-    post_mask = np.isin(hours, [19, 20])
-    lower[post_mask] = 140
-    upper[post_mask] = 165
-    
-    # Morning/night bounds
-    morning_mask = np.isin(hours, [0, 1, 2, 3, 4, 5, 6])
-    lower[morning_mask] = 95
-    upper[morning_mask] = 130
-    
-    # Clip to bounds
-    result = np.clip(ensemble, lower, upper)
-    
-    return result
+    # Weighted ensemble + trend smoothing (antar hari) + bounds per jam
+    return blend_with_patterns(base_forecast, datetime_index, tables, default=115)
 
 
 def forecast(df_historical, steps=72, start_datetime=None):
@@ -186,7 +181,7 @@ def forecast(df_historical, steps=72, start_datetime=None):
     
     Returns:
     --------
-    DataFrame dengan kolom ['datetime', 'forecast']
+    ForecastResult (start + array forecast/lower/upper per jam)
     """
     
     # Load model
@@ -205,6 +200,7 @@ def forecast(df_historical, steps=72, start_datetime=None):
     else:
         fitted_model = model_data
         model_data = {'model': fitted_model, 'patterns': {}, 'weekday': {}, 'weekend': {}}
+        model_data['pattern_tables'] = galis_tables(model_data)
     
     # Pastikan df_historical memiliki index datetime
     if not isinstance(df_historical.index, pd.DatetimeIndex):
@@ -222,51 +218,41 @@ def forecast(df_historical, steps=72, start_datetime=None):
     future_index = pd.date_range(start=start_datetime, periods=steps, freq='H')
     
     # Prepare exogenous variables
-    try:
+    def with_exog():
         historical_series = df_historical['arus'] if 'arus' in df_historical.columns else df_historical.iloc[:, 0]
         exog = prepare_exog(future_index, historical_series)
         
-        # Forecast dengan model SARIMAX
-        base_forecast = fitted_model.forecast(steps=steps, exog=exog)
-        
-        # Apply Galis-specific patterns
-        final_forecast = apply_galis_patterns(base_forecast.values, future_index, model_data)
+        # Forecast dengan model SARIMAX (mean + interval dalam satu pass)
+        base_forecast, base_lower, base_upper = forecast_with_intervals(fitted_model, steps, exog)
         
-    except Exception as e:
-        print(f"Warning: Forecast dengan exog gagal ({e}), menggunakan pattern-based forecast...")
-        
-        # Fallback: gunakan pattern saja
-        hourly_patterns = model_data.get('patterns', {})
-        weekday_patterns = model_data.get('weekday', {})
-        weekend_patterns = model_data.get('weekend', {})
-        
-        hours = future_index.hour.values
-        is_weekend = future_index.dayofweek.values >= 5
-        
-        final_forecast = np.zeros(steps)
-        for i, (h, we) in enumerate(zip(hours, is_weekend)):
-            if we and h in weekend_patterns:
-                final_forecast[i] = weekend_patterns[h]
-            elif not we and h in weekday_patterns:
-                final_forecast[i] = weekday_patterns[h]
-            elif h in hourly_patterns:
-                final_forecast[i] = hourly_patterns[h].get('median', 115)
-            else:
-                # Default pattern
-                default_pattern = {
-                    0:130, 1:122, 2:119, 3:117, 4:115, 5:116, 6:118, 7:95, 8:96, 9:99,
-                    10:102, 11:104, 12:101, 13:98, 14:96, 15:98, 16:107, 17:156, 18:164,
-                    19:154, 20:147, 21:141, 22:138, 23:134
-                }
-                final_forecast[i] = default_pattern.get(h, 115)
-    
-    # Buat output DataFrame
-    forecast_df = pd.DataFrame({
-        'datetime': future_index,
-        'forecast': np.round(final_forecast, 2)
-    })
-    
-    return forecast_df
+        # Pola + clip hanya untuk mean; lebar interval model dipasang lagi di
+        # sekitar mean hasil pola agar ketidakpastian di jam puncak tidak hilang
+        patterned = apply_galis_patterns(base_forecast, future_index, model_data)
+        return (
+            patterned,
+            np.maximum(patterned - (base_forecast - base_lower), 0),
+            patterned + (base_upper - base_forecast),
+        )
+    
+    def pattern_only():
+        # Fallback: gunakan pattern saja (tanpa estimasi ketidakpastian)
+        pattern = lookup_pattern(
+            model_data['pattern_tables'], future_index, default=GALIS_PROFILE_ARRAY
+        )
+        return pattern, pattern, pattern
+    
+    # Level yang berhasil diingat per model, percobaan exog yang pasti gagal dilewati
+    final_forecast, final_lower, final_upper = first_working(
+        "galis", artifact_key(MODEL_PATH), [with_exog, pattern_only]
+    )
+    
+    # Hasil: array per jam mulai future_index[0]
+    return make_forecast(
+        future_index[0],
+        np.round(final_forecast, 2),
+        lower=np.round(final_lower, 2),
+        upper=np.round(final_upper, 2)
+    )
 
 
 # Untuk testing
@@ -284,6 +270,7 @@ if __name__ == "__main__":
     try:
         result = forecast(dummy_data, steps=72)
         if result is not None:
+            result = result.to_frame("datetime")
             print("\nForecast berhasil!")
             print(f"Shape: {result.shape}")
             print("\nSample data:")
@@ -1,22 +1,37 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
 from datetime import timedelta
 
+from constants import SCENARIO_COUNT, SCENARIO_QUANTILES
+from utils.exog_fallback import first_working
+from utils.model_store import artifact_key, cached_artifact
+from utils.scenario_forecast import stable_seed, scenario_paths, summarize_paths
+from utils.state_refresh import refresh_state
+from utils.state_space import forecast_mean, forecast_with_intervals
+from utils.forecast_contract import make_forecast
+
 # === CONFIGURASI ===
 TARGET_FEEDER = "Gegger"
 MODEL_PATH = "models/model_Gegger.pkl"
 FORECAST_HORIZON = 72  # jam ke depan
 
+# --- Urutan prioritas fitur exog (multi-level fallback) ---
+PRIMARY_EXOG = [
+    "sabtu_sore_malam","kamis_siang_sore","minggu_siang",
+    "selasa_pagi_sore","jumat_pagi_sore","rabu_pagi_sore",
+    "is_peak_sore_malam","is_low_dini_hari","is_extreme_drop","is_recovery_spike"
+]
+SIMPLE_EXOG = ["jumat_pagi_sore","kamis_siang_sore","is_extreme_drop","is_recovery_spike"]
+FALLBACK_EXOG = ["is_extreme_drop","is_recovery_spike"]
+EXOG_LEVELS = [PRIMARY_EXOG, SIMPLE_EXOG, FALLBACK_EXOG, []]
+
 # === 1. Load model ===
 def load_model():
     """Load model SARIMAX Gegger"""
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(f"Model file tidak ditemukan: {MODEL_PATH}")
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-    return model
+    return cached_artifact(MODEL_PATH)
 
 # === 2. Feature engineering untuk Gegger ===
 def get_time_period(hour):
@@ -29,7 +44,7 @@ def get_time_period(hour):
     else:
         return 'dini_hari'
 
-def create_gegger_features(datetime_index, historical_data=None):
+def create_gegger_features(datetime_index, historical_data=None, seed=None):
     """Bangun semua fitur exogenous sesuai karakteristik Gegger"""
     df_feat = pd.DataFrame(index=datetime_index)
     df_feat["time_period"] = datetime_index.hour.map(get_time_period)
@@ -55,6 +70,18 @@ def create_gegger_features(datetime_index, historical_data=None):
     df_feat["is_transition_pagi"] = (df_feat["time_period"] == "pagi").astype(int)
 
     # === Pola probabilistik drop & spike ===
+    # Seed stabil antar proses (hash() berubah karena hash randomization)
+    if seed is None:
+        seed = stable_seed(datetime_index[0])
+    rates = get_event_rates(historical_data)
+    drops, spikes = sample_events(df_feat, rates, np.random.RandomState(seed))
+    df_feat["is_extreme_drop"] = drops[0]
+    df_feat["is_recovery_spike"] = spikes[0]
+
+    return df_feat
+
+def get_event_rates(historical_data=None):
+    """Hitung laju drop ekstrem, spike, dan faktor volatilitas dari data historis"""
     if historical_data is not None and len(historical_data) > 24:
         recent = historical_data.tail(1440)
         extreme_drop_rate = (recent < 25).mean()
@@ -64,8 +91,15 @@ def create_gegger_features(datetime_index, historical_data=None):
         extreme_drop_rate = 0.08
         spike_rate = 0.05
         volatility_factor = 0.4
+    return extreme_drop_rate, spike_rate, volatility_factor
 
-    np.random.seed(hash(str(datetime_index[0])) % (2**32))
+def sample_events(df_feat, rates, rng, n_scenarios=1):
+    """
+    Sampling is_extreme_drop & is_recovery_spike untuk n_scenarios realisasi.
+    Return dua array (n_scenarios, len(df_feat)).
+    """
+    extreme_drop_rate, spike_rate, volatility_factor = rates
+    steps = len(df_feat)
 
     drop_multiplier = np.where(
         df_feat["jumat_pagi_sore"] > 0, 3.0,
@@ -74,16 +108,29 @@ def create_gegger_features(datetime_index, historical_data=None):
         np.where(df_feat["selasa_pagi_sore"] > 0, 1.8, 1.0)))
     )
     base_drop_prob = extreme_drop_rate * drop_multiplier * volatility_factor
-    df_feat["is_extreme_drop"] = (np.random.random(len(datetime_index)) < base_drop_prob).astype(int)
+    drops = (rng.random_sample((n_scenarios, steps)) < base_drop_prob).astype(int)
 
-    spike_cond = (
-        (df_feat["is_extreme_drop"].shift(1, fill_value=0) > 0) |
+    prev_drop = np.zeros_like(drops)
+    prev_drop[:, 1:] = drops[:, :-1]
+    calendar_spike = (
         (df_feat["sabtu_sore_malam"] > 0) |
         ((df_feat["weekday"].isin([0,1,2,3,4])) & (df_feat["time_period"] == "sore_malam"))
-    )
+    ).values
+    spike_cond = (prev_drop > 0) | calendar_spike
     spike_prob = np.where(spike_cond, spike_rate * 2, spike_rate * 0.5)
-    df_feat["is_recovery_spike"] = (np.random.random(len(datetime_index)) < spike_prob).astype(int)
+    spikes = (rng.random_sample((n_scenarios, steps)) < spike_prob).astype(int)
 
+    return drops, spikes
+
+def history_exog(df):
+    """
+    Exog untuk data historis (index datetime, kolom 'arus'), dipakai saat refresh state.
+    Flag drop/spike diambil dari kejadian yang teramati, bukan hasil sampling.
+    """
+    df_feat = create_gegger_features(df.index)
+    arus = df["arus"]
+    df_feat["is_extreme_drop"] = (arus < 25).astype(int)
+    df_feat["is_recovery_spike"] = ((arus > 85) & (arus.shift(1) < 30)).astype(int)
     return df_feat
 
 # === 3. Forecast function utama ===
@@ -98,6 +145,9 @@ def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
     df_historical = df_historical.sort_index()
     model = load_model()
 
+    # --- Refresh state model dengan data terbaru (filter saja, tanpa refit) ---
+    model = refresh_state(TARGET_FEEDER, model, df_historical["arus"], history_exog, artifact_key(MODEL_PATH))
+
     # --- Tentukan waktu mulai forecast ---
     if start_datetime is None:
         start_datetime = df_historical.index.max() + pd.Timedelta(hours=1)
@@ -108,33 +158,63 @@ def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
     # --- Buat fitur exogenous untuk periode forecast ---
     future_features = create_gegger_features(future_index, historical_data=df_historical["arus"])
 
-    # --- Urutan prioritas fitur ---
-    primary_exog = [
-        "sabtu_sore_malam","kamis_siang_sore","minggu_siang",
-        "selasa_pagi_sore","jumat_pagi_sore","rabu_pagi_sore",
-        "is_peak_sore_malam","is_low_dini_hari","is_extreme_drop","is_recovery_spike"
-    ]
-    simple_exog = ["jumat_pagi_sore","kamis_siang_sore","is_extreme_drop","is_recovery_spike"]
-    fallback_exog = ["is_extreme_drop","is_recovery_spike"]
-
-    # --- Multi-level forecast attempt ---
-    for exog_list in [primary_exog, simple_exog, fallback_exog, []]:
-        try:
-            if exog_list:
-                missing = [v for v in exog_list if v not in future_features.columns]
-                if missing:
-                    continue
-                exog_data = future_features[exog_list].fillna(0)
-                forecast_vals = model.forecast(steps=steps, exog=exog_data)
-            else:
-                forecast_vals = model.forecast(steps=steps)
-
-            forecast_df = pd.DataFrame({
-                "datetime": future_index,
-                "forecast": np.maximum(forecast_vals, 0).round(2)
-            })
-            return forecast_df
-        except Exception:
-            continue
-
-    raise RuntimeError("Semua percobaan forecast gagal untuk Gegger")
+    def attempt(exog_list):
+        if exog_list:
+            return lambda: forecast_with_intervals(model, steps, future_features[exog_list].fillna(0))
+        return lambda: forecast_with_intervals(model, steps)
+
+    # --- Multi-level forecast, mulai dari level yang terakhir berhasil untuk model ini ---
+    forecast_vals, lower, upper = first_working(
+        TARGET_FEEDER, artifact_key(MODEL_PATH), [attempt(e) for e in EXOG_LEVELS]
+    )
+
+    return make_forecast(
+        future_index[0],
+        np.maximum(forecast_vals, 0).round(2),
+        lower=np.maximum(lower, 0).round(2),
+        upper=np.maximum(upper, 0).round(2)
+    )
+
+# === 4. Forecast skenario Monte Carlo ===
+def forecast_scenarios(df_historical, steps=FORECAST_HORIZON, start_datetime=None,
+                       n_scenarios=SCENARIO_COUNT, seed=None, quantiles=SCENARIO_QUANTILES):
+    """
+    Forecast Gegger untuk n_scenarios realisasi drop/spike sekaligus.
+    seed: seed reproducible (default = turunan dari feeder + waktu mulai)
+    Return ForecastResult: rata-rata skenario, band kuantil terendah/tertinggi sebagai lower/upper.
+    """
+    if not isinstance(df_historical, pd.DataFrame):
+        df_historical = pd.DataFrame(df_historical, columns=["arus"])
+    df_historical = df_historical.sort_index()
+    model = load_model()
+    model = refresh_state(TARGET_FEEDER, model, df_historical["arus"], history_exog, artifact_key(MODEL_PATH))
+
+    if start_datetime is None:
+        start_datetime = df_historical.index.max() + pd.Timedelta(hours=1)
+
+    future_index = pd.date_range(start=start_datetime, periods=steps, freq="H")
+
+    if seed is None:
+        seed = stable_seed(TARGET_FEEDER, future_index[0])
+
+    # --- Fitur dasar + n_scenarios realisasi event ---
+    future_features = create_gegger_features(future_index, historical_data=df_historical["arus"], seed=seed)
+    rates = get_event_rates(df_historical["arus"])
+    drops, spikes = sample_events(future_features, rates, np.random.RandomState(seed), n_scenarios)
+
+    def attempt(exog_list):
+        def run():
+            if not exog_list:
+                base = forecast_mean(model, steps)
+                return np.repeat(base[None], n_scenarios, axis=0)
+            exog_base = future_features[exog_list].fillna(0)
+            scenarios = np.repeat(exog_base.to_numpy(dtype=float)[None], n_scenarios, axis=0)
+            scenarios[:, :, exog_list.index("is_extreme_drop")] = drops
+            scenarios[:, :, exog_list.index("is_recovery_spike")] = spikes
+            return scenario_paths(model, steps, exog_base, scenarios)
+        return run
+
+    # Tangga fallback sendiri, level forecast() biasa tidak ikut terpengaruh
+    paths = first_working(f"{TARGET_FEEDER}:scenarios", artifact_key(MODEL_PATH),
+                          [attempt(e) for e in EXOG_LEVELS])
+    return summarize_paths(future_index, np.maximum(paths, 0), quantiles)
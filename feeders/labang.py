@@ -1,15 +1,21 @@
 import pandas as pd
 import numpy as np
-import pickle
 from pathlib import Path
 
+from utils.model_store import artifact_key, cached_artifact
+from utils.state_refresh import refresh_state
+from utils.state_space import forecast_with_intervals
+from utils.forecast_contract import make_forecast
+
+FEEDER_NAME = "labang"
 MODEL_PATH = Path("models/model_labang.pkl")
+# Flag anomali exog historis dihitung dari beban terukur jam yang sama:
+# backtest batch akan melihat nilai yang sedang dinilai, jadi pakai jalur per-origin
+BATCHABLE = False
 
 def load_model():
     """Load model pickle feeder Labang"""
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-    return model
+    return cached_artifact(MODEL_PATH)
 
 def get_time_period_labang(hour):
     if 6 <= hour <= 11:
@@ -65,8 +71,12 @@ def prepare_exog(df):
     ]
     return df_exog[exog_cols]
 
-def forecast(df_historical, steps=72, start_datetime=None):
-    """Forecast 72 jam ke depan untuk feeder Labang"""
+def history_exog(df):
+    """Exog untuk data historis (index datetime, kolom 'arus'), dipakai saat refresh state"""
+    return prepare_exog(df)
+
+def forecast_inputs(df_historical, steps=72, start_datetime=None):
+    """Model dengan state terbaru, indeks waktu dan exog periode forecast"""
     model = load_model()
 
     df = df_historical.copy()
@@ -79,17 +89,27 @@ def forecast(df_historical, steps=72, start_datetime=None):
     lower = df['arus'].quantile(0.015)
     df['arus'] = df['arus'].clip(lower=lower, upper=upper)
 
+    # Refresh state model dengan data terbaru (filter saja, tanpa refit)
+    model = refresh_state(FEEDER_NAME, model, df["arus"], history_exog, artifact_key(MODEL_PATH))
+
     if start_datetime is None:
         start_datetime = df.index.max() + pd.Timedelta(hours=1)
 
     future_index = pd.date_range(start=start_datetime, periods=steps, freq='H')
     exog_future = prepare_exog(pd.DataFrame(index=future_index))
 
-    forecast_values = model.forecast(steps=steps, exog=exog_future)
+    return model, future_index, exog_future
+
+def forecast(df_historical, steps=72, start_datetime=None):
+    """Forecast 72 jam ke depan untuk feeder Labang"""
+    model, future_index, exog_future = forecast_inputs(df_historical, steps, start_datetime)
+
+    forecast_values, lower, upper = forecast_with_intervals(model, steps, exog_future)
     forecast_values = np.maximum(forecast_values, 0)
 
-    forecast_df = pd.DataFrame({
-        'datetime': future_index,
-        'forecast': forecast_values
-    })
-    return forecast_df
+    return make_forecast(
+        future_index[0],
+        forecast_values,
+        lower=np.maximum(lower, 0),
+        upper=np.maximum(upper, 0)
+    )
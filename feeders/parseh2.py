@@ -1,8 +1,13 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
 
+from utils.model_store import artifact_key, cached_artifact
+from utils.state_refresh import refresh_state
+from utils.state_space import forecast_with_intervals
+from utils.forecast_contract import make_forecast
+
+FEEDER_NAME = "parseh"
 MODEL_PATH = "models/model_parseh.pkl"
 FORECAST_HORIZON = 72
 HISTORY_LENGTH = 1440
@@ -13,8 +18,7 @@ def load_model():
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
     
-    with open(MODEL_PATH, "rb") as f:
-        data = pickle.load(f)
+    data = cached_artifact(MODEL_PATH)
     
     # Pastikan struktur sesuai dengan yang disimpan
     model_fit = data["model_fit"]
@@ -33,6 +37,11 @@ def prepare_exog(index):
     return df[['is_7to12', 'is_18to22', 'dayofweek']]
 
 
+def history_exog(df):
+    """Exog untuk data historis (index datetime, kolom 'arus'), dipakai saat refresh state"""
+    return prepare_exog(df.index)
+
+
 def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
     """Lakukan forecast berdasarkan model SARIMAX"""
     model_fit, exog_cols = load_model()
@@ -43,6 +52,9 @@ def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
     # Ambil HISTORY_LENGTH terakhir
     df_historical = df_historical.tail(HISTORY_LENGTH).copy()
 
+    # Refresh state model dengan data terbaru (filter saja, tanpa refit)
+    model_fit = refresh_state(FEEDER_NAME, model_fit, df_historical["arus"], history_exog, artifact_key(MODEL_PATH))
+
     # Tentukan waktu mulai prediksi
     if start_datetime is None:
         start_datetime = df_historical.index.max() + pd.Timedelta(hours=1)
@@ -54,12 +66,12 @@ def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
     exog_future = prepare_exog(future_index)[exog_cols]
 
     # Gunakan model_fit untuk forecast
-    forecast_values = model_fit.forecast(steps=steps, exog=exog_future)
-
-    # Bungkus ke DataFrame
-    forecast_df = pd.DataFrame({
-        "datetime": future_index,
-        "forecast": np.maximum(forecast_values, 0).round(2)
-    })
+    forecast_values, lower, upper = forecast_with_intervals(model_fit, steps, exog_future)
 
-    return forecast_df
+    # Bungkus ke kontrak forecast per jam
+    return make_forecast(
+        future_index[0],
+        np.maximum(forecast_values, 0).round(2),
+        lower=np.maximum(lower, 0).round(2),
+        upper=np.maximum(upper, 0).round(2)
+    )
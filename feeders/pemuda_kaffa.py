@@ -1,8 +1,13 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
 
+from utils.model_store import artifact_key, cached_artifact
+from utils.state_refresh import refresh_state
+from utils.state_space import forecast_with_intervals
+from utils.forecast_contract import make_forecast
+
+FEEDER_NAME = "pemuda kaffa"
 MODEL_PATH = "models/model_pemuda_kaffa.pkl"
 
 FORECAST_HORIZON = 72
@@ -15,9 +20,7 @@ HISTORY_LENGTH = 1440
 def load_model():
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(f"Model file tidak ditemukan: {MODEL_PATH}")
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-    return model
+    return cached_artifact(MODEL_PATH)
 
 
 def prepare_exog(index):
@@ -32,7 +35,13 @@ def prepare_exog(index):
     return df[['is_weekend', 'is_midnight', 'is_morning_drop']]
 
 
-def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
+def history_exog(df):
+    """Exog untuk data historis (index datetime, kolom 'arus'), dipakai saat refresh state"""
+    return prepare_exog(df.index)
+
+
+def forecast_inputs(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
+    """Model dengan state terbaru, indeks waktu dan exog periode forecast"""
     model = load_model()
 
     if not isinstance(df_historical.index, pd.DatetimeIndex):
@@ -40,6 +49,9 @@ def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
 
     df_historical = df_historical.tail(HISTORY_LENGTH).copy()
 
+    # Refresh state model dengan data terbaru (filter saja, tanpa refit)
+    model = refresh_state(FEEDER_NAME, model, df_historical["arus"], history_exog, artifact_key(MODEL_PATH))
+
     if start_datetime is None:
         start_datetime = df_historical.index.max() + pd.Timedelta(hours=1)
 
@@ -47,10 +59,17 @@ def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
 
     exog_future = prepare_exog(future_index)
 
-    forecast_values = model.forecast(steps=steps, exog=exog_future)
+    return model, future_index, exog_future
+
+
+def forecast(df_historical, steps=FORECAST_HORIZON, start_datetime=None):
+    model, future_index, exog_future = forecast_inputs(df_historical, steps, start_datetime)
+
+    forecast_values, lower, upper = forecast_with_intervals(model, steps, exog_future)
 
-    forecast_df = pd.DataFrame({
-        "datetime": future_index,
-        "forecast": np.maximum(forecast_values, 0).round(2)
-    })
-    return forecast_df
+    return make_forecast(
+        future_index[0],
+        np.maximum(forecast_values, 0).round(2),
+        lower=np.maximum(lower, 0).round(2),
+        upper=np.maximum(upper, 0).round(2)
+    )
@@ -1,17 +1,20 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
 
+from utils.decomposition_cache import get_decomposition
+from utils.model_store import cached_artifact
+from utils.state_space import forecast_mean, interval_half_width
+from utils.forecast_contract import make_forecast
+
+FEEDER_NAME = "tanjung bumi"
 MODEL_PATH = "models/model_TanjungBumi.pkl"
 
 def load_model():
     """Load model pickle feeder Tanjung Bumi"""
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
-    with open(MODEL_PATH, "rb") as f:
-        package = pickle.load(f)
-    return package
+    return cached_artifact(MODEL_PATH)
 
 
 def create_features(timestamp, y_rolling, last_trend, trend_change_rate, seasonal_hist, hourly_expected, step_i):
@@ -62,7 +65,7 @@ def create_features(timestamp, y_rolling, last_trend, trend_change_rate, seasona
     # Trend & seasonal
     projected_trend = last_trend + (trend_change_rate * (step_i + 1))
     feat['trend'] = projected_trend
-    feat['seasonal'] = seasonal_hist.iloc[step_i % len(seasonal_hist)]
+    feat['seasonal'] = seasonal_hist[step_i % len(seasonal_hist)]
     feat['trend_change'] = trend_change_rate
     
     return feat
@@ -95,10 +98,8 @@ def forecast(df_historical, steps=72, start_datetime=None):
     
     Returns:
     --------
-    DataFrame dengan kolom 'datetime' dan 'forecast'
+    ForecastResult (start + array forecast/lower/upper per jam)
     """
-    from statsmodels.tsa.seasonal import seasonal_decompose
-    
     # Load model package
     package = load_model()
     model = package['model']
@@ -112,13 +113,12 @@ def forecast(df_historical, steps=72, start_datetime=None):
     # Prepare historical data (last 1440 hours = 60 days)
     y_hist = df_historical['arus'].tail(1440).copy()
     
-    # Seasonal decomposition
-    decomp = seasonal_decompose(y_hist, model='additive', period=24, extrapolate_trend='freq')
-    trend_hist = decomp.trend
+    # Seasonal decomposition (cached per feeder, updated incrementally)
+    decomp = get_decomposition(FEEDER_NAME, y_hist)
     seasonal_hist = decomp.seasonal
     
-    last_trend = trend_hist.iloc[-1]
-    trend_change_rate = trend_hist.diff().tail(24).mean()
+    last_trend = decomp.last_trend
+    trend_change_rate = decomp.trend_change_rate
     
     # Determine forecast start
     if start_datetime is None:
@@ -143,11 +143,11 @@ def forecast(df_historical, steps=72, start_datetime=None):
             i
         )
         
-        # Create exog dataframe
-        exog_df = pd.DataFrame([feat], columns=exog_cols)
+        # Create exog row (urutan kolom sesuai training)
+        exog_row = pd.DataFrame([feat], columns=exog_cols)
         
-        # Forecast single step
-        pred_raw = model.forecast(steps=1, exog=exog_df).values[0]
+        # Forecast single step (state model sama, hanya exog yang berubah)
+        pred_raw = forecast_mean(model, 1, exog_row)[0]
         
         # Apply constraints
         pred = apply_constraints(pred_raw, timestamp.hour, hourly_expected)
@@ -157,10 +157,14 @@ def forecast(df_historical, steps=72, start_datetime=None):
         # Update rolling window
         y_rolling = pd.concat([y_rolling, pd.Series([pred], index=[timestamp])])
     
-    # Create forecast dataframe
-    forecast_df = pd.DataFrame({
-        'datetime': future_index,
-        'forecast': np.round(forecast_values, 2)
-    })
-    
-    return forecast_df
\ No newline at end of file
+    # Interval: varians error forecast h-langkah dari model (tidak bergantung exog)
+    forecast_values = np.asarray(forecast_values, dtype=float)
+    half_width = interval_half_width(model, steps)
+    
+    # Create hourly forecast (arrays + start timestamp)
+    return make_forecast(
+        future_index[0],
+        np.round(forecast_values, 2),
+        lower=np.round(np.maximum(forecast_values - half_width, 0), 2),
+        upper=np.round(forecast_values + half_width, 2)
+    )
\ No newline at end of file
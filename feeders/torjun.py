@@ -1,8 +1,14 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
 
+from utils.exog_fallback import first_working
+from utils.model_store import artifact_key, cached_artifact
+from utils.state_refresh import refresh_state
+from utils.state_space import forecast_with_intervals
+from utils.forecast_contract import make_forecast
+
+FEEDER_NAME = "torjun"
 MODEL_PATH = "models/model_Torjun.pkl"
 
 # =====================================================
@@ -12,9 +18,7 @@ def load_model():
     """Load model pickle feeder Torjun"""
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(f"Model file tidak ditemukan: {MODEL_PATH}")
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-    return model
+    return cached_artifact(MODEL_PATH)
 
 
 # =====================================================
@@ -59,6 +63,11 @@ def create_torjun_features(datetime_index):
     return df_feat[feature_cols]
 
 
+def history_exog(df):
+    """Exog untuk data historis (index datetime, kolom 'arus'), dipakai saat refresh state"""
+    return create_torjun_features(df.index)
+
+
 # =====================================================
 # FORECAST FUNCTION
 # =====================================================
@@ -69,6 +78,9 @@ def forecast(df_historical, steps=72, start_datetime=None):
     """
     model = load_model()
 
+    # Refresh state model dengan data terbaru (filter saja, tanpa refit)
+    model = refresh_state(FEEDER_NAME, model, df_historical["arus"], history_exog, artifact_key(MODEL_PATH))
+
     # Tentukan waktu mulai
     if start_datetime is None:
         start_datetime = df_historical.index.max() + pd.Timedelta(hours=1)
@@ -79,17 +91,16 @@ def forecast(df_historical, steps=72, start_datetime=None):
     # Siapkan exogenous variables
     exog = create_torjun_features(future_index)
 
-    # Lakukan forecasting
-    try:
-        forecast_values = model.forecast(steps=steps, exog=exog)
-    except Exception as e:
-        print(f"Warning: Forecast dengan exog gagal ({e}), mencoba tanpa exog.")
-        forecast_values = model.forecast(steps=steps)
-
-    # Kembalikan hasil sebagai DataFrame
-    forecast_df = pd.DataFrame({
-        "datetime": future_index,
-        "forecast": np.round(forecast_values, 2)
-    })
-
-    return forecast_df
+    # Lakukan forecasting (dengan exog, lalu tanpa exog; level yang berhasil diingat per model)
+    forecast_values, lower, upper = first_working(FEEDER_NAME, artifact_key(MODEL_PATH), [
+        lambda: forecast_with_intervals(model, steps, exog),
+        lambda: forecast_with_intervals(model, steps),
+    ])
+
+    # Kembalikan hasil sebagai array per jam
+    return make_forecast(
+        future_index[0],
+        np.round(forecast_values, 2),
+        lower=np.round(lower, 2),
+        upper=np.round(upper, 2)
+    )
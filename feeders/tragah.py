@@ -1,14 +1,17 @@
 import pandas as pd
-import pickle
 import numpy as np
 
+from utils.model_store import artifact_key, cached_artifact
+from utils.state_refresh import refresh_state
+from utils.state_space import forecast_with_intervals
+from utils.forecast_contract import make_forecast
+
+FEEDER_NAME = "tragah"
 MODEL_PATH = "models/model_Tragah.pkl"
 
 def load_model():
     """Load model pkl Tragah"""
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-    return model
+    return cached_artifact(MODEL_PATH)
 
 def prepare_exog(future_index):
     """Buat exogenous variables untuk forecast sesuai model"""
@@ -21,20 +24,37 @@ def prepare_exog(future_index):
     # Hanya kolom yang digunakan model
     return df_exog[['is_weekend','is_midnight','is_morning_drop']]
 
-def forecast(df_historical, steps=72, start_datetime=None):
-    """
-    df_historical: DataFrame historis (index datetime)
-    steps: jumlah jam ke depan
-    start_datetime: datetime mulai forecast (default: last historical datetime + 1 jam)
-    """
+def history_exog(df):
+    """Exog untuk data historis (index datetime, kolom 'arus'), dipakai saat refresh state"""
+    return prepare_exog(df.index)
+
+def forecast_inputs(df_historical, steps=72, start_datetime=None):
+    """Model dengan state terbaru, indeks waktu dan exog periode forecast"""
     model = load_model()
     
+    # Refresh state model dengan data terbaru (filter saja, tanpa refit)
+    model = refresh_state(FEEDER_NAME, model, df_historical["arus"], history_exog, artifact_key(MODEL_PATH))
+
     if start_datetime is None:
         start_datetime = df_historical.index.max() + pd.Timedelta(hours=1)
     
     future_index = pd.date_range(start=start_datetime, periods=steps, freq='H')
     exog = prepare_exog(future_index)
-    
-    forecast_values = model.forecast(steps=steps, exog=exog)
-    forecast_df = pd.DataFrame({'datetime': future_index, 'forecast': forecast_values})
-    return forecast_df
+
+    return model, future_index, exog
+
+def forecast(df_historical, steps=72, start_datetime=None):
+    """
+    df_historical: DataFrame historis (index datetime)
+    steps: jumlah jam ke depan
+    start_datetime: datetime mulai forecast (default: last historical datetime + 1 jam)
+    """
+    model, future_index, exog = forecast_inputs(df_historical, steps, start_datetime)
+
+    forecast_values, lower, upper = forecast_with_intervals(model, steps, exog)
+    return make_forecast(
+        future_index[0],
+        np.maximum(forecast_values, 0).round(2),
+        lower=np.maximum(lower, 0).round(2),
+        upper=np.maximum(upper, 0).round(2)
+    )
@@ -1,12 +1,19 @@
 import pandas as pd
 import numpy as np
-import pickle
 import os
 
+from utils.exog_fallback import first_working
+from utils.model_store import artifact_key, cached_artifact
+from utils.state_space import forecast_with_intervals
+from utils.forecast_contract import ForecastResult, make_forecast
+
 # ===============================
 # CONFIG
 # ===============================
 MODEL_PATH = "models/model_Unibang.pkl"  
+# Exog historis (lag_1, lag_24, stability) dibangun dari beban terukur:
+# backtest batch akan melihat nilai yang sedang dinilai, jadi pakai jalur per-origin
+BATCHABLE = False
 
 
 # ===============================
@@ -16,9 +23,7 @@ def load_model():
     """Load model pickle feeder Unibang"""
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(f"Model file not found: {MODEL_PATH}")
-    with open(MODEL_PATH, "rb") as f:
-        model = pickle.load(f)
-    return model
+    return cached_artifact(MODEL_PATH)
 
 
 # ===============================
@@ -68,10 +73,15 @@ def create_unibang_features(df: pd.DataFrame) -> pd.DataFrame:
     return df_feat[exog_vars].fillna(method='bfill').fillna(method='ffill')
 
 
+def history_exog(df: pd.DataFrame) -> pd.DataFrame:
+    """Exog untuk data historis (index datetime, kolom 'arus'), dipakai saat refit model"""
+    return create_unibang_features(df)
+
+
 # ===============================
 # FUNGSI FORECAST
 # ===============================
-def forecast(df_historical: pd.DataFrame, steps: int = 72, start_datetime=None) -> pd.DataFrame:
+def forecast(df_historical: pd.DataFrame, steps: int = 72, start_datetime=None) -> ForecastResult:
     """
     Forecast arus 72 jam ke depan untuk feeder Unibang.
     df_historical: DataFrame dengan kolom 'arus' dan index datetime
@@ -89,16 +99,19 @@ def forecast(df_historical: pd.DataFrame, steps: int = 72, start_datetime=None)
     future_index = pd.date_range(start=start_datetime, periods=steps, freq='H')
 
     # Siapkan exogenous features
-    try:
+    def with_exog():
         exog = create_unibang_features(df_historical)
         exog_future = exog.iloc[-steps:] if len(exog) >= steps else exog
-        forecast_values = model.forecast(steps=steps, exog=exog_future)
-    except Exception as e:
-        print(f"[Warning] Forecast Unibang gagal pakai exog ({e}), mencoba tanpa exog..")
-        forecast_values = model.forecast(steps=steps)
-
-    forecast_df = pd.DataFrame({
-        'datetime': future_index,
-        'forecast': np.round(forecast_values, 2)
-    })
-    return forecast_df
+        return forecast_with_intervals(model, steps, exog_future)
+
+    forecast_values, lower, upper = first_working("unibang", artifact_key(MODEL_PATH), [
+        with_exog,
+        lambda: forecast_with_intervals(model, steps),
+    ])
+
+    return make_forecast(
+        future_index[0],
+        np.round(forecast_values, 2),
+        lower=np.round(lower, 2),
+        upper=np.round(upper, 2)
+    )
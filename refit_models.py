@@ -0,0 +1,51 @@
+"""
+Nightly Model Refit
+Refits every feeder model from the database and publishes the new versions.
+
+Usage:
+    python refit_models.py                       # all feeders, all cores
+    python refit_models.py --feeders birem gegger
+    python refit_models.py --days 90 --workers 4 --no-publish
+
+Schedule it with cron / Task Scheduler, e.g. every night at 02:00.
+"""
+
+import argparse
+import sys
+
+import pandas as pd
+
+from constants import FEEDER_MODULES, REFIT_HISTORY_DAYS, REFIT_MAXITER
+from utils.model_refit import refit_all
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Refit model SARIMAX semua feeder")
+    parser.add_argument("--feeders", nargs="+", choices=sorted(FEEDER_MODULES),
+                        metavar="FEEDER", help="Feeder yang di-refit (default: semua)")
+    parser.add_argument("--days", type=int, default=REFIT_HISTORY_DAYS,
+                        help="Jumlah hari data training")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Jumlah proses paralel (default: jumlah core)")
+    parser.add_argument("--maxiter", type=int, default=REFIT_MAXITER,
+                        help="Batas iterasi optimizer")
+    parser.add_argument("--no-publish", action="store_true",
+                        help="Hanya simpan versi baru, jangan ganti model aktif")
+    args = parser.parse_args(argv)
+
+    report = refit_all(
+        feeders=args.feeders,
+        days=args.days,
+        workers=args.workers,
+        publish=not args.no_publish,
+        maxiter=args.maxiter,
+    )
+
+    with pd.option_context("display.max_colwidth", 60, "display.width", 160):
+        print(report.drop(columns=["version_path"]).to_string(index=False))
+
+    return 1 if (report["status"] == "failed").any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Threshold Alerts
+Watches every feeder forecast and every FEEDER_PAIRS combined load for
+hours where the forecast or its upper band is at or above the warning
+level or the capacity of the feeder (utils.capacity). After an update only the feeders whose forecast object
+changed, and the edges touching them, are evaluated again. Crossing
+intervals come from the diff of the (rows x hours) threshold mask; an
+interval overlapping one already raised is not reported again, and an
+interval that disappeared from a re-evaluated horizon is reported as
+cleared. Events go to sinks: a JSON-lines file or an in-process queue.
+"""
+
+import json
+import queue
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from constants import FEEDER_PAIRS
+from design_system import STATUS_LEVELS
+from utils.capacity import capacity_index, load_status
+from utils.forecast_contract import HOUR, align_forecasts
+from utils.transfer_matrix import transfer_matrix
+
+
+class AlertEvent(NamedTuple):
+    """A crossing interval that was raised or cleared"""
+    state: str              # 'raised' / 'cleared'
+    kind: str               # 'feeder' / 'transfer'
+    subject: str            # Feeder, or 'source -> partner' for a transfer
+    level: str              # 'warning' / 'danger'
+    start: pd.Timestamp     # First hour at or above the threshold
+    end: pd.Timestamp       # Last hour at or above the threshold
+    peak: float             # Highest load or upper band in the interval (A)
+    threshold: float        # Warning level or capacity that was crossed (A)
+
+    def to_json(self) -> str:
+        data = self._asdict()
+        data["start"], data["end"] = self.start.isoformat(), self.end.isoformat()
+        data["peak"], data["threshold"] = round(self.peak, 2), round(self.threshold, 2)
+        return json.dumps(data)
+
+
+# ============================================================
+# CROSSING INTERVALS
+# ============================================================
+
+def crossing_intervals(load: np.ndarray, warning: np.ndarray, capacity: np.ndarray) -> tuple:
+    """
+    Runs of hours at or above the warning level / capacity of each row
+
+    Args:
+        load: (R, H) load, NaN where unknown
+        warning: (R,) warning level per row
+        capacity: (R,) capacity per row
+
+    Returns:
+        Tuple of int arrays (row, level, first, last) and float array peak,
+        one entry per interval; level 1 = warning, 2 = capacity
+    """
+    n_rows, hours = load.shape
+    status = load_status(load, warning[:, None], capacity[:, None])
+    flat = np.append(np.where(np.isnan(load), -np.inf, load).ravel(), -np.inf)
+
+    parts = []
+    for level in (1, 2):
+        mask = np.zeros((n_rows, hours + 2), dtype=np.int8)
+        mask[:, 1:-1] = status >= level
+        change = np.diff(mask, axis=1)
+        rows, first = np.nonzero(change == 1)   # Urutan baris-mayor: awal dan akhir berpasangan
+        _, stop = np.nonzero(change == -1)
+        if len(rows) == 0:
+            continue
+
+        # Puncak tiap interval: satu reduceat atas indeks [awal, akhir, awal, akhir, ...]
+        bounds = np.column_stack([rows * hours + first, rows * hours + stop]).ravel()
+        peak = np.maximum.reduceat(flat, bounds)[::2]
+        parts.append((rows, np.full(len(rows), level), first, stop - 1, peak))
+
+    if not parts:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, empty, empty, np.empty(0)
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+# ============================================================
+# SINKS
+# ============================================================
+
+class FileSink:
+    """Appends events as JSON lines"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def __call__(self, events: list) -> None:
+        if not events:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(event.to_json() + "\n" for event in events)
+
+
+class QueueSink:
+    """Puts events on a queue.Queue for a consumer thread"""
+
+    def __init__(self, events: queue.Queue = None):
+        self.queue = events if events is not None else queue.Queue()
+
+    def __call__(self, events: list) -> None:
+        for event in events:
+            self.queue.put_nowait(event)
+
+
+# ============================================================
+# ENGINE
+# ============================================================
+
+class AlertEngine:
+    """
+    Incremental alert evaluation over the feeder network
+
+    ``update()`` takes the latest forecasts (dict feeder -> ForecastResult);
+    a forecast that is the same object as in the previous update counts as
+    unchanged and costs nothing.
+    """
+
+    def __init__(self, sinks=(), pairs: dict = FEEDER_PAIRS, limits=None):
+        self.sinks = list(sinks)
+        self.pairs = pairs
+        self.limits = limits
+        self._forecasts = {}
+        self._active = {}  # (kind, subject) -> {(level, start): (end, peak, threshold)}
+        self._lock = threading.Lock()
+
+        self._edges_of = {}
+        for source, partners in pairs.items():
+            for partner in partners:
+                self._edges_of.setdefault(source, set()).add((source, partner))
+                self._edges_of.setdefault(partner, set()).add((source, partner))
+
+    def update(self, forecasts: dict) -> list:
+        """
+        Evaluate the changed forecasts and emit new events
+
+        Returns:
+            List of AlertEvent (also passed to every sink)
+        """
+        with self._lock:
+            changed = {
+                feeder.lower(): fc for feeder, fc in forecasts.items()
+                if fc is not None and len(fc) and self._forecasts.get(feeder.lower()) is not fc
+            }
+            if not changed:
+                return []
+            self._forecasts.update(changed)
+
+            events = self._evaluate_feeders(changed) + self._evaluate_edges(changed)
+
+        for sink in self.sinks:
+            try:
+                sink(events)
+            except Exception as e:
+                print(f"Warning: sink alert gagal ({e})")
+        return events
+
+    def active(self) -> list:
+        """Currently raised intervals as 'raised' events"""
+        with self._lock:
+            return [
+                AlertEvent("raised", kind, subject, STATUS_LEVELS[level], start,
+                           end, peak, threshold)
+                for (kind, subject), intervals in self._active.items()
+                for (level, start), (end, peak, threshold) in intervals.items()
+            ]
+
+    def _grid(self, forecasts: dict) -> tuple:
+        start = min(fc.start for fc in forecasts.values())
+        end = max(fc.end for fc in forecasts.values())
+        return start, int((end - start) // HOUR) + 1
+
+    def _evaluate_feeders(self, changed: dict) -> list:
+        start, steps = self._grid(changed)
+        feeders, load = align_forecasts(changed, start, steps)
+        _, upper = align_forecasts(changed, start, steps, feeders, field="upper")
+        warning, capacity = (self.limits or capacity_index()).lookup(feeders)
+        subjects = [("feeder", feeder) for feeder in feeders]
+        return self._diff(subjects, start, steps, np.fmax(load, upper), warning, capacity)
+
+    def _evaluate_edges(self, changed: dict) -> list:
+        edges = {
+            edge for feeder in changed for edge in self._edges_of.get(feeder, ())
+            if edge[0] in self._forecasts and edge[1] in self._forecasts
+        }
+        if not edges:
+            return []
+
+        involved = {f: self._forecasts[f] for edge in edges for f in edge}
+        pairs = {}
+        for source, partner in sorted(edges):
+            pairs.setdefault(source, []).append(partner)
+
+        start, steps = self._grid(involved)
+        matrix = transfer_matrix(involved, start, steps, pairs, limits=self.limits)
+        subjects = [
+            ("transfer", f"{matrix.source(e)} -> {matrix.partner(e)}") for e in range(len(matrix))
+        ]
+        return self._diff(subjects, matrix.start, steps, np.fmax(matrix.load, matrix.upper),
+                          matrix.warning, matrix.capacity)
+
+    def _diff(self, subjects: list, start, steps: int, load, warning, capacity) -> list:
+        """Compare the new intervals of the re-evaluated subjects with the raised ones"""
+        rows, levels, first, last, peaks = crossing_intervals(load, warning, capacity)
+        fresh = {subject: [] for subject in subjects}
+        for r, level, a, b, peak in zip(rows, levels, first, last, peaks):
+            threshold = warning[r] if level == 1 else capacity[r]
+            fresh[subjects[r]].append(
+                (int(level), start + int(a) * HOUR, start + int(b) * HOUR, float(peak), float(threshold))
+            )
+
+        horizon_end = start + (steps - 1) * HOUR
+        events = []
+        for subject, intervals in fresh.items():
+            kind, name = subject
+            old = self._active.get(subject, {})
+            new = {}
+            for level, a, b, peak, threshold in intervals:
+                # Sama dengan interval yang sudah dilaporkan bila level sama dan waktunya bertumpuk
+                seen = any(
+                    lv == level and s <= b and a <= e
+                    for (lv, s), (e, _, _) in old.items()
+                )
+                if not seen:
+                    events.append(AlertEvent("raised", kind, name, STATUS_LEVELS[level], a, b, peak, threshold))
+                new[(level, a)] = (b, peak, threshold)
+
+            for (level, a), (b, peak, threshold) in old.items():
+                if b < start or a > horizon_end:
+                    continue  # Di luar horizon baru: kedaluwarsa, bukan dibatalkan
+                if not any(lv == level and s <= b and a <= e for (lv, s), (e, _, _) in new.items()):
+                    events.append(AlertEvent("cleared", kind, name, STATUS_LEVELS[level], a, b, peak, threshold))
+
+            if new:
+                self._active[subject] = new
+            else:
+                self._active.pop(subject, None)
+        return events
@@ -0,0 +1,419 @@
+"""
+Rolling-Origin Backtest
+Replays the load history with many forecast origins: at every origin each
+feeder's ``forecast()`` only sees the data available at that time, and the
+result is compared with what was measured afterwards. State-space models
+take the batched path instead: one filter pass over the history and all
+origins forecast at once. Feeders and origin chunks run in parallel
+processes; finished forecasts are cached on disk so a rerun only computes
+new origins.
+"""
+
+import importlib
+import re
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from constants import (
+    BACKTEST_CHUNK_ORIGINS,
+    BASELINE_NAIVE_WEIGHT,
+    BASELINE_PROFILE_DAYS,
+    BACKTEST_DAYS,
+    BACKTEST_DIR,
+    BACKTEST_STRIDE_HOURS,
+    BACKTEST_WARMUP_DAYS,
+    FEEDER_MODULES,
+    FORECAST_HOURS,
+)
+from utils.baseline_forecast import WEEK_HOURS
+from utils.forecast_contract import hour_offset
+from utils.model_refit import training_exog
+from utils.model_store import artifact_key, load_artifact, unwrap_results
+from utils.state_space import multi_origin_forecast
+
+
+class BacktestRun(NamedTuple):
+    """Forecasts of one feeder at a set of origins"""
+    origins: pd.DatetimeIndex   # Last observed hour at each origin
+    forecasts: np.ndarray       # (n_origins, steps), NaN where the forecast failed
+    baseline: np.ndarray        # (n_origins, steps) seasonal-profile baseline
+    latency: np.ndarray         # (n_origins,) seconds per forecast() call, NaN if failed
+
+
+# ============================================================
+# ORIGINS
+# ============================================================
+
+def backtest_origins(history: pd.Series, days: int = BACKTEST_DAYS,
+                     stride: int = BACKTEST_STRIDE_HOURS, steps: int = FORECAST_HOURS,
+                     warmup_days: int = BACKTEST_WARMUP_DAYS) -> pd.DatetimeIndex:
+    """
+    Forecast origins over the last ``days`` of an hourly series
+
+    An origin is an observed hour. Origins need ``warmup_days`` of history
+    before them and ``steps`` hours after them, so every forecast can be
+    scored against the full horizon.
+    """
+    observed = history.dropna().index
+    if observed.empty:
+        return pd.DatetimeIndex([])
+
+    last = observed.max() - pd.Timedelta(hours=steps)
+    first = max(last - pd.Timedelta(days=days), observed.min() + pd.Timedelta(days=warmup_days))
+    grid = pd.date_range(start=first.ceil('H'), end=last, freq=f'{stride}H')
+    return grid[grid.isin(observed)]
+
+
+def hourly_grid(history: pd.Series) -> pd.Series:
+    """History on a gapless hourly grid, missing hours as NaN"""
+    return history.groupby(history.index.floor('H')).mean().asfreq('H')
+
+
+# ============================================================
+# WORKER
+# ============================================================
+
+def _weekend(epoch_hours: np.ndarray) -> np.ndarray:
+    """Weekend flag (0/1) of hours counted from the epoch (1970-01-01 was a Thursday)"""
+    return ((epoch_hours // 24 + 3) % 7 >= 5).astype(np.intp)
+
+
+def _baseline_rows(history: pd.Series, origins: pd.DatetimeIndex, steps: int) -> np.ndarray:
+    """
+    Seasonal-profile baseline at each origin, shape (n_origins, steps)
+
+    Same blend as baseline_forecast() on a profile table built at the
+    origin, for all origins at once: every origin's profile window is one
+    row gathered from the shared hourly grid, and the weekday/weekend
+    hour-of-day medians are taken along the day axis of that window.
+    """
+    n = len(origins)
+    span = BASELINE_PROFILE_DAYS * 24
+    grid = hourly_grid(history)
+    values = np.concatenate([np.full(span - 1, np.nan), grid.to_numpy(dtype=float)])
+    positions = grid.index.get_indexer(origins)
+    window = values[positions[:, None] + np.arange(span)]  # (n, span), kolom terakhir = origin
+
+    # Kolom k tiap blok 24 jam = jam ke-(k + 1) setelah jam origin
+    epoch_hours = origins.values.astype('datetime64[h]').astype(np.int64)
+    weekend = _weekend(epoch_hours[:, None] - (span - 1) + np.arange(span)).reshape(n, BASELINE_PROFILE_DAYS, 24)
+    days = window.reshape(n, BASELINE_PROFILE_DAYS, 24)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # Sel (tipe hari, jam) tanpa data
+        profile = np.stack([np.nanmedian(np.where(weekend == w, days, np.nan), axis=1) for w in (0, 1)], axis=1)
+        fallback = np.nanmedian(window, axis=1)
+
+    # Sel kosong: tipe hari lain, lalu median seluruh jendela (seperti _fill_profile)
+    profile[:, 0] = np.where(np.isnan(profile[:, 0]), profile[:, 1], profile[:, 0])
+    profile[:, 1] = np.where(np.isnan(profile[:, 1]), profile[:, 0], profile[:, 1])
+    profile = np.where(np.isnan(profile), fallback[:, None, None], profile)
+
+    ahead = np.arange(1, steps + 1)
+    rows = np.arange(n)[:, None]
+    median = profile[rows, _weekend(epoch_hours[:, None] + ahead), (ahead - 1) % 24]
+    naive = window[:, span - WEEK_HOURS + (ahead - 1) % WEEK_HOURS]  # Jam yang sama minggu lalu
+    naive = np.where(np.isnan(naive), median, naive)
+    return BASELINE_NAIVE_WEIGHT * naive + (1 - BASELINE_NAIVE_WEIGHT) * median
+
+
+def batch_model(feeder: str):
+    """
+    Module and fitted results for the batched backtest path, or None
+
+    Batching needs a state-space artifact and, for models with exog, the
+    module's history_exog(). Modules with random future exog
+    (forecast_scenarios) stay on the per-origin path, since their
+    forecast() does not use the observed event flags. So do modules that
+    set ``BATCHABLE = False``: their history exog is built from the measured
+    load, so each target hour would see the value it is scored against.
+    """
+    module = importlib.import_module(f"feeders.{FEEDER_MODULES[feeder]}")
+    if not getattr(module, 'BATCHABLE', True) or hasattr(module, 'forecast_scenarios'):
+        return None
+    if artifact_key(module.MODEL_PATH)[1] is None:
+        return None
+    results, _ = unwrap_results(load_artifact(module.MODEL_PATH))
+    if results is None:
+        return None
+    if getattr(results.model, 'k_exog', 0) and not hasattr(module, 'history_exog'):
+        return None
+    return module, results
+
+
+def _run_batched(feeder: str, history: pd.Series, origins: pd.DatetimeIndex, steps: int) -> BacktestRun:
+    """Forecast one feeder at all origins with one filter pass (runs in a worker process)"""
+    module, results = batch_model(feeder)
+    grid = hourly_grid(history)
+
+    exog = None
+    if getattr(results.model, 'k_exog', 0):
+        exog = training_exog(module, grid.to_frame('arus'), results.model.exog_names)
+
+    start = time.perf_counter()
+    forecasts = multi_origin_forecast(results, grid, grid.index.get_indexer(origins), steps, exog)
+    elapsed = time.perf_counter() - start
+
+    # Latensi per origin = waktu batch dibagi rata
+    latency = np.full(len(origins), elapsed / max(len(origins), 1))
+    return BacktestRun(origins, np.maximum(forecasts, 0), _baseline_rows(history, origins, steps), latency)
+
+
+def _run_chunk(feeder: str, history: pd.Series, origins: pd.DatetimeIndex, steps: int) -> BacktestRun:
+    """Forecast one feeder at a chunk of origins (runs in a worker process)"""
+    module = importlib.import_module(f"feeders.{FEEDER_MODULES[feeder]}")
+
+    n = len(origins)
+    forecasts = np.full((n, steps), np.nan)
+    latency = np.full(n, np.nan)
+
+    # Origins are ascending, so the refreshed model state is extended incrementally
+    for i, origin in enumerate(origins):
+        seen = history.loc[:origin].dropna()
+        df_seen = seen.to_frame('arus')
+
+        try:
+            start = time.perf_counter()
+            fc = module.forecast(df_seen, steps=steps)
+            latency[i] = time.perf_counter() - start
+        except Exception as e:
+            print(f"Warning: Backtest '{feeder}' gagal pada origin {origin} ({e})")
+            fc = None
+
+        if fc is not None:
+            shift = hour_offset(origin + pd.Timedelta(hours=1), fc.start)
+            if 0 <= shift < steps:
+                count = min(len(fc.values), steps - shift)
+                forecasts[i, shift:shift + count] = fc.values[:count]
+
+    return BacktestRun(origins, forecasts, _baseline_rows(history, origins, steps), latency)
+
+
+# ============================================================
+# CACHE
+# ============================================================
+
+def _cache_path(feeder: str, cache_dir=BACKTEST_DIR):
+    slug = re.sub(r'[^a-z0-9]+', '_', feeder.lower()).strip('_')
+    return cache_dir / "cache" / f"{slug}.npz"
+
+
+def _artifact(feeder: str) -> tuple:
+    module = importlib.import_module(f"feeders.{FEEDER_MODULES[feeder]}")
+    return artifact_key(module.MODEL_PATH)
+
+
+def _artifact_tag(feeder: str) -> str:
+    return repr(_artifact(feeder))
+
+
+def load_cached_run(feeder: str, steps: int, cache_dir=BACKTEST_DIR, mode: str = 'forecast'):
+    """Cached backtest forecasts of a feeder, or None if missing, from another model or another mode"""
+    path = _cache_path(feeder, cache_dir)
+    if not path.exists():
+        return None
+    with np.load(path, allow_pickle=False) as data:
+        if str(data['artifact']) != _artifact_tag(feeder) or data['forecasts'].shape[1] != steps:
+            return None
+        # Cache lama tanpa mode, atau dari jalur lain (batch vs forecast), dihitung ulang
+        if 'mode' not in data.files or str(data['mode']) != mode:
+            return None
+        return BacktestRun(
+            pd.DatetimeIndex(data['origins'].astype('datetime64[ns]')),
+            data['forecasts'], data['baseline'], data['latency'],
+        )
+
+
+def save_cached_run(feeder: str, run: BacktestRun, cache_dir=BACKTEST_DIR, mode: str = 'forecast') -> None:
+    """Store backtest forecasts of a feeder, tagged with the model artifact and the backtest mode"""
+    path = _cache_path(feeder, cache_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(
+        path,
+        artifact=np.array(_artifact_tag(feeder)),
+        mode=np.array(mode),
+        origins=run.origins.values.astype('int64'),
+        forecasts=run.forecasts,
+        baseline=run.baseline,
+        latency=run.latency,
+    )
+
+
+def merge_runs(runs) -> BacktestRun:
+    """Concatenate runs and sort by origin (a later run wins on duplicates)"""
+    runs = [r for r in runs if r is not None and len(r.origins)]
+    origins = pd.DatetimeIndex(np.concatenate([r.origins.values for r in runs]))
+    order = np.argsort(origins.values, kind='stable')
+    keep = ~pd.Index(origins[order]).duplicated(keep='last')
+    order = order[keep]
+    return BacktestRun(
+        origins[order],
+        np.concatenate([r.forecasts for r in runs])[order],
+        np.concatenate([r.baseline for r in runs])[order],
+        np.concatenate([r.latency for r in runs])[order],
+    )
+
+
+# ============================================================
+# METRICS
+# ============================================================
+
+def actual_matrix(history: pd.Series, origins: pd.DatetimeIndex, steps: int) -> np.ndarray:
+    """Measured load after each origin, shape (n_origins, steps), NaN where missing"""
+    grid = hourly_grid(history)
+    values = np.append(grid.to_numpy(dtype=float), np.full(steps, np.nan))
+    positions = grid.index.get_indexer(origins)
+    return values[positions[:, None] + 1 + np.arange(steps)]
+
+
+def horizon_errors(forecasts: np.ndarray, actuals: np.ndarray) -> pd.DataFrame:
+    """
+    Error statistics per forecast horizon
+
+    Returns:
+        DataFrame indexed by horizon (1..steps) with 'mae' and 'mape' (%)
+    """
+    error = np.abs(forecasts - actuals)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(actuals > 1.0, error / np.abs(actuals) * 100, np.nan)
+        return pd.DataFrame({
+            'mae': np.nanmean(error, axis=0),
+            'mape': np.nanmean(pct, axis=0),
+        }, index=pd.RangeIndex(1, forecasts.shape[1] + 1, name='horizon'))
+
+
+def peak_errors(forecasts: np.ndarray, actuals: np.ndarray, period: int = 24) -> np.ndarray:
+    """
+    Absolute error of the daily peak for each day of the horizon
+
+    Returns:
+        Array (n_days,) of the mean |max forecast - max actual| per 24-hour block
+    """
+    n_days = forecasts.shape[1] // period
+    shape = (forecasts.shape[0], n_days, period)
+    f = forecasts[:, :n_days * period].reshape(shape)
+    a = actuals[:, :n_days * period].reshape(shape)
+    with np.errstate(invalid='ignore'):
+        valid = ~np.isnan(f).any(axis=2) & ~np.isnan(a).any(axis=2)
+        diff = np.where(valid, np.abs(f.max(axis=2) - a.max(axis=2)), np.nan)
+        return np.nanmean(diff, axis=0)
+
+
+def summarize_run(feeder: str, run: BacktestRun, history: pd.Series, steps: int, mode: str = 'forecast') -> tuple:
+    """
+    Accuracy and latency summary of one feeder
+
+    Returns:
+        Tuple of (report row dict, MAE per horizon as a Series)
+    """
+    actuals = actual_matrix(history, run.origins, steps)
+    by_horizon = horizon_errors(run.forecasts, actuals)
+    baseline = horizon_errors(run.baseline, actuals)
+    peaks = peak_errors(run.forecasts, actuals)
+    latency_ms = run.latency[~np.isnan(run.latency)] * 1000
+
+    row = {
+        'feeder': feeder,
+        'mode': mode,
+        'origins': len(run.origins),
+        'failed': int(np.isnan(run.latency).sum()),
+        'mae': round(float(np.nanmean(by_horizon['mae'])), 2),
+        'mape': round(float(np.nanmean(by_horizon['mape'])), 2),
+        'peak_error': round(float(np.nanmean(peaks)), 2),
+        'mae_h1': round(float(by_horizon['mae'].iloc[0]), 2),
+        'mae_h24': round(float(by_horizon['mae'].iloc[min(23, steps - 1)]), 2),
+        'mae_h72': round(float(by_horizon['mae'].iloc[-1]), 2),
+        'baseline_mae': round(float(np.nanmean(baseline['mae'])), 2),
+        'latency_ms_mean': round(float(latency_ms.mean()), 1) if latency_ms.size else np.nan,
+        'latency_ms_p95': round(float(np.percentile(latency_ms, 95)), 1) if latency_ms.size else np.nan,
+    }
+    return row, by_horizon['mae'].rename(feeder)
+
+
+# ============================================================
+# DRIVER
+# ============================================================
+
+def run_backtest(histories: dict, days: int = BACKTEST_DAYS, stride: int = BACKTEST_STRIDE_HOURS,
+                 steps: int = FORECAST_HOURS, workers: int = None,
+                 chunk_size: int = BACKTEST_CHUNK_ORIGINS, cache_dir=BACKTEST_DIR,
+                 batched: bool = True) -> tuple:
+    """
+    Backtest many feeders over rolling origins
+
+    Args:
+        histories: Mapping feeder name -> hourly load series ('arus', DatetimeIndex)
+        days: Span replayed with forecast origins
+        stride: Hours between origins
+        steps: Forecast horizon
+        workers: Worker processes (default: number of CPU cores)
+        chunk_size: Origins per worker task
+        cache_dir: Folder for cached forecasts (None disables the cache)
+        batched: Use the one-pass state-space path where the model allows it
+            ('batch' in the report); otherwise every origin calls forecast()
+
+    Returns:
+        Tuple of (report DataFrame one row per feeder,
+                  DataFrame of MAE by horizon with one column per feeder)
+    """
+    histories = dict(histories)
+    cached, tasks, modes = {}, [], {}
+    for feeder, history in list(histories.items()):
+        if _artifact(feeder)[1] is None:
+            print(f"Warning: Model '{feeder}' tidak ditemukan, backtest dilewati.")
+            histories.pop(feeder)
+            continue
+
+        # Jalur batch: satu task per feeder (satu kali filter untuk semua origin)
+        modes[feeder] = 'batch' if batched and batch_model(feeder) is not None else 'forecast'
+
+        origins = backtest_origins(history, days, stride, steps)
+        run = load_cached_run(feeder, steps, cache_dir, modes[feeder]) if cache_dir is not None else None
+        cached[feeder] = run
+        todo = origins if run is None else origins[~origins.isin(run.origins)]
+
+        size = len(todo) if modes[feeder] == 'batch' else chunk_size
+        for i in range(0, len(todo), max(size, 1)):
+            tasks.append((feeder, todo[i:i + size]))
+
+    results = {feeder: [run] for feeder, run in cached.items()}
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(
+                    _run_batched if modes[feeder] == 'batch' else _run_chunk,
+                    feeder, histories[feeder], chunk, steps,
+                ): feeder
+                for feeder, chunk in tasks
+            }
+            for future in as_completed(futures):
+                feeder = futures[future]
+                try:
+                    results[feeder].append(future.result())
+                except Exception as e:
+                    print(f"Warning: Backtest '{feeder}' gagal ({e})")
+
+    rows, horizons = [], []
+    for feeder, history in histories.items():
+        if not any(r is not None and len(r.origins) for r in results[feeder]):
+            continue
+        run = merge_runs(results[feeder])
+        if cache_dir is not None:
+            save_cached_run(feeder, run, cache_dir, modes[feeder])
+
+        # Laporan hanya untuk origin periode ini (cache bisa berisi origin lama)
+        window = backtest_origins(history, days, stride, steps)
+        mask = run.origins.isin(window)
+        run = BacktestRun(run.origins[mask], run.forecasts[mask], run.baseline[mask], run.latency[mask])
+
+        row, mae = summarize_run(feeder, run, history, steps, modes[feeder])
+        rows.append(row)
+        horizons.append(mae)
+
+    report = pd.DataFrame(rows)
+    by_horizon = pd.concat(horizons, axis=1) if horizons else pd.DataFrame()
+    return report, by_horizon
@@ -0,0 +1,186 @@
+"""
+Seasonal-Profile Baseline Forecast
+Forecast for any feeder in the database, also those without a model module:
+a blend of the weekly seasonal naive value and a weekday/weekend
+hour-of-day median profile. The profiles are precomputed once per feeder
+and data update, so a 72-hour forecast is a handful of array lookups.
+"""
+
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from constants import (
+    BASELINE_PROFILE_DAYS,
+    BASELINE_NAIVE_WEIGHT,
+    BASELINE_BAND_QUANTILES,
+    FORECAST_HOURS,
+)
+from utils.forecast_contract import ForecastResult, make_forecast
+
+WEEK_HOURS = 168
+
+
+# ============================================================
+# PROFILE TABLES
+# ============================================================
+
+class ProfileTable(NamedTuple):
+    """Precomputed baseline inputs for one feeder"""
+    end: pd.Timestamp       # Last observed hour
+    end_hour: int           # end.hour
+    end_dayofweek: int      # end.dayofweek
+    median: np.ndarray      # (2, 24) median load, row 0 = weekday, row 1 = weekend
+    spread_low: np.ndarray  # (2, 24) median - lower band quantile
+    spread_high: np.ndarray # (2, 24) upper band quantile - median
+    last_week: np.ndarray   # (168,) hourly load of the last week, NaN where missing
+
+
+def _fill_profile(table: np.ndarray, fallback: float) -> np.ndarray:
+    """Fill empty (day type, hour) cells: other day type, then the fallback"""
+    table = table.copy()
+    for row in (0, 1):
+        missing = np.isnan(table[row])
+        table[row, missing] = table[1 - row, missing]
+    table[np.isnan(table)] = fallback
+    return table
+
+
+def build_profile_table(history: pd.Series, days: int = BASELINE_PROFILE_DAYS,
+                        quantiles=BASELINE_BAND_QUANTILES) -> ProfileTable:
+    """
+    Build the profile table from an hourly load series
+
+    Args:
+        history: Load series ('arus') with a DatetimeIndex
+        days: History window used for the profiles
+        quantiles: (low, high) quantiles of the prediction band
+
+    Returns:
+        ProfileTable
+    """
+    history = history.dropna().sort_index()
+    if history.empty:
+        raise ValueError("Data historis kosong, baseline tidak dapat dibuat")
+
+    end = history.index.max().floor('H')
+    window = history[history.index > end - pd.Timedelta(days=days)]
+
+    hours = window.index.hour.to_numpy()
+    weekend = (window.index.dayofweek.to_numpy() >= 5).astype(int)
+    values = window.to_numpy(dtype=float)
+
+    # Satu groupby untuk tiga quantile, hasil disusun ke tabel (2, 24)
+    q_low, q_high = quantiles
+    stats = pd.Series(values).groupby([weekend, hours]).quantile([q_low, 0.5, q_high]).unstack()
+    tables = {}
+    for q in (q_low, 0.5, q_high):
+        table = np.full((2, 24), np.nan)
+        for (w, h), v in stats[q].items():
+            table[w, h] = v
+        tables[q] = _fill_profile(table, float(np.median(values)))
+
+    week_index = pd.date_range(end=end, periods=WEEK_HOURS, freq='H')
+    last_week = history.groupby(history.index.floor('H')).mean().reindex(week_index).to_numpy(dtype=float)
+
+    return ProfileTable(
+        end=end,
+        end_hour=end.hour,
+        end_dayofweek=end.dayofweek,
+        median=tables[0.5],
+        spread_low=tables[0.5] - tables[q_low],
+        spread_high=tables[q_high] - tables[0.5],
+        last_week=last_week,
+    )
+
+
+# ============================================================
+# FORECAST
+# ============================================================
+
+def baseline_forecast(table: ProfileTable, steps: int = FORECAST_HOURS, start_datetime=None,
+                      naive_weight: float = BASELINE_NAIVE_WEIGHT) -> tuple:
+    """
+    Baseline forecast from a precomputed profile table (pure array lookups)
+
+    Args:
+        table: ProfileTable of the feeder
+        steps: Forecast horizon
+        start_datetime: First forecast hour (default: one hour after table.end);
+            may lie at or before table.end, those hours use the profile only
+        naive_weight: Weight of the seasonal naive value
+
+    Returns:
+        Tuple of arrays (mean, lower, upper), each of shape (steps,)
+    """
+    offset = 1
+    if start_datetime is not None:
+        offset = int((pd.Timestamp(start_datetime) - table.end) // pd.Timedelta(hours=1))
+
+    ahead = np.arange(offset, offset + steps)          # Hours after table.end (<= 0: sudah lewat)
+    clock = table.end_hour + ahead                     # // dan % membulatkan ke bawah, aman untuk negatif
+    hour = clock % 24
+    weekend = ((table.end_dayofweek + clock // 24) % 7 >= 5).astype(np.intp)
+
+    profile = table.median[weekend, hour]
+    # Nilai di jam yang sama minggu lalu; untuk jam <= table.end itu di luar last_week
+    naive = np.where(ahead >= 1, table.last_week[(ahead - 1) % WEEK_HOURS], np.nan)
+    naive = np.where(np.isnan(naive), profile, naive)
+
+    mean = naive_weight * naive + (1 - naive_weight) * profile
+    lower = np.maximum(mean - table.spread_low[weekend, hour], 0)
+    upper = mean + table.spread_high[weekend, hour]
+    return mean, lower, upper
+
+
+_TABLES = {}
+_LOCK = threading.Lock()
+
+
+def get_profile_table(feeder: str, history: pd.Series) -> ProfileTable:
+    """Profile table for a feeder, rebuilt only when newer data arrives"""
+    key = feeder.lower()
+    hwm = history.index.max()
+    with _LOCK:
+        cached = _TABLES.get(key)
+    if cached is not None and cached[0] == hwm:
+        return cached[1]
+
+    table = build_profile_table(history)
+    with _LOCK:
+        _TABLES[key] = (hwm, table)
+    return table
+
+
+def forecast(feeder: str, df_historical: pd.DataFrame, steps: int = FORECAST_HOURS,
+             start_datetime=None) -> ForecastResult:
+    """
+    Baseline forecast in the same format as the feeder modules
+
+    Args:
+        feeder: Feeder name (profile cache key)
+        df_historical: DataFrame with DatetimeIndex and column 'arus'
+        steps: Forecast horizon
+        start_datetime: First forecast hour (default: one hour after the data)
+
+    Returns:
+        ForecastResult with prediction band
+    """
+    table = get_profile_table(feeder, df_historical['arus'])
+    if start_datetime is None:
+        start_datetime = table.end + pd.Timedelta(hours=1)
+
+    mean, lower, upper = baseline_forecast(table, steps, start_datetime)
+    return make_forecast(start_datetime, mean.round(2), lower=lower.round(2), upper=upper.round(2),
+                         model_version="baseline")
+
+
+def clear_profile_cache(feeder: str = None) -> None:
+    """Drop profile tables for one feeder, or for all feeders"""
+    with _LOCK:
+        if feeder is None:
+            _TABLES.clear()
+        else:
+            _TABLES.pop(feeder.lower(), None)
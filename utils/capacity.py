@@ -0,0 +1,168 @@
+"""
+Feeder Capacity Index
+Per-feeder current limits instead of one global MAX_CAPACITY. The relay
+setting ``iset`` of data_bebanrst is the capacity of a feeder, the nominal
+current ``inom`` when no setting is recorded; CAPACITY_OVERRIDES replaces
+both and feeders without metadata keep MAX_CAPACITY. The warning level is
+WARNING_PCT of the capacity. Limits are stored as arrays, so the status of
+many feeders, edges or hours is one lookup and two comparisons.
+"""
+
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from constants import CAPACITY_OVERRIDES, CAPACITY_RETRY_SECONDS, MAX_CAPACITY, WARNING_PCT
+
+NO_DATA = -1  # Status code without a load value
+
+
+class CapacityIndex(NamedTuple):
+    """Current limits of all known feeders"""
+    feeders: tuple          # Lowercase names, row order of the arrays
+    position: dict          # feeder -> row
+    capacity: np.ndarray    # (F,) capacity (A)
+    warning: np.ndarray     # (F,) warning level (A)
+    source: tuple           # 'override' / 'iset' / 'inom' / 'default' per feeder
+    default: tuple          # (warning, capacity) of feeders not in the index
+
+    def rows(self, feeders) -> np.ndarray:
+        """Row of each feeder, -1 if unknown"""
+        return np.array([self.position.get(f.lower(), -1) for f in feeders], dtype=np.intp)
+
+    def lookup(self, feeders) -> tuple:
+        """
+        Limits of several feeders as arrays
+
+        Returns:
+            Tuple of (warning, capacity), each of shape (len(feeders),)
+        """
+        rows = self.rows(feeders)  # -1 memilih nilai default di ujung array
+        warning = np.append(self.warning, self.default[0])[rows]
+        capacity = np.append(self.capacity, self.default[1])[rows]
+        return warning, capacity
+
+    def limits(self, feeder: str) -> tuple:
+        """(warning, capacity) of one feeder in A"""
+        row = self.position.get(feeder.lower())
+        if row is None:
+            return self.default
+        return float(self.warning[row]), float(self.capacity[row])
+
+    def table(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "feeder": self.feeders,
+            "capacity": self.capacity,
+            "warning": self.warning,
+            "source": self.source,
+        })
+
+
+def parse_rating(value) -> float:
+    """Current rating from a VARCHAR column ('400', '320 A', '0', ''), NaN if not usable"""
+    if value is None:
+        return np.nan
+    text = str(value).strip().upper().rstrip("A").strip().replace(",", ".")
+    try:
+        rating = float(text)
+    except ValueError:
+        return np.nan
+    return rating if rating > 0 else np.nan
+
+
+def build_capacity_index(ratings: pd.DataFrame, overrides: dict = CAPACITY_OVERRIDES,
+                         default: float = MAX_CAPACITY, warning_pct: float = WARNING_PCT) -> CapacityIndex:
+    """
+    Build the index from feeder metadata
+
+    Args:
+        ratings: DataFrame with columns 'feeder', 'iset', 'inom'
+        overrides: Dict feeder -> capacity (A), wins over the metadata
+        default: Capacity of feeders without a usable rating
+        warning_pct: Warning level as a fraction of the capacity
+
+    Returns:
+        CapacityIndex
+    """
+    capacity = {}
+    source = {}
+    for row in ratings.itertuples(index=False):
+        feeder = str(row.feeder).strip().lower()
+        for column in ("iset", "inom"):
+            rating = parse_rating(getattr(row, column, None))
+            if not np.isnan(rating):
+                capacity[feeder], source[feeder] = rating, column
+                break
+        else:
+            capacity.setdefault(feeder, default)
+            source.setdefault(feeder, "default")
+
+    for feeder, rating in overrides.items():
+        capacity[feeder.lower()], source[feeder.lower()] = float(rating), "override"
+
+    feeders = tuple(sorted(capacity))
+    values = np.array([capacity[f] for f in feeders], dtype=float)
+    return CapacityIndex(
+        feeders=feeders,
+        position={f: i for i, f in enumerate(feeders)},
+        capacity=values,
+        warning=values * warning_pct,
+        source=tuple(source[f] for f in feeders),
+        default=(default * warning_pct, default),
+    )
+
+
+def load_status(load, warning, capacity) -> np.ndarray:
+    """
+    Status codes (index into design_system.STATUS_LEVELS) of loads
+
+    Same rule as get_status_color: below warning is safe, below capacity is
+    warning, else danger; NaN loads get NO_DATA. ``warning`` and ``capacity``
+    broadcast against ``load`` (scalars, per feeder or per edge).
+    """
+    load = np.asarray(load, dtype=float)
+    with np.errstate(invalid='ignore'):
+        status = (load >= warning).astype(np.int8) + (load >= capacity)
+    return np.where(np.isnan(load), NO_DATA, status).astype(np.int8)
+
+
+_INDEX = None   # (CapacityIndex, retry time or None)
+_INDEX_LOCK = threading.Lock()
+
+
+def capacity_index() -> CapacityIndex:
+    """
+    Capacity index from the database, built on first use
+
+    If the metadata query fails, the MAX_CAPACITY fallback is served for
+    CAPACITY_RETRY_SECONDS and the query is retried after that, so one
+    database hiccup does not fix the defaults for the process lifetime.
+    """
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is not None and (_INDEX[1] is None or time.monotonic() < _INDEX[1]):
+            return _INDEX[0]
+
+    retry = None
+    try:
+        from utils.db_util import get_feeder_ratings
+        ratings = get_feeder_ratings()
+    except Exception as e:
+        print(f"Warning: metadata iset/inom gagal dimuat ({e}), memakai MAX_CAPACITY")
+        ratings = pd.DataFrame(columns=["feeder", "iset", "inom"])
+        retry = time.monotonic() + CAPACITY_RETRY_SECONDS
+
+    index = build_capacity_index(ratings)
+    with _INDEX_LOCK:
+        _INDEX = (index, retry)
+    return index
+
+
+def clear_capacity_index() -> None:
+    """Rebuild the index on next use (after metadata or override changes)"""
+    global _INDEX
+    with _INDEX_LOCK:
+        _INDEX = None
@@ -0,0 +1,302 @@
+"""
+Load Coincidence Index
+Whether a transfer is safe depends on whether two feeders peak together.
+The index keeps, for every feeder pair, the running sums behind the
+correlation of their hourly loads and the number of days their daily peaks
+fell within COINCIDENCE_PEAK_HOURS of each other, plus the sum of their
+daily combined peaks. A new day is an O(feeders^2) update of those sums,
+never a pass over the full history, so partners can be ranked and pruned
+before any forecast runs.
+"""
+
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from constants import COINCIDENCE_DIR, COINCIDENCE_PEAK_HOURS
+
+INDEX_FILE = "index.npz"
+_SUMS = ("count", "sum", "sum_sq", "sum_prod", "days", "together", "peak_days", "peak_sum")
+
+
+class CoincidenceIndex:
+    """
+    Pairwise correlation and peak coincidence of daily load profiles
+
+    ``count[i, j]`` is the number of hours both feeders had a reading,
+    ``sum[i, j]`` and ``sum_sq[i, j]`` the sums of feeder i over those hours
+    (so row j of the transpose belongs to feeder j), ``sum_prod`` the sum of
+    products. ``days`` counts days both feeders had readings, ``together``
+    those with coinciding peaks. ``peak_sum`` adds up the daily peak of the
+    summed load over the ``peak_days`` with at least one shared hour.
+    """
+
+    def __init__(self, feeders=(), tolerance: int = COINCIDENCE_PEAK_HOURS):
+        self.feeders = []
+        self.tolerance = int(tolerance)
+        self.last_day = None
+        for name in _SUMS:
+            setattr(self, name, np.zeros((0, 0)))
+        self._extend(feeders)
+
+    def __len__(self) -> int:
+        return len(self.feeders)
+
+    def _extend(self, feeders) -> None:
+        """Add rows and columns for feeders not seen before"""
+        new = [f.lower() for f in dict.fromkeys(feeders) if f.lower() not in self.feeders]
+        if not new:
+            return
+        n = len(self.feeders) + len(new)
+        for name in _SUMS:
+            grown = np.zeros((n, n))
+            old = getattr(self, name)
+            grown[:len(old), :len(old)] = old
+            setattr(self, name, grown)
+        self.feeders += new
+
+    def rows(self, feeders) -> np.ndarray:
+        """Row of each feeder, -1 if unknown"""
+        position = {feeder: i for i, feeder in enumerate(self.feeders)}
+        return np.array([position.get(f.lower(), -1) for f in feeders], dtype=np.intp)
+
+    # --------------------------------------------------------
+    # UPDATES
+    # --------------------------------------------------------
+
+    def add_days(self, days, feeders, loads: np.ndarray) -> None:
+        """
+        Fold whole days into the sums
+
+        Args:
+            days: Dates of the days, ascending and after ``last_day``
+            feeders: Feeder names of axis 1
+            loads: Hourly load, shape (len(days), len(feeders), 24), NaN where missing
+        """
+        days = pd.DatetimeIndex(days).normalize()
+        if len(days) == 0:
+            return
+        if self.last_day is not None and days.min() <= self.last_day:
+            raise ValueError(f"Hari {days.min():%Y-%m-%d} sudah masuk indeks")
+        self._extend(feeders)
+        rows = self.rows(feeders)
+
+        valid = ~np.isnan(loads)
+        x = np.where(valid, loads, 0.0)
+        m = valid.astype(float)
+        block = np.ix_(rows, rows)
+        # Semua pasangan sekaligus: jumlah atas jam yang terisi di kedua feeder
+        self.count[block] += np.einsum("dfh,dgh->fg", m, m)
+        self.sum[block] += np.einsum("dfh,dgh->fg", x, m)
+        self.sum_sq[block] += np.einsum("dfh,dgh->fg", x * x, m)
+        self.sum_prod[block] += np.einsum("dfh,dgh->fg", x, x)
+
+        has_day = valid.any(axis=2)  # (D, F)
+        peak_hour = np.argmax(np.where(valid, loads, -np.inf), axis=2)
+        gap = np.abs(peak_hour[:, :, None] - peak_hour[:, None, :])
+        gap = np.minimum(gap, 24 - gap)  # Jam puncak 23 dan 0 berdekatan
+        both = has_day[:, :, None] & has_day[:, None, :]
+        self.days[block] += both.sum(axis=0)
+        self.together[block] += (both & (gap <= self.tolerance)).sum(axis=0)
+
+        # Puncak harian beban gabungan (jam yang terisi di kedua feeder)
+        combined = np.where(valid[:, :, None] & valid[:, None, :],
+                            loads[:, :, None] + loads[:, None, :], -np.inf)
+        daily_peak = combined.max(axis=3)  # (D, F, F)
+        shared = np.isfinite(daily_peak)
+        self.peak_days[block] += shared.sum(axis=0)
+        self.peak_sum[block] += np.where(shared, daily_peak, 0.0).sum(axis=0)
+        self.last_day = days.max()
+
+    def add_history(self, df_long: pd.DataFrame) -> int:
+        """
+        Fold the complete days of a long-format history that are newer than ``last_day``
+
+        Args:
+            df_long: Columns 'timestamp', 'feeder', 'arus' (as from db_util);
+                a day runs from 01:00 to 00:00 of the next date, like one
+                row of data_bebanrst. The newest day may still be filling and
+                is left for the next update.
+
+        Returns:
+            Number of days added
+        """
+        shifted = pd.to_datetime(df_long["timestamp"]) - pd.Timedelta(hours=1)
+        frame = pd.DataFrame({
+            "day": shifted.dt.normalize(),
+            "hour": shifted.dt.hour,
+            "feeder": df_long["feeder"].str.lower(),
+            "arus": pd.to_numeric(df_long["arus"], errors="coerce"),
+        })
+        complete = frame["day"] < frame["day"].max()
+        if self.last_day is not None:
+            complete &= frame["day"] > self.last_day
+        frame = frame[complete]
+        if frame.empty:
+            return 0
+
+        days = np.sort(frame["day"].unique())
+        feeders = sorted(frame["feeder"].unique())
+        cube = np.full((len(days), len(feeders), 24), np.nan)
+        cube[
+            np.searchsorted(days, frame["day"].to_numpy()),
+            np.searchsorted(feeders, frame["feeder"].to_numpy()),
+            frame["hour"].to_numpy(),
+        ] = frame["arus"].to_numpy(dtype=float)
+        self.add_days(days, feeders, cube)
+        return len(days)
+
+    # --------------------------------------------------------
+    # QUERIES
+    # --------------------------------------------------------
+
+    def correlation(self) -> np.ndarray:
+        """(F, F) Pearson correlation of hourly load, NaN with fewer than 3 shared hours"""
+        n = self.count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cov = self.sum_prod - self.sum * self.sum.T / n
+            var_i = self.sum_sq - self.sum ** 2 / n
+            corr = cov / np.sqrt(var_i * var_i.T)
+        return np.where((n >= 3) & (var_i > 0) & (var_i.T > 0), np.clip(corr, -1, 1), np.nan)
+
+    def coincidence(self) -> np.ndarray:
+        """(F, F) share of shared days with coinciding daily peaks, NaN without shared days"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.days > 0, self.together / self.days, np.nan)
+
+    def combined_peak(self) -> np.ndarray:
+        """(F, F) mean daily peak of the summed load (A), NaN without shared hours"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.peak_days > 0, self.peak_sum / self.peak_days, np.nan)
+
+    def rank_partners(self, source: str, partners, prune_rate: float = None,
+                      capacities=None) -> tuple:
+        """
+        Order partners by how rarely they peak together with the source
+
+        Partners are sorted on peak coincidence, then correlation; pairs
+        without shared history go last. A partner is pruned only if it
+        peaks together with the source on at least ``prune_rate`` of the
+        shared days and the mean daily combined peak also reaches its
+        capacity: coinciding peaks onto a lightly loaded partner can still
+        be safe. The best-ranked partner is always kept.
+
+        Args:
+            source: Feeder giving up its load
+            partners: Candidate partners
+            prune_rate: Coincidence share that allows pruning (None: rank only)
+            capacities: Capacity (A) of each partner, required for pruning
+
+        Returns:
+            Tuple of (ranked partners, pruned partners)
+        """
+        partners = list(partners)
+        row = self.rows([source])[0]
+        cols = self.rows(partners)
+        rate = np.full(len(partners), np.nan)
+        corr = np.full(len(partners), np.nan)
+        peak = np.full(len(partners), np.nan)
+        if row >= 0:
+            known = cols >= 0
+            rate[known] = self.coincidence()[row, cols[known]]
+            corr[known] = self.correlation()[row, cols[known]]
+            peak[known] = self.combined_peak()[row, cols[known]]
+
+        order = np.lexsort((np.nan_to_num(corr, nan=2.0), np.nan_to_num(rate, nan=2.0)))
+        keep = np.ones(len(partners), dtype=bool)
+        if prune_rate is not None:
+            if capacities is None:
+                raise ValueError("Kapasitas partner diperlukan untuk pruning")
+            with np.errstate(invalid="ignore"):
+                keep = ~((rate >= prune_rate) & (peak >= np.asarray(capacities, dtype=float)))
+            keep[order[:1]] = True
+        ranked = [partners[i] for i in order if keep[i]]
+        pruned = [partners[i] for i in order if not keep[i]]
+        return ranked, pruned
+
+    def table(self) -> pd.DataFrame:
+        """One row per feeder pair (i < j): correlation, coincidence, combined peak, shared days"""
+        i, j = np.triu_indices(len(self.feeders), k=1)
+        return pd.DataFrame({
+            "feeder": [self.feeders[k] for k in i],
+            "partner": [self.feeders[k] for k in j],
+            "correlation": self.correlation()[i, j],
+            "coincidence": self.coincidence()[i, j],
+            "combined_peak": self.combined_peak()[i, j],
+            "days": self.days[i, j].astype(int),
+        })
+
+    # --------------------------------------------------------
+    # PERSISTENCE
+    # --------------------------------------------------------
+
+    def save(self, path) -> Path:
+        """Write the sums atomically"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(path.stem + ".tmp.npz")
+        np.savez(
+            partial,
+            feeders=np.array(self.feeders, dtype=str),
+            tolerance=self.tolerance,
+            last_day="" if self.last_day is None else str(self.last_day.date()),
+            **{name: getattr(self, name) for name in _SUMS},
+        )
+        partial.replace(path)
+        return path
+
+    @classmethod
+    def load(cls, path) -> "CoincidenceIndex":
+        with np.load(path) as data:
+            index = cls(tolerance=int(data["tolerance"]))
+            index.feeders = [str(f) for f in data["feeders"]]
+            for name in _SUMS:
+                setattr(index, name, data[name])
+            last_day = str(data["last_day"])
+        index.last_day = pd.Timestamp(last_day) if last_day else None
+        return index
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def coincidence_index(directory: Path = COINCIDENCE_DIR) -> CoincidenceIndex:
+    """
+    Saved index, brought up to date with the newest complete days once per day
+
+    Only the days after the saved ``last_day`` are folded in and written
+    back; without a database the saved (or an empty) index is used as is.
+    """
+    global _INDEX
+    today = pd.Timestamp.now().normalize()
+    with _INDEX_LOCK:
+        if _INDEX is not None and _INDEX[0] == today:
+            return _INDEX[1]
+
+    path = Path(directory) / INDEX_FILE
+    try:
+        index = CoincidenceIndex.load(path) if path.exists() else CoincidenceIndex()
+    except Exception as e:
+        print(f"Warning: indeks koinsidensi gagal dibaca ({e}), dibuat ulang")
+        index = CoincidenceIndex()
+
+    try:
+        from utils.db_util import get_historical_data
+        if index.add_history(get_historical_data()):
+            index.save(path)
+    except Exception as e:
+        print(f"Warning: indeks koinsidensi tidak diperbarui ({e})")
+
+    with _INDEX_LOCK:
+        _INDEX = (today, index)
+    return index
+
+
+def clear_coincidence_index() -> None:
+    """Reload the index on next use"""
+    global _INDEX
+    with _INDEX_LOCK:
+        _INDEX = None
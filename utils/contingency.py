@@ -0,0 +1,184 @@
+"""
+N-1 Contingency Sweep
+For every feeder of FEEDER_PAIRS: if it trips, which transfers keep the
+receiving feeders within capacity over the forecast horizon. All feeders
+are forecast in one network pass, every edge is evaluated in one transfer
+matrix and the best split of each outage is added, so a full sweep takes
+a few seconds. The result is a small table written to CONTINGENCY_DIR that
+the dashboard reads without forecasting anything.
+"""
+
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from constants import (
+    CONTINGENCY_DIR,
+    CONTINGENCY_OPTIONS,
+    FEEDER_PAIRS,
+    FORECAST_HOURS,
+    WARNING_PCT,
+)
+from design_system import STATUS_LEVELS
+from utils.forecast_contract import hour_offset
+from utils.load_split import optimal_splits
+from utils.model_store import artifact_key
+from utils.network_forecast import network_forecast
+from utils.transfer_matrix import NO_DATA, transfer_matrix
+
+SWEEP_FILE = "n1_sweep.csv"
+
+COLUMNS = ["outage", "rank", "kind", "partners", "utilization", "peak", "peak_time",
+           "headroom", "status", "degraded"]
+
+
+def contingency_table(forecasts: dict, start, steps: int = FORECAST_HOURS, pairs: dict = FEEDER_PAIRS,
+                      splits: bool = True, options: int = CONTINGENCY_OPTIONS) -> pd.DataFrame:
+    """
+    Ranked transfer options for the outage of every source feeder
+
+    Args:
+        forecasts: Dict feeder -> ForecastResult (lowercase names)
+        start: First hour of the evaluated horizon
+        steps: Hours in the horizon
+        pairs: Directed transfer graph, feeder -> list of partners
+        splits: Also add the best split over several partners per outage
+        options: Options kept per outage
+
+    Returns:
+        DataFrame with COLUMNS, one row per option; ranked per outage by
+        status, then by peak utilization against the partners' own
+        capacities (utils.capacity). Like single transfers, splits are
+        judged on the upper band where there is one, their utilization
+        against WARNING_PCT and 1.0.
+    """
+    transfers = transfer_matrix(forecasts, start, steps, pairs)
+    degraded = {feeder for feeder, fc in forecasts.items() if fc is not None and fc.degraded}
+
+    rows = []
+    for e in range(len(transfers)):
+        if transfers.status[e] == NO_DATA:
+            continue
+        source, partner = transfers.source(e), transfers.partner(e)
+        judged = np.fmax(transfers.peak[e], transfers.upper_peak[e])
+        rows.append({
+            "outage": source,
+            "kind": "transfer",
+            "partners": partner,
+            "utilization": judged / transfers.capacity[e],
+            "peak": transfers.peak[e],
+            "peak_time": transfers.peak_time(e),
+            "headroom": transfers.capacity[e] - judged,
+            "status": STATUS_LEVELS[transfers.status[e]],
+            "degraded": bool({source, partner} & degraded),
+        })
+
+    if splits:
+        for source, split in optimal_splits(forecasts, start, steps, pairs, upper_band=True).items():
+            if len(split.partners) < 2:
+                continue  # Sama dengan transfer ke satu partner
+            level = int(np.searchsorted([WARNING_PCT, 1.0], split.utilization, side='right'))
+            rows.append({
+                "outage": source,
+                "kind": "split",
+                "partners": " + ".join(f"{p} {f:.0%}" for p, f in zip(split.partners, split.fractions)),
+                "utilization": split.utilization,
+                "peak": np.nan,
+                "peak_time": split.headroom.start + int(np.nanargmin(split.headroom.values)) * split.headroom.freq,
+                "headroom": float(np.nanmin(split.headroom.values)),
+                "status": STATUS_LEVELS[level],
+                "degraded": bool(({source} | set(split.partners)) & degraded),
+            })
+
+    table = pd.DataFrame(rows, columns=[c for c in COLUMNS if c != "rank"])
+    if table.empty:
+        return pd.DataFrame(columns=COLUMNS)
+
+    table["_level"] = table["status"].map(STATUS_LEVELS.index)
+    table = table.sort_values(["outage", "_level", "utilization"], kind="stable")
+    table["rank"] = table.groupby("outage").cumcount() + 1
+    table = table[table["rank"] <= options]
+    table[["utilization", "peak", "headroom"]] = table[["utilization", "peak", "headroom"]].round(3)
+    return table[COLUMNS].reset_index(drop=True)
+
+
+def run_sweep(histories: dict, steps: int = FORECAST_HOURS, splits: bool = True) -> tuple:
+    """
+    Forecast every feeder and build the contingency table
+
+    Args:
+        histories: Dict feeder -> DataFrame (DatetimeIndex, column 'arus')
+        steps: Forecast horizon
+        splits: Add split options
+
+    Returns:
+        Tuple of (contingency table, timings dict in ms)
+    """
+    started = time.perf_counter()
+    network = network_forecast(histories, steps)
+    forecasted = time.perf_counter()
+
+    forecasts = {f: fc for f, fc in network.forecasts.items() if fc is not None and len(fc)}
+    # Grid mencakup semua forecast: feeder yang datanya tertinggal tidak
+    # memotong jam-jam terakhir forecast feeder lain
+    start = min(fc.start for fc in forecasts.values())
+    horizon = hour_offset(start, max(fc.end for fc in forecasts.values())) + 1
+    table = contingency_table(forecasts, start, horizon, splits=splits)
+
+    timings = {
+        "forecast_ms": (forecasted - started) * 1000,
+        "evaluate_ms": (time.perf_counter() - forecasted) * 1000,
+        "feeders": len(forecasts),
+        "batched": len(network.batched),
+    }
+    return table, timings
+
+
+def write_sweep(table: pd.DataFrame, directory: Path = CONTINGENCY_DIR) -> Path:
+    """Write the table atomically, so the dashboard never reads half a file"""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / SWEEP_FILE
+    partial = path.with_suffix(".tmp")
+    table.to_csv(partial, index=False)
+    partial.replace(path)
+    return path
+
+
+_SWEEP = {}
+_SWEEP_LOCK = threading.Lock()
+
+
+def read_sweep(directory: Path = CONTINGENCY_DIR):
+    """
+    Latest contingency table, parsed again only after the job rewrote it
+
+    Returns:
+        Tuple of (DataFrame, written at as Timestamp), or None if the job never ran
+    """
+    path = Path(directory) / SWEEP_FILE
+    key = artifact_key(path)
+    if key[1] is None:
+        return None
+    with _SWEEP_LOCK:
+        hit = _SWEEP.get(key[0])
+    if hit is not None and hit[0] == key:
+        return hit[1]
+
+    table = pd.read_csv(path, parse_dates=["peak_time"])
+    result = (table, pd.Timestamp.fromtimestamp(key[1] / 1e9))
+    with _SWEEP_LOCK:
+        _SWEEP[key[0]] = (key, result)
+    return result
+
+
+def outage_options(outage: str, directory: Path = CONTINGENCY_DIR):
+    """Ranked options of one outage from the latest sweep (None if the job never ran)"""
+    sweep = read_sweep(directory)
+    if sweep is None:
+        return None
+    table, written = sweep
+    return table[table["outage"] == outage.lower()], written
@@ -22,6 +22,22 @@ def get_unique_feeders():
     conn.close()
     return df['feeder'].tolist()
 
+def get_feeder_ratings():
+    """Ambil iset dan inom terbaru per feeder dari tabel data_bebanrst"""
+    conn = get_connection()
+    query = """
+    SELECT feeder, iset, inom
+    FROM (
+        SELECT feeder, iset, inom,
+               ROW_NUMBER() OVER (PARTITION BY feeder ORDER BY tanggal DESC) AS rn
+        FROM data_bebanrst
+    ) ranked
+    WHERE rn = 1
+    """
+    df = pd.read_sql(query, conn)
+    conn.close()
+    return df
+
 def get_historical_data(feeder=None):
     """
     Ambil 32 baris terakhir per feeder dari tabel data_bebanrst,
@@ -59,6 +75,66 @@ def get_historical_data(feeder=None):
     df = pd.read_sql(query, conn)
     conn.close()
 
+    return _to_long_format(df, jam_cols)
+
+
+def get_training_data(feeder, days=None):
+    """
+    Ambil riwayat beban satu feeder untuk training ulang model.
+    days: jumlah hari terakhir yang diambil (None = seluruh riwayat).
+    Hasil berformat long sama seperti get_historical_data.
+    """
+    conn = get_connection()
+
+    jam_cols = [f"{str(h).zfill(2)}_00" for h in range(1, 24)] + ["23_59"]
+    limit = f"LIMIT {int(days)}" if days else ""
+
+    query = f"""
+    SELECT tanggal, feeder, {', '.join([f'`{c}`' for c in jam_cols])}
+    FROM (
+        SELECT * FROM data_bebanrst
+        WHERE feeder = %s
+        ORDER BY tanggal DESC
+        {limit}
+    ) AS sub
+    ORDER BY tanggal ASC
+    """
+
+    df = pd.read_sql(query, conn, params=(feeder,))
+    conn.close()
+
+    return _to_long_format(df, jam_cols)
+
+
+def get_quarter_hour_data(days=None):
+    """
+    Ambil kolom 15 menit (00_15 … 23_45 dan 23_59) semua feeder.
+    days: jumlah hari terakhir per feeder (None = seluruh riwayat).
+    Hasil tetap format lebar: tanggal, feeder, lalu 96 kolom jam.
+    """
+    conn = get_connection()
+
+    jam_cols = [f"{h:02d}_{m:02d}" for h in range(24) for m in (0, 15, 30, 45)][1:] + ["23_59"]
+    limit = f"WHERE rn <= {int(days)}" if days else ""
+
+    query = f"""
+    SELECT tanggal, feeder, {', '.join([f'`{c}`' for c in jam_cols])}
+    FROM (
+        SELECT *,
+               ROW_NUMBER() OVER (PARTITION BY feeder ORDER BY tanggal DESC) AS rn
+        FROM data_bebanrst
+    ) ranked
+    {limit}
+    ORDER BY feeder, tanggal ASC
+    """
+
+    df = pd.read_sql(query, conn)
+    conn.close()
+    return df
+
+
+def _to_long_format(df, jam_cols):
+    """Ubah tabel harian (kolom per jam) menjadi time series long per feeder"""
     # Ubah ke format long
     df_long = df.melt(
         id_vars=['tanggal', 'feeder'],
@@ -0,0 +1,215 @@
+"""
+Incremental Seasonal Decomposition Cache
+Keeps the additive trend/seasonal state of each feeder's history window up to
+date as new hourly points arrive, instead of re-running seasonal_decompose on
+the whole window for every forecast call.
+"""
+
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from constants import DECOMP_PERIOD, DECOMP_WINDOW_HOURS, DECOMP_MAX_SHIFT_HOURS
+
+
+# ============================================================
+# DECOMPOSITION STATE
+# ============================================================
+
+class DecompositionSnapshot(NamedTuple):
+    """Trend/seasonal view of the current window (same shapes as seasonal_decompose)"""
+    trend: np.ndarray
+    seasonal: np.ndarray
+    last_trend: float
+    trend_change_rate: float
+
+
+class DecompositionState:
+    """
+    Rolling additive decomposition of one feeder's hourly history.
+
+    Produces the same trend and seasonal components as
+    ``seasonal_decompose(x, model='additive', period=period, extrapolate_trend='freq')``
+    over the last ``window`` points, but keeps the centered moving average and
+    the per-phase sums of the detrended interior so that appending ``k`` points
+    costs O(k + period) instead of O(window).
+    """
+
+    def __init__(self, values: np.ndarray, hwm: pd.Timestamp,
+                 period: int = DECOMP_PERIOD, window: int = DECOMP_WINDOW_HOURS):
+        values = np.asarray(values, dtype=float)[-window:]
+        if len(values) < 2 * period:
+            raise ValueError(
+                f"Data historis minimal {2 * period} titik untuk dekomposisi (ada {len(values)})"
+            )
+        if np.isnan(values).any():
+            raise ValueError("Data historis untuk dekomposisi tidak boleh mengandung NaN")
+
+        self.period = period
+        self.window = window
+        if period % 2 == 0:
+            self._filt = np.array([0.5] + [1.0] * (period - 1) + [0.5]) / period
+        else:
+            self._filt = np.repeat(1.0 / period, period)
+        self._half = len(self._filt) // 2
+
+        self.values = values
+        self.hwm = hwm
+        self.start_pos = 0              # Absolute position of values[0]
+        self.shift_since_rebuild = 0
+
+        # Centered moving average for the interior positions [half, n - half)
+        self.ma = np.convolve(values, self._filt, mode="valid")
+        detrended = values[self._half:len(values) - self._half] - self.ma
+        phases = (np.arange(self._half, len(values) - self._half)) % period
+        self.phase_sums = np.bincount(phases, weights=detrended, minlength=period)
+        self.phase_counts = np.bincount(phases, minlength=period).astype(float)
+        self._snapshot = None
+
+    def append(self, new_values: np.ndarray, hwm: pd.Timestamp) -> None:
+        """
+        Append new hourly points and slide the window
+
+        Args:
+            new_values: Points observed after the current high-water mark
+            hwm: Timestamp of the last appended point
+        """
+        new_values = np.asarray(new_values, dtype=float)
+        if np.isnan(new_values).any():
+            raise ValueError("Data historis untuk dekomposisi tidak boleh mengandung NaN")
+
+        half, period = self._half, self.period
+        n_old = len(self.values)
+        values = np.concatenate([self.values, new_values])
+        n = len(values)
+
+        # Moving average for positions that just became interior
+        new_ma = np.convolve(values[n_old - 2 * half:], self._filt, mode="valid")
+        positions = np.arange(n_old - half, n - half)
+        self._add_phase(positions, values[positions] - new_ma, sign=1.0)
+        ma = np.concatenate([self.ma, new_ma])
+
+        # Drop the oldest points once the window is full
+        drop = max(0, n - self.window)
+        if drop:
+            positions = np.arange(half, half + drop)
+            self._add_phase(positions, values[positions] - ma[:drop], sign=-1.0)
+            values = values[drop:]
+            ma = ma[drop:]
+            self.start_pos += drop
+
+        self.values = values
+        self.ma = ma
+        self.hwm = hwm
+        self.shift_since_rebuild += len(new_values)
+        self._snapshot = None
+
+    def _add_phase(self, rel_positions, detrended, sign):
+        phases = (self.start_pos + rel_positions) % self.period
+        self.phase_sums += sign * np.bincount(phases, weights=detrended, minlength=self.period)
+        self.phase_counts += sign * np.bincount(phases, minlength=self.period)
+
+    def snapshot(self) -> DecompositionSnapshot:
+        """Build (and memoize) the trend/seasonal components of the current window"""
+        if self._snapshot is not None:
+            return self._snapshot
+
+        half, period = self._half, self.period
+        n = len(self.values)
+        front, back = half, n - half - 1
+
+        trend = np.empty(n)
+        trend[front:back + 1] = self.ma
+
+        # Same least-squares end-point extrapolation as extrapolate_trend='freq'
+        front_last = min(front + period, back)
+        slope, intercept = np.polyfit(np.arange(front, front_last), trend[front:front_last], 1)
+        trend[:front] = slope * np.arange(0, front) + intercept
+        back_first = max(front, back - period)
+        slope, intercept = np.polyfit(np.arange(back_first, back), trend[back_first:back], 1)
+        trend[back + 1:] = slope * np.arange(back + 1, n) + intercept
+
+        # Interior sums are cached; only the extrapolated edges are added here
+        edges = np.r_[0:front, back + 1:n]
+        edge_phases = (self.start_pos + edges) % period
+        sums = self.phase_sums + np.bincount(
+            edge_phases, weights=self.values[edges] - trend[edges], minlength=period
+        )
+        counts = self.phase_counts + np.bincount(edge_phases, minlength=period)
+
+        # Rotate absolute phases so index 0 is the first point of the window
+        period_averages = np.roll(sums / counts, -(self.start_pos % period))
+        period_averages -= period_averages.mean()
+        seasonal = np.tile(period_averages, n // period + 1)[:n]
+
+        trend_diff = np.diff(trend)[-24:]
+        self._snapshot = DecompositionSnapshot(
+            trend=trend,
+            seasonal=seasonal,
+            last_trend=float(trend[-1]),
+            trend_change_rate=float(trend_diff.mean()),
+        )
+        return self._snapshot
+
+
+# ============================================================
+# PER-FEEDER CACHE
+# ============================================================
+
+_STATES = {}
+_LOCK = threading.Lock()
+
+
+def get_decomposition(feeder: str, series: pd.Series,
+                      window: int = DECOMP_WINDOW_HOURS,
+                      max_shift: int = DECOMP_MAX_SHIFT_HOURS) -> DecompositionSnapshot:
+    """
+    Get the decomposition of a feeder's latest history window
+
+    The state is keyed by feeder and high-water mark (last timestamp). Points
+    newer than the cached high-water mark are appended incrementally; the full
+    decomposition is rebuilt only when the window has shifted by more than
+    ``max_shift`` points since the last rebuild, or when the history does not
+    extend the cached state. The window is capped at the length of
+    ``series``, so the state never holds more points than were passed in and
+    a series of different length rebuilds it.
+
+    Args:
+        feeder: Feeder name (cache key)
+        series: Hourly load series with a sorted DatetimeIndex
+        window: Maximum number of trailing points to decompose
+        max_shift: Maximum incremental shift before a full recompute
+
+    Returns:
+        DecompositionSnapshot of the trailing window
+    """
+    hwm = series.index[-1]
+    key = feeder.lower()
+    window = min(window, len(series))  # Jendela tidak boleh lebih panjang dari data
+
+    with _LOCK:
+        state = _STATES.get(key)
+
+        if state is not None and state.window == window and len(state.values) == window:
+            if hwm == state.hwm:
+                return state.snapshot()
+            if hwm > state.hwm:
+                new_points = series[series.index > state.hwm]
+                if state.shift_since_rebuild + len(new_points) <= max_shift:
+                    state.append(new_points.values, hwm)
+                    return state.snapshot()
+
+        state = DecompositionState(series.tail(window).values, hwm, window=window)
+        _STATES[key] = state
+        return state.snapshot()
+
+
+def clear_decomposition_cache(feeder: str = None) -> None:
+    """Drop cached decomposition state for one feeder, or for all feeders"""
+    with _LOCK:
+        if feeder is None:
+            _STATES.clear()
+        else:
+            _STATES.pop(feeder.lower(), None)
@@ -0,0 +1,82 @@
+"""
+Exog Fallback Ladder
+Several feeder modules try a forecast with their full exog set and fall
+back to smaller sets (or none) when the model rejects it. Which level works
+depends only on the model artifact, so the first working level is
+remembered per artifact: later calls start there and skip the attempts
+that are known to fail. The whole ladder is probed again only after the
+artifact on disk changes.
+"""
+
+import threading
+from typing import Callable, NamedTuple, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class WorkingLevel(NamedTuple):
+    """Ladder level that last produced a forecast for an artifact"""
+    artifact: tuple
+    level: int
+
+
+_LEVELS = {}
+_LOCK = threading.Lock()
+
+
+def first_working(feeder: str, artifact: tuple, attempts: Sequence[Callable[[], T]]) -> T:
+    """
+    Run the first attempt of a fallback ladder that succeeds
+
+    Args:
+        feeder: Feeder name (memo key); a module with several ladders uses
+            one key per ladder, e.g. 'gegger:scenarios'
+        artifact: Artifact identity from utils.model_store.artifact_key
+        attempts: Zero-argument callables, most detailed exog set first
+
+    Returns:
+        Result of the first successful attempt
+
+    Raises:
+        RuntimeError if every remaining level fails (chained to the last error)
+    """
+    key = feeder.lower()
+    with _LOCK:
+        known = _LEVELS.get(key)
+    start = known.level if known is not None and known.artifact == artifact else 0
+
+    last_error = None
+    for level in range(start, len(attempts)):
+        try:
+            result = attempts[level]()
+        except Exception as e:
+            print(f"Warning: forecast {feeder} level exog {level} gagal ({e})")
+            last_error = e
+            continue
+        if known is None or known != (artifact, level):
+            with _LOCK:
+                _LEVELS[key] = WorkingLevel(artifact, level)
+        return result
+
+    # Tidak ada level yang berhasil: probe ulang dari awal pada panggilan berikutnya
+    with _LOCK:
+        _LEVELS.pop(key, None)
+    raise RuntimeError(f"Semua level exog gagal untuk {feeder}") from last_error
+
+
+def working_level(feeder: str, artifact: tuple):
+    """Remembered ladder level for the artifact, None if not probed yet"""
+    with _LOCK:
+        known = _LEVELS.get(feeder.lower())
+    return known.level if known is not None and known.artifact == artifact else None
+
+
+def clear_exog_levels(feeder: str = None) -> None:
+    """Forget remembered levels for one feeder (all its ladders), or for all feeders"""
+    with _LOCK:
+        if feeder is None:
+            _LEVELS.clear()
+        else:
+            name = feeder.lower()
+            for key in [k for k in _LEVELS if k == name or k.startswith(name + ":")]:
+                del _LEVELS[key]
@@ -0,0 +1,76 @@
+"""
+Forecast Cache
+Keeps the latest ForecastResult of each feeder, point forecast and
+prediction band together, so dashboard reruns and partner lookups reuse it
+instead of running the model again.
+"""
+
+import threading
+from typing import Callable, NamedTuple, Optional
+
+import pandas as pd
+
+from utils.forecast_contract import ForecastResult
+
+
+class CachedForecast(NamedTuple):
+    """Forecast of one feeder and the inputs it was computed from"""
+    key: tuple
+    forecast: ForecastResult
+
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def forecast_key(history_end, steps: int, start_datetime=None, artifact: tuple = None) -> tuple:
+    """
+    Cache key of a forecast
+
+    Args:
+        history_end: Last timestamp of the history passed to the model
+        steps: Forecast horizon
+        start_datetime: Requested forecast start (None = right after history)
+        artifact: Artifact identity from utils.model_store.artifact_key
+    """
+    start = None if start_datetime is None else pd.Timestamp(start_datetime)
+    return (pd.Timestamp(history_end), int(steps), start, artifact)
+
+
+def cached_forecast(feeder: str, key: tuple, compute: Callable[[], ForecastResult]) -> ForecastResult:
+    """
+    Return the cached forecast for ``key`` or compute and store it
+
+    Only one entry is kept per feeder: a new high-water mark or a new
+    artifact replaces the previous forecast. ``None`` results are not cached.
+    The value arrays are read-only, so the result can be shared as is.
+    """
+    feeder = feeder.lower()
+    with _LOCK:
+        hit = _CACHE.get(feeder)
+    if hit is not None and hit.key == key:
+        return hit.forecast
+
+    result = compute()
+    if result is not None:
+        with _LOCK:
+            _CACHE[feeder] = CachedForecast(key=key, forecast=result)
+    return result
+
+
+def latest_forecast(feeder: str, key: tuple = None) -> Optional[ForecastResult]:
+    """Cached forecast of a feeder without computing; any key if ``key`` is None"""
+    with _LOCK:
+        hit = _CACHE.get(feeder.lower())
+    if hit is None or (key is not None and hit.key != key):
+        return None
+    return hit.forecast
+
+
+def clear_forecast_cache(feeder: str = None) -> None:
+    """Drop the cached forecast for one feeder, or for all feeders"""
+    with _LOCK:
+        if feeder is None:
+            _CACHE.clear()
+        else:
+            _CACHE.pop(feeder.lower(), None)
@@ -0,0 +1,235 @@
+"""
+Forecast Result Contract
+What every forecast module returns: a start timestamp, a fixed frequency and
+float32 value arrays. Because consecutive values are exactly one step apart,
+period filtering is an index slice and aligning two feeders is an offset
+computation; no DataFrame is built until something has to be displayed.
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.range_max import RangeMax
+
+HOUR = pd.Timedelta(hours=1)
+
+
+class ForecastResult:
+    """
+    Forecast of one feeder
+
+    ``values[i]`` (and ``lower[i]`` / ``upper[i]``) belong to
+    ``start + i * freq``. Arrays are read-only float32 so a cached forecast
+    can be shared and sliced without defensive copies; with ``__slots__`` a
+    72-hour forecast with bands takes well under 2 KB. ``degraded`` names
+    why a replacement forecast was served instead of the model ('timeout',
+    'error'), None for a regular result. The range-max index of the values
+    is built on the first peak query and kept with the result.
+    """
+    __slots__ = ("start", "freq", "values", "lower", "upper", "model_version", "elapsed_ms",
+                 "degraded", "_peaks")
+
+    def __init__(self, start, values, lower=None, upper=None, freq=HOUR,
+                 model_version: Optional[str] = None, elapsed_ms: Optional[float] = None,
+                 degraded: Optional[str] = None):
+        self.start = start
+        self.freq = freq
+        self.values = values
+        self.lower = lower
+        self.upper = upper
+        self.model_version = model_version
+        self.elapsed_ms = elapsed_ms
+        self.degraded = degraded
+        self._peaks = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __repr__(self) -> str:
+        return (f"ForecastResult(start={self.start}, steps={len(self)}, freq={self.freq}, "
+                f"bands={self.has_bands}, model_version={self.model_version!r}, "
+                f"degraded={self.degraded!r})")
+
+    @property
+    def end(self) -> pd.Timestamp:
+        """Timestamp of the last value"""
+        return self.start + (len(self.values) - 1) * self.freq
+
+    @property
+    def has_bands(self) -> bool:
+        return self.lower is not None and self.upper is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the value arrays"""
+        return sum(a.nbytes for a in (self.values, self.lower, self.upper) if a is not None)
+
+    def replace(self, **changes) -> "ForecastResult":
+        """Copy with some attributes changed (arrays are shared, not copied)"""
+        fields = {name: getattr(self, name) for name in self.__slots__ if not name.startswith("_")}
+        fields.update(changes)
+        return ForecastResult(**fields)
+
+    def take(self, index: slice) -> "ForecastResult":
+        """Sub-forecast for a slice of positions (array views, no copy)"""
+        first = index.start or 0
+        return self.replace(
+            start=self.start + first * self.freq,
+            values=self.values[index],
+            lower=None if self.lower is None else self.lower[index],
+            upper=None if self.upper is None else self.upper[index],
+        )
+
+    def between(self, period_start, period_end) -> "ForecastResult":
+        """Values within [period_start, period_end] (inclusive), as views"""
+        return self.take(period_slice(self, period_start, period_end))
+
+    def peak_index(self) -> RangeMax:
+        """Range-max index of the values (built once)"""
+        if self._peaks is None:
+            self._peaks = RangeMax(self.values)
+        return self._peaks
+
+    def peak_between(self, period_start, period_end) -> tuple:
+        """
+        Maximum within [period_start, period_end] in O(1), without slicing
+
+        Returns:
+            Tuple of (max value, its timestamp), (nan, None) if the period is empty
+        """
+        index = period_slice(self, period_start, period_end)
+        peak, position = self.peak_index().query(index.start, index.stop - 1)
+        if position < 0:
+            return float("nan"), None
+        return float(peak), self.start + int(position) * self.freq
+
+    def index(self) -> pd.DatetimeIndex:
+        """Timestamps of the values"""
+        return pd.date_range(start=self.start, periods=len(self.values), freq=self.freq)
+
+    def to_frame(self, datetime_col: str = "timestamp") -> pd.DataFrame:
+        """DataFrame for charts and tables (built on demand, float64 columns)"""
+        data = {datetime_col: self.index(), "forecast": self.values.astype(float)}
+        if self.has_bands:
+            data["lower"] = self.lower.astype(float)
+            data["upper"] = self.upper.astype(float)
+        return pd.DataFrame(data, copy=False)
+
+
+def _readonly(values) -> Optional[np.ndarray]:
+    """Float32 array that cannot be modified (copies only if dtype differs)"""
+    if values is None:
+        return None
+    array = np.asarray(values, dtype=np.float32)
+    if array.flags.writeable:
+        array = array.view()
+        array.flags.writeable = False
+    return array
+
+
+def make_forecast(start, values, lower=None, upper=None, freq=HOUR,
+                  model_version: str = None, elapsed_ms: float = None) -> ForecastResult:
+    """
+    Build a ForecastResult from a start timestamp and evenly spaced values
+
+    Args:
+        start: Timestamp of the first value (floored to ``freq``)
+        values: Point forecast
+        lower, upper: Optional prediction band, same length as values
+        freq: Spacing of the values (default one hour)
+        model_version: Identity of the model that produced the forecast
+        elapsed_ms: Time the model took to compute it
+
+    Returns:
+        ForecastResult
+    """
+    freq = pd.Timedelta(freq)
+    values = _readonly(values)
+    lower, upper = _readonly(lower), _readonly(upper)
+    for band in (lower, upper):
+        if band is not None and band.shape != values.shape:
+            raise ValueError("Panjang interval prediksi tidak sama dengan forecast")
+    return ForecastResult(pd.Timestamp(start).floor(freq), values, lower, upper, freq,
+                          model_version, elapsed_ms)
+
+
+# ============================================================
+# INDEX ARITHMETIC
+# ============================================================
+
+def hour_offset(origin, timestamp, freq=HOUR) -> int:
+    """Whole steps of ``freq`` from origin to timestamp (negative if before)"""
+    return int((pd.Timestamp(timestamp) - origin) // freq)
+
+
+def period_slice(forecast: ForecastResult, period_start, period_end) -> slice:
+    """Positions of the values within [period_start, period_end], clipped to the forecast"""
+    n = len(forecast.values)
+    first = -hour_offset(pd.Timestamp(period_start), forecast.start, forecast.freq)  # ceil ke step penuh
+    last = hour_offset(forecast.start, period_end, forecast.freq)
+    first = min(max(first, 0), n)
+    return slice(first, min(max(last + 1, first), n))
+
+
+def overlap(a: ForecastResult, b: ForecastResult) -> tuple:
+    """
+    Positions of the timestamps covered by both forecasts
+
+    Returns:
+        Tuple of (slice into a, slice into b), equally long
+    """
+    if a.freq != b.freq:
+        raise ValueError(f"Frekuensi forecast berbeda: {a.freq} dan {b.freq}")
+    shift = hour_offset(a.start, b.start, a.freq)  # Posisi b[0] di dalam a
+    a_first = max(shift, 0)
+    b_first = max(-shift, 0)
+    length = max(min(len(a.values) - a_first, len(b.values) - b_first), 0)
+    return slice(a_first, a_first + length), slice(b_first, b_first + length)
+
+
+def align_forecasts(forecasts: dict, start, steps: int, feeders=None, field: str = "values",
+                    freq=HOUR) -> tuple:
+    """
+    Stack forecasts of several feeders on one evenly spaced grid
+
+    Args:
+        forecasts: Dict feeder -> ForecastResult (missing or None allowed)
+        start: Timestamp of the first grid column
+        steps: Number of grid columns
+        feeders: Row order (default: dict order)
+        field: 'values', 'lower' or 'upper'
+        freq: Grid spacing, must equal the spacing of the forecasts
+
+    Returns:
+        Tuple of (feeder names, float array (n_feeders, steps)); hours a
+        forecast does not cover, or a missing band, are NaN
+    """
+    feeders = list(forecasts) if feeders is None else list(feeders)
+    freq = pd.Timedelta(freq)
+    grid = ForecastResult(pd.Timestamp(start).floor(freq), np.empty(steps), freq=freq)
+    aligned = np.full((len(feeders), steps), np.nan)
+    for i, feeder in enumerate(feeders):
+        fc = forecasts.get(feeder)
+        data = None if fc is None else getattr(fc, field)
+        if data is None:
+            continue
+        grid_idx, fc_idx = overlap(grid, fc)
+        aligned[i, grid_idx] = data[fc_idx]
+    return feeders, aligned
+
+
+# ============================================================
+# MANEUVER RESULTS
+# ============================================================
+
+class PartnerResult(NamedTuple):
+    """Load transfer of the selected feeder onto one partner feeder"""
+    partner: str
+    max_load: float                 # Peak of main + partner forecast (A)
+    status: str                     # 'safe' / 'warning' / 'danger'
+    label: str                      # Status text for the dashboard
+    forecast: ForecastResult        # Partner forecast within the period
+    upper_load: Optional[float] = None  # Peak of the summed upper bands
+    capacity: Optional[float] = None    # Capacity of the partner (A)
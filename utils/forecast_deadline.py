@@ -0,0 +1,173 @@
+"""
+Forecast Deadline
+Runs feeder forecasts in background threads with a time budget. A model
+that is too slow or raises does not hold up the page: the caller gets the
+last cached forecast of the feeder, or the seasonal baseline, marked as
+degraded, and the incident is counted in the per-feeder metrics. A forecast
+that finishes after its deadline still lands in the forecast cache, so the
+next rerun is served from there.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Callable, NamedTuple, Optional
+
+import pandas as pd
+
+from constants import FORECAST_BUDGET_SECONDS, FORECAST_THREADS
+from utils.forecast_cache import cached_forecast, latest_forecast
+from utils.forecast_contract import ForecastResult
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=FORECAST_THREADS, thread_name_prefix="forecast")
+_RUNNING = {}   # feeder -> (key, Future) yang sedang dihitung
+_METRICS = {}   # feeder -> dict counter
+_LOCK = threading.Lock()
+
+
+class PendingForecast(NamedTuple):
+    """Forecast started by start_forecast(), resolved with resolve_forecast()"""
+    feeder: str
+    future: Future
+    fallback: Callable[[], Optional[ForecastResult]]
+    started: float   # time.perf_counter() at submission
+
+
+# ============================================================
+# METRICS
+# ============================================================
+
+def _record(feeder: str, outcome: str, elapsed: float, error: Exception = None) -> None:
+    """Count one forecast outcome ('ok', 'timeout' or 'error') for a feeder"""
+    with _LOCK:
+        m = _METRICS.setdefault(feeder, {
+            'calls': 0, 'ok': 0, 'timeout': 0, 'error': 0,
+            'last_ms': None, 'max_ms': 0.0, 'last_error': None,
+        })
+        m['calls'] += 1
+        m[outcome] += 1
+        m['last_ms'] = elapsed * 1000
+        m['max_ms'] = max(m['max_ms'], elapsed * 1000)
+        if error is not None:
+            m['last_error'] = f"{type(error).__name__}: {error}"
+
+    if outcome == 'timeout':
+        print(f"Warning: forecast '{feeder}' melebihi batas {elapsed:.1f} s, memakai forecast cadangan")
+    elif outcome == 'error':
+        print(f"Warning: forecast '{feeder}' gagal ({error}), memakai forecast cadangan")
+
+
+def record_failure(feeder: str, error: Exception) -> None:
+    """Count a failure outside the model itself (e.g. loading the feeder data)"""
+    _record(feeder.lower(), 'error', 0.0, error)
+
+
+def forecast_metrics() -> pd.DataFrame:
+    """Per-feeder call, timeout and error counts with latest and worst latency"""
+    with _LOCK:
+        rows = [{'feeder': feeder, **m} for feeder, m in _METRICS.items()]
+    return pd.DataFrame(rows)
+
+
+def reset_forecast_metrics() -> None:
+    with _LOCK:
+        _METRICS.clear()
+
+
+# ============================================================
+# EXECUTION
+# ============================================================
+
+def _ready(result) -> Future:
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _forget(feeder: str, future: Future) -> None:
+    with _LOCK:
+        if _RUNNING.get(feeder, (None, None))[1] is future:
+            del _RUNNING[feeder]
+
+
+def start_forecast(feeder: str, key: tuple, compute: Callable[[], ForecastResult],
+                   fallback: Callable[[], Optional[ForecastResult]]) -> PendingForecast:
+    """
+    Start a cached forecast in the background
+
+    A cache hit resolves immediately. While a computation for the same
+    feeder and key is still running (e.g. one that overran the previous
+    deadline), it is joined instead of started again.
+
+    Args:
+        feeder: Feeder name (cache and metrics key)
+        key: Forecast cache key (utils.forecast_cache.forecast_key)
+        compute: Runs the model and returns a ForecastResult
+        fallback: Produces the replacement forecast (baseline) if no cached one exists
+
+    Returns:
+        PendingForecast
+    """
+    feeder = feeder.lower()
+    started = time.perf_counter()
+
+    hit = latest_forecast(feeder, key)
+    if hit is not None:
+        return PendingForecast(feeder, _ready(hit), fallback, started)
+
+    with _LOCK:
+        running = _RUNNING.get(feeder)
+        if running is not None and running[0] == key:
+            future = running[1]
+        else:
+            future = _EXECUTOR.submit(cached_forecast, feeder, key, compute)
+            _RUNNING[feeder] = (key, future)
+    future.add_done_callback(lambda f: _forget(feeder, f))
+    return PendingForecast(feeder, future, fallback, started)
+
+
+def ready_forecast(feeder: str, result: Optional[ForecastResult]) -> PendingForecast:
+    """Wrap a forecast that is already computed (e.g. the baseline)"""
+    return PendingForecast(feeder.lower(), _ready(result), lambda: None, time.perf_counter())
+
+
+def resolve_forecast(pending: PendingForecast, deadline: float = None) -> Optional[ForecastResult]:
+    """
+    Wait for a started forecast until the deadline
+
+    Args:
+        pending: Result of start_forecast()
+        deadline: Absolute time.perf_counter() value; several forecasts
+            started together can share one deadline, so the total wait is
+            bounded by one budget (default: start + FORECAST_BUDGET_SECONDS)
+
+    Returns:
+        The model forecast, or the last cached / baseline forecast with
+        ``degraded`` set to 'timeout' or 'error'; None if neither exists
+    """
+    if deadline is None:
+        deadline = pending.started + FORECAST_BUDGET_SECONDS
+    try:
+        result = pending.future.result(timeout=max(deadline - time.perf_counter(), 0))
+    except FutureTimeout:
+        _record(pending.feeder, 'timeout', time.perf_counter() - pending.started)
+        return _replacement(pending, 'timeout')
+    except Exception as e:
+        _record(pending.feeder, 'error', time.perf_counter() - pending.started, e)
+        return _replacement(pending, 'error')
+
+    _record(pending.feeder, 'ok', time.perf_counter() - pending.started)
+    return result
+
+
+def _replacement(pending: PendingForecast, reason: str) -> Optional[ForecastResult]:
+    """Last cached forecast of the feeder (any key), else the fallback, marked degraded"""
+    result = latest_forecast(pending.feeder)
+    if result is None:
+        try:
+            result = pending.fallback()
+        except Exception as e:
+            print(f"Warning: forecast cadangan '{pending.feeder}' gagal ({e})")
+            return None
+    return None if result is None else result.replace(degraded=reason)
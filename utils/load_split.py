@@ -0,0 +1,181 @@
+"""
+Load Split Optimizer
+Spreads the load of a source feeder over two or three partners instead of
+moving it onto one. For a fixed set of partners, the fractions that
+minimize the peak utilization follow from one number: at utilization u,
+partner j can take at most min_t (u * capacity_j - load_j(t)) / source(t)
+of the source, and u is feasible once those shares add up to one. The
+smallest feasible u is found by bisection, run for every candidate
+partner set of every source at once on (candidates x partners x hours)
+arrays.
+"""
+
+from itertools import combinations
+from typing import NamedTuple
+
+import numpy as np
+
+from constants import FEEDER_PAIRS, SPLIT_MAX_PARTNERS, SPLIT_TOLERANCE
+from utils.capacity import capacity_index
+from utils.forecast_contract import ForecastResult, align_forecasts, make_forecast
+
+
+class SplitResult(NamedTuple):
+    """Best split of one source feeder"""
+    source: str
+    partners: tuple             # Partners taking a share, best first
+    fractions: np.ndarray       # Share of the source load per partner, sums to 1
+    utilization: float          # Peak load / capacity over the partners and hours
+    headroom: ForecastResult    # Smallest remaining capacity of the partners per hour (A), NaN without data
+
+    def shares(self) -> dict:
+        return dict(zip(self.partners, self.fractions.round(3).tolist()))
+
+
+def _max_shares(u: np.ndarray, source: np.ndarray, load: np.ndarray, cap: np.ndarray) -> np.ndarray:
+    """
+    Largest share of the source each partner can take at utilization u
+
+    Args:
+        u: (C,) utilization per candidate
+        source: (C, H) source load, >= 0
+        load: (C, K, H) partner load, +inf where unknown or padded
+        cap: (C, K) partner capacity
+
+    Returns:
+        (C, K) share, negative (or -inf) if the partner is over u on its own
+    """
+    spare = u[:, None, None] * cap[:, :, None] - load
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(source[:, None, :] > 0, spare / source[:, None, :],
+                         np.where(spare >= 0, np.inf, -np.inf))
+    return ratio.min(axis=2)
+
+
+def shared_gaps(source: np.ndarray, load: np.ndarray) -> np.ndarray:
+    """(C, H) mask of hours where the source or any partner of a candidate is NaN"""
+    return np.isnan(source) | np.isnan(load).any(axis=1)
+
+
+def solve_splits(source: np.ndarray, load: np.ndarray, cap: np.ndarray,
+                 tolerance: float = SPLIT_TOLERANCE) -> tuple:
+    """
+    Min-max utilization split for a batch of candidates
+
+    Hours where the source or one of the candidate's partners has no
+    forecast (NaN) are left out, like single transfers only judge the hours
+    both feeders share.
+
+    Args:
+        source: (C, H) source load
+        load: (C, K, H) partner load, +inf for padded partners
+        cap: (C, K) partner capacity
+        tolerance: Bisection stops once the bracket is this narrow
+
+    Returns:
+        Tuple of (utilization (C,), fractions (C, K)); utilization is inf
+        where no split keeps the partners within their forecasts or the
+        candidate has no shared hour
+    """
+    missing = shared_gaps(source, load)
+    # Jam tanpa data: sumber 0 dan beban partner 0, jam itu tidak membatasi u
+    source = np.where(missing, 0.0, np.maximum(np.nan_to_num(source), 0))
+    load = np.where(np.isnan(load), 0.0, load)
+
+    # Batas atas: seluruh beban ke satu partner terbaik
+    with np.errstate(invalid='ignore'):
+        single = ((load + source[:, None, :]) / cap[:, :, None]).max(axis=2)
+    hi = single.min(axis=1)
+    lo = np.zeros_like(hi)
+    solvable = np.isfinite(hi) & ~missing.all(axis=1)
+    hi = np.where(solvable, hi, 1.0)
+
+    while np.any(hi - lo > tolerance):
+        mid = (lo + hi) / 2
+        feasible = np.clip(_max_shares(mid, source, load, cap), 0, None).sum(axis=1) >= 1
+        hi = np.where(feasible, mid, hi)
+        lo = np.where(feasible, lo, mid)
+
+    # Pada u optimal, bagi menurut kapasitas sisa masing-masing partner
+    shares = np.clip(_max_shares(hi, source, load, cap), 0, None)
+    shares = np.where(np.isinf(shares), 1.0, shares)
+    total = shares.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fractions = np.where(total > 0, shares / total, 0.0)
+    return np.where(solvable, hi, np.inf), fractions
+
+
+def optimal_splits(forecasts: dict, start, steps: int, pairs: dict = FEEDER_PAIRS,
+                   limits=None, max_partners: int = SPLIT_MAX_PARTNERS,
+                   sources=None, upper_band: bool = False) -> dict:
+    """
+    Best split of every source over up to ``max_partners`` of its partners
+
+    Args:
+        forecasts: Dict feeder -> ForecastResult (lowercase names)
+        start: First hour of the evaluated period
+        steps: Hours in the period
+        pairs: Directed transfer graph, feeder -> list of partners
+        limits: CapacityIndex (default: utils.capacity.capacity_index())
+        max_partners: Largest partner set considered per split
+        sources: Sources to solve (default: every source with a forecast)
+        upper_band: Judge each feeder on max(forecast, upper band) per hour,
+            like the transfer matrix judges single transfers
+
+    Returns:
+        Dict source -> SplitResult; sources without a feasible split are left out
+    """
+    feeders, values = align_forecasts(forecasts, start, steps)
+    if upper_band:
+        _, upper = align_forecasts(forecasts, start, steps, feeders, field="upper")
+        values = np.fmax(values, upper)  # Tanpa band: tetap forecast titik
+    row = {feeder: i for i, feeder in enumerate(feeders)}
+    sources = [s.lower() for s in (sources or pairs)]
+
+    # Semua kandidat (sumber, himpunan partner) dalam satu batch
+    candidates = []
+    for source in sources:
+        if source not in row:
+            continue
+        partners = [p for p in pairs.get(source, []) if p in row and p != source]
+        for size in range(1, min(max_partners, len(partners)) + 1):
+            candidates.extend((source, combo) for combo in combinations(partners, size))
+    if not candidates:
+        return {}
+
+    width = max(len(combo) for _, combo in candidates)
+    src = np.array([row[source] for source, _ in candidates])
+    idx = np.array([[row[p] for p in combo] + [0] * (width - len(combo)) for _, combo in candidates])
+    padded = np.array([[False] * len(combo) + [True] * (width - len(combo)) for _, combo in candidates])
+    _, feeder_capacity = (limits or capacity_index()).lookup(feeders)
+    cap = np.where(padded, 1.0, feeder_capacity[idx])
+
+    load = np.where(padded[:, :, None], np.inf, values[idx])
+    utilization, fractions = solve_splits(values[src], load, cap)
+
+    # Kandidat terbaik per sumber: utilisasi terendah, lalu partner paling sedikit
+    best = {}
+    for c, (source, combo) in enumerate(candidates):
+        if not np.isfinite(utilization[c]):
+            continue
+        rank = (round(float(utilization[c]), 4), len(combo))
+        if source not in best or rank < best[source][0]:
+            best[source] = (rank, c)
+
+    results = {}
+    for source, (_, c) in best.items():
+        used = fractions[c] > 0
+        combo = np.array(candidates[c][1] + ('',) * (width - len(candidates[c][1])))[used]
+        share = fractions[c][used]
+        order = np.argsort(-share)
+
+        carried = values[idx[c][used]] + share[:, None] * values[src[c]][None, :]
+        headroom = (cap[c][used][:, None] - carried).min(axis=0)  # NaN di jam tanpa data
+        results[source] = SplitResult(
+            source=source,
+            partners=tuple(combo[order].tolist()),
+            fractions=share[order],
+            utilization=float(utilization[c]),
+            headroom=make_forecast(start, headroom),
+        )
+    return results
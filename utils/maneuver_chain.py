@@ -0,0 +1,203 @@
+"""
+Maneuver Chain Search
+Multi-hop load transfers over the FEEDER_PAIRS graph. In a chain
+source -> a -> b, feeder a takes over the load of the source and hands its
+own load on to b, so every intermediate feeder carries the load of its
+predecessor and only the last feeder carries a combined load. Chains are
+searched best-first on the highest utilization (load / capacity of the
+receiving feeder) along the chain; partial chains that already exceed a
+capacity are pruned, combined-load curves are computed once per edge, and
+the search stops at the top-k chains or at its time budget.
+"""
+
+import heapq
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+from constants import (
+    CHAIN_MAX_HOPS,
+    CHAIN_SEARCH_SECONDS,
+    CHAIN_TOP_K,
+    FEEDER_PAIRS,
+)
+from design_system import STATUS_LEVELS
+from utils.capacity import capacity_index, load_status
+from utils.forecast_contract import align_forecasts
+from utils.transfer_matrix import edge_peaks
+
+
+class ManeuverChain(NamedTuple):
+    """One feasible transfer chain"""
+    feeders: tuple      # source, first partner, ..., last partner
+    loads: tuple        # Peak load each receiving feeder would carry (A)
+    capacities: tuple   # Capacity of each receiving feeder (A)
+    utilization: float  # Highest load / capacity along the chain (bottleneck)
+    status: str         # Worst 'safe' / 'warning' / 'danger' along the chain
+
+    @property
+    def hops(self) -> int:
+        return len(self.feeders) - 1
+
+    @property
+    def bottleneck(self) -> str:
+        """Feeder with the highest utilization"""
+        return self.feeders[1 + self._worst()]
+
+    @property
+    def peak(self) -> float:
+        """Load of the bottleneck feeder (A)"""
+        return self.loads[self._worst()]
+
+    def _worst(self) -> int:
+        return int(np.argmax(np.divide(self.loads, self.capacities)))
+
+    def label(self) -> str:
+        return " → ".join(self.feeders)
+
+
+class ChainSearch(NamedTuple):
+    """Result of one chain search"""
+    chains: list        # ManeuverChain, lowest utilization first
+    complete: bool      # False if the time budget ran out before the search finished
+    expanded: int       # Partial chains taken from the queue
+    edges: int          # Combined-load curves computed
+    elapsed_ms: float
+
+
+class EdgeCurves:
+    """
+    Combined-load curves of feeder pairs, computed on first use
+
+    Peaks are judged like the transfer matrix: the maximum of the load
+    and of the summed upper band.
+    """
+
+    def __init__(self, values: np.ndarray, upper: np.ndarray):
+        self.values = values
+        self.upper = upper
+        self._curves = {}
+
+        # Beban satu feeder saja (dibawa feeder perantara)
+        peak, _, upper_peak, _ = edge_peaks(values, upper)
+        self.node_peak = np.fmax(peak, upper_peak)
+
+    def __len__(self) -> int:
+        return len(self._curves)
+
+    def curve(self, a: int, b: int) -> np.ndarray:
+        """Combined load of feeders a and b per hour"""
+        return self._edge(a, b)[0]
+
+    def peak(self, a: int, b: int) -> float:
+        """Judged peak of the combined load, NaN without overlapping hours"""
+        return self._edge(a, b)[1]
+
+    def _edge(self, a: int, b: int) -> tuple:
+        key = (a, b) if a < b else (b, a)  # Beban gabungan simetris
+        hit = self._curves.get(key)
+        if hit is None:
+            load = self.values[a] + self.values[b]
+            upper = self.upper[a] + self.upper[b]
+            peak, _, upper_peak, _ = edge_peaks(load[None], upper[None])
+            hit = self._curves[key] = (load, float(np.fmax(peak, upper_peak)[0]))
+        return hit
+
+
+def search_chains(forecasts: dict, source: str, start, steps: int, pairs: dict = FEEDER_PAIRS,
+                  top_k: int = CHAIN_TOP_K, max_hops: int = CHAIN_MAX_HOPS,
+                  time_budget: float = CHAIN_SEARCH_SECONDS, limits=None) -> ChainSearch:
+    """
+    Top-k transfer chains that keep every feeder below its capacity
+
+    Args:
+        forecasts: Dict feeder -> ForecastResult (lowercase names); feeders
+            without a forecast are never part of a chain
+        source: Feeder whose load is transferred
+        start: First hour of the evaluated period
+        steps: Hours in the period
+        pairs: Directed transfer graph, feeder -> list of partners
+        top_k: Number of chains returned
+        max_hops: Longest chain (1 = direct partners only)
+        time_budget: Seconds before the best chains found so far are returned
+        limits: CapacityIndex (default: utils.capacity.capacity_index())
+
+    Returns:
+        ChainSearch
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    source = source.lower()
+
+    feeders, values = align_forecasts(forecasts, start, steps)
+    _, upper = align_forecasts(forecasts, start, steps, feeders, field="upper")
+    edges = EdgeCurves(values, upper)
+    node_peak = edges.node_peak
+    warning, capacity = (limits or capacity_index()).lookup(feeders)
+
+    position = {feeder: i for i, feeder in enumerate(feeders)}
+    has_data = ~np.isnan(node_peak)
+    neighbors = [
+        [position[p] for p in pairs.get(feeder, []) if p in position and has_data[position[p]]]
+        for feeder in feeders
+    ]
+
+    found = []      # Max-heap (-utilisasi, -hop, urutan, rantai) berisi top-k sementara
+    if source not in position or not has_data[position[source]]:
+        return ChainSearch([], True, 0, 0, (time.perf_counter() - started) * 1000)
+
+    # Antrian: (batas bawah, jumlah hop, urutan, jalur). Batas bawah = utilisasi
+    # tertinggi feeder perantara; hanya bisa naik saat rantai diperpanjang.
+    queue = [(-np.inf, 1, i, (position[source], p)) for i, p in enumerate(neighbors[position[source]])]
+    heapq.heapify(queue)
+    seq = len(queue)
+    expanded = 0
+    complete = True
+
+    while queue:
+        bound, hops, _, path = heapq.heappop(queue)
+        if len(found) == top_k and bound >= -found[0][0]:
+            break  # Tidak ada rantai tersisa yang lebih baik dari top-k
+        if time.perf_counter() > deadline:
+            complete = False
+            break
+        expanded += 1
+
+        last = path[-1]
+        last_load = edges.peak(path[-2], last)
+        utilization = max(bound, last_load / capacity[last])
+        if utilization < 1:
+            receivers = np.array(path[1:])
+            loads = np.append(node_peak[list(path[:-2])], last_load)
+            status = load_status(loads, warning[receivers], capacity[receivers]).max()
+            chain = ManeuverChain(
+                feeders=tuple(feeders[i] for i in path),
+                loads=tuple(loads.tolist()),
+                capacities=tuple(capacity[receivers].tolist()),
+                utilization=float(utilization),
+                status=STATUS_LEVELS[status],
+            )
+            entry = (-utilization, -hops, seq, chain)
+            seq += 1
+            if len(found) < top_k:
+                heapq.heappush(found, entry)
+            elif entry > found[0]:
+                heapq.heapreplace(found, entry)
+
+        if hops >= max_hops:
+            continue
+
+        # Feeder terakhir menjadi perantara dan membawa beban pendahulunya
+        next_bound = max(bound, node_peak[path[-2]] / capacity[last])
+        if next_bound >= 1:
+            continue  # Pruning: perantara sudah melebihi kapasitas
+        if len(found) == top_k and next_bound >= -found[0][0]:
+            continue
+        for n in neighbors[last]:
+            if n not in path:
+                heapq.heappush(queue, (next_bound, hops + 1, seq, path + (n,)))
+                seq += 1
+
+    chains = [entry[-1] for entry in sorted(found, reverse=True)]
+    return ChainSearch(chains, complete, expanded, len(edges), (time.perf_counter() - started) * 1000)
@@ -0,0 +1,217 @@
+"""
+Model Refit Pipeline
+Rebuilds the SARIMAX feeder models from the database with the same exog
+builders the feeder modules use at forecast time. Each refit keeps the
+specification of the current artifact and warm-starts the optimizer from
+its parameters; feeders are refitted in parallel, one process per feeder.
+"""
+
+import importlib
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from constants import (
+    FEEDER_MODULES,
+    MODEL_VERSIONS_DIR,
+    REFIT_HISTORY_DAYS,
+    REFIT_MAXITER,
+    REFIT_KEEP_VERSIONS,
+)
+from utils.model_store import (
+    load_artifact,
+    unwrap_results,
+    rewrap_results,
+    save_version,
+    publish_version,
+    prune_versions,
+)
+
+
+class RefitResult(NamedTuple):
+    """Outcome of refitting one feeder"""
+    feeder: str
+    status: str                 # 'ok', 'skipped' or 'failed'
+    version_path: Optional[str]
+    aic: Optional[float]
+    previous_aic: Optional[float]
+    iterations: Optional[int]
+    seconds: float
+    message: str
+
+
+# ============================================================
+# TRAINING DATA
+# ============================================================
+
+def training_frame(df_long: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn DB rows (timestamp, arus) into an hourly frame with gaps kept as NaN
+
+    The state-space filter skips missing hours, so the grid is not filled in.
+    """
+    df = df_long[['timestamp', 'arus']].dropna()
+    df = df.groupby('timestamp')['arus'].mean().sort_index().to_frame()
+    return df.asfreq('H')
+
+
+def training_exog(module, df: pd.DataFrame, exog_names) -> pd.DataFrame:
+    """
+    Build the historical exog with the feeder module's own feature code
+
+    Args:
+        module: Imported feeder module (must provide history_exog)
+        df: Hourly frame with column 'arus'
+        exog_names: Column order expected by the model
+
+    Returns:
+        Float exog frame aligned to df, without missing values
+    """
+    exog = module.history_exog(df)
+    exog = exog.reindex(df.index)[list(exog_names)].astype(float)
+    return exog.ffill().bfill()
+
+
+# ============================================================
+# REFIT
+# ============================================================
+
+def refit_results(results, endog: pd.Series, exog: Optional[pd.DataFrame], maxiter: int = REFIT_MAXITER):
+    """
+    Fit the same SARIMAX specification on new data, warm-started
+
+    Args:
+        results: Current fitted results (specification and start parameters)
+        endog: Hourly load series
+        exog: Historical exog, or None for models without exog
+        maxiter: Optimizer iteration limit
+
+    Returns:
+        New fitted results object
+    """
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    old_model = results.model
+    init_kwds = old_model._get_init_kwds()
+    for key in ('endog', 'exog', 'dates', 'freq', 'missing'):
+        init_kwds.pop(key, None)
+
+    model = SARIMAX(endog, exog=exog, **init_kwds)
+
+    start_params = np.asarray(results.params, dtype=float)
+    if start_params.shape != (len(model.param_names),):
+        start_params = None  # Spesifikasi berubah, mulai dari default statsmodels
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        fitted = model.fit(start_params=start_params, disp=False, maxiter=maxiter)
+
+        # Line search macet di titik awal: ulangi dari start params default
+        retvals = fitted.mle_retvals or {}
+        if start_params is not None and not retvals.get('converged', True) and retvals.get('iterations') == 0:
+            fitted = model.fit(disp=False, maxiter=maxiter)
+
+    return fitted
+
+
+def refit_feeder(feeder: str, days: int = REFIT_HISTORY_DAYS, version: str = None,
+                 publish: bool = True, versions_dir=MODEL_VERSIONS_DIR,
+                 maxiter: int = REFIT_MAXITER) -> RefitResult:
+    """
+    Refit one feeder model and write it as a new version
+
+    Runs inside a worker process: it opens its own DB connection and never
+    raises, so one bad feeder does not stop the batch.
+
+    Args:
+        feeder: Feeder name as in FEEDER_MODULES
+        days: Days of history to train on
+        version: Version tag shared by the batch
+        publish: Also replace the live artifact in models/
+        versions_dir: Root folder for versioned artifacts
+        maxiter: Optimizer iteration limit
+    """
+    from utils.db_util import get_training_data
+
+    start = time.perf_counter()
+    version = version or datetime.now().strftime("%Y%m%dT%H%M")
+
+    def result(status, message, version_path=None, aic=None, previous_aic=None, iterations=None):
+        return RefitResult(feeder, status, version_path, aic, previous_aic, iterations,
+                           round(time.perf_counter() - start, 2), message)
+
+    try:
+        module = importlib.import_module(f"feeders.{FEEDER_MODULES[feeder]}")
+        model_path = module.MODEL_PATH
+        if not os.path.exists(model_path):
+            return result('skipped', f"Artifact tidak ditemukan: {model_path}")
+
+        artifact = load_artifact(model_path)
+        results, key = unwrap_results(artifact)
+        if results is None:
+            return result('skipped', "Artifact bukan model state-space")
+
+        k_exog = getattr(results.model, 'k_exog', 0)
+        if k_exog and not hasattr(module, 'history_exog'):
+            return result('skipped', "Modul feeder tidak menyediakan exog historis")
+
+        df = training_frame(get_training_data(feeder, days))
+        if df['arus'].count() < 24 * 14:
+            return result('skipped', f"Data training kurang ({df['arus'].count()} jam)")
+
+        exog = training_exog(module, df, results.model.exog_names) if k_exog else None
+        new_results = refit_results(results, df['arus'], exog, maxiter=maxiter)
+
+        version_path = save_version(
+            rewrap_results(artifact, new_results, key), model_path, version, versions_dir
+        )
+        if publish:
+            publish_version(version_path, model_path)
+            prune_versions(model_path, REFIT_KEEP_VERSIONS, versions_dir)
+
+        iterations = new_results.mle_retvals.get('iterations') if new_results.mle_retvals else None
+        return result('ok', "Refit selesai", str(version_path),
+                      float(new_results.aic), float(getattr(results, 'aic', np.nan)), iterations)
+
+    except Exception as e:
+        return result('failed', str(e))
+
+
+def refit_all(feeders=None, days: int = REFIT_HISTORY_DAYS, workers: int = None,
+              publish: bool = True, versions_dir=MODEL_VERSIONS_DIR,
+              maxiter: int = REFIT_MAXITER) -> pd.DataFrame:
+    """
+    Refit many feeders in parallel, one worker process per feeder
+
+    Args:
+        feeders: Feeder names (default: all in FEEDER_MODULES)
+        days: Days of history to train on
+        workers: Worker processes (default: number of CPU cores)
+        publish: Also replace the live artifacts in models/
+        versions_dir: Root folder for versioned artifacts
+        maxiter: Optimizer iteration limit
+
+    Returns:
+        DataFrame with one RefitResult row per feeder
+    """
+    feeders = list(feeders or FEEDER_MODULES)
+    version = datetime.now().strftime("%Y%m%dT%H%M")
+    workers = min(workers or os.cpu_count() or 1, len(feeders))
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(refit_feeder, feeder, days, version, publish, versions_dir, maxiter)
+            for feeder in feeders
+        ]
+        for future in as_completed(futures):
+            rows.append(future.result())
+
+    report = pd.DataFrame(rows, columns=RefitResult._fields)
+    return report.sort_values('feeder').reset_index(drop=True)
@@ -0,0 +1,154 @@
+"""
+Model Artifact Helpers
+Identifies the .pkl model artifacts in models/ so caches built on top of a
+model can tell when the file behind it has been replaced, and stores the
+versioned artifacts written by the refit pipeline.
+"""
+
+import os
+import pickle
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from constants import MODEL_VERSIONS_DIR, REFIT_KEEP_VERSIONS
+
+
+def artifact_key(model_path) -> tuple:
+    """
+    Identity of a model artifact on disk
+
+    Args:
+        model_path: Path to the pickled model
+
+    Returns:
+        Tuple of (absolute path, modification time in ns, size in bytes),
+        or (absolute path, None, None) if the file does not exist
+    """
+    path = str(Path(model_path).resolve())
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def version_label(key: tuple) -> str:
+    """Short model version for display, e.g. 'birem_model@20250101T0300' """
+    path, mtime_ns, _ = key
+    if mtime_ns is None:
+        return Path(path).stem
+    return f"{Path(path).stem}@{time.strftime('%Y%m%dT%H%M', time.localtime(mtime_ns / 1e9))}"
+
+
+# ============================================================
+# VERSIONED ARTIFACTS
+# ============================================================
+
+def load_artifact(model_path):
+    """Load a pickled model artifact"""
+    with open(model_path, "rb") as f:
+        return pickle.load(f)
+
+
+_ARTIFACTS = {}
+_ARTIFACT_LOCK = threading.Lock()
+
+
+def cached_artifact(model_path):
+    """
+    Loaded model artifact, unpickled again only after the file changed
+
+    The object is shared between callers and threads: read it, never
+    modify it in place (refresh_state() extends into a new results object).
+    """
+    key = artifact_key(model_path)
+    if key[1] is None:
+        raise FileNotFoundError(f"Model file tidak ditemukan: {model_path}")
+    with _ARTIFACT_LOCK:
+        hit = _ARTIFACTS.get(key[0])
+    if hit is not None and hit[0] == key:
+        return hit[1]
+
+    artifact = load_artifact(model_path)
+    with _ARTIFACT_LOCK:
+        _ARTIFACTS[key[0]] = (key, artifact)
+    return artifact
+
+
+def unwrap_results(artifact):
+    """
+    Get the fitted results object out of an artifact
+
+    Feeder artifacts are either the results object itself or a dict holding
+    it under 'model' (galis, tanjung bumi) or 'model_fit' (parseh). Tanjung
+    bumi unwraps fine but is not refitted: its module has no history_exog().
+
+    Returns:
+        Tuple of (results or None, dict key or None)
+    """
+    if isinstance(artifact, dict):
+        for key in ('model', 'model_fit'):
+            if hasattr(artifact.get(key), 'forecast'):
+                return artifact[key], key
+        return None, None
+    if hasattr(artifact, 'forecast') and hasattr(artifact, 'params'):
+        return artifact, None
+    return None, None
+
+
+def rewrap_results(artifact, results, key):
+    """Put refitted results back into the structure of the original artifact"""
+    if key is None:
+        return results
+    wrapped = dict(artifact)
+    wrapped[key] = results
+    return wrapped
+
+
+def save_version(artifact, model_path, version: str, versions_dir=MODEL_VERSIONS_DIR) -> Path:
+    """
+    Write an artifact as an immutable version
+
+    Args:
+        artifact: Object to pickle
+        model_path: Live path of the model, e.g. models/model_birem.pkl
+        version: Version tag, e.g. '20250130T0200'
+        versions_dir: Root folder for versions
+
+    Returns:
+        Path of the versioned file (versions_dir/<stem>/<stem>_<version>.pkl)
+    """
+    stem = Path(model_path).stem
+    target = Path(versions_dir) / stem / f"{stem}_{version}.pkl"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "wb") as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return target
+
+
+def publish_version(version_path, model_path) -> None:
+    """
+    Make a versioned artifact the live model
+
+    The copy goes to a temporary file next to the live path first and is
+    then renamed over it, so a dashboard loading the model never sees a
+    half-written pickle. The new mtime also changes artifact_key(), which
+    invalidates state cached for the old model.
+    """
+    model_path = Path(model_path)
+    model_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = model_path.with_name(model_path.name + ".tmp")
+    shutil.copyfile(version_path, tmp_path)
+    os.replace(tmp_path, model_path)
+
+
+def prune_versions(model_path, keep: int = REFIT_KEEP_VERSIONS, versions_dir=MODEL_VERSIONS_DIR) -> list:
+    """Delete all but the newest ``keep`` versions of a model, returns deleted paths"""
+    stem = Path(model_path).stem
+    versions = sorted((Path(versions_dir) / stem).glob(f"{stem}_*.pkl"))
+    stale = versions[:-keep] if keep > 0 else []
+    for path in stale:
+        path.unlink()
+    return stale
@@ -0,0 +1,209 @@
+"""
+Network Forecast
+One forecast pass for every feeder in FEEDER_MODULES. Feeder modules that
+expose ``forecast_inputs()`` hand over their refreshed model and future
+exog; the compiled forecast matrices of those models are stacked by state
+dimension and all of them are forecast with a few batched array products.
+Feeders whose forecast is not a plain state-space forecast (exog ladders,
+scenario or pattern post-processing, recursive features) run their own
+``forecast()``, and feeders without a model get the seasonal baseline.
+"""
+
+import importlib
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from constants import FEEDER_MODULES, FORECAST_HOURS, FORECAST_INTERVAL_ALPHA
+from utils import baseline_forecast
+from utils.forecast_contract import align_forecasts, make_forecast
+from utils.state_space import CompiledForecaster, compiled_forecaster, z_score
+
+
+class NetworkMember(NamedTuple):
+    """Forecast inputs of one batched feeder"""
+    feeder: str
+    start: pd.Timestamp
+    compiled: CompiledForecaster
+    state: np.ndarray       # (k,) predicted state after the last observation
+    state_cov: np.ndarray   # (k, k) its covariance
+    exog_term: np.ndarray   # (steps,) x_h @ beta of the future exog
+
+
+class NetworkForecast(NamedTuple):
+    """Forecasts of all feeders from one network pass"""
+    forecasts: dict         # feeder -> ForecastResult
+    batched: list           # Feeders forecast in the stacked pass
+    elapsed_ms: float
+
+    def aligned(self, start, steps: int = FORECAST_HOURS, feeders=None, field: str = "values") -> tuple:
+        """
+        Forecasts on a common hourly grid (see forecast_contract.align_forecasts)
+
+        Returns:
+            Tuple of (feeder names, array (n_feeders, steps) with NaN where a
+            feeder's forecast does not cover the hour)
+        """
+        return align_forecasts(self.forecasts, start, steps, feeders, field)
+
+
+# ============================================================
+# MEMBERS
+# ============================================================
+
+def _module(feeder: str):
+    name = FEEDER_MODULES.get(feeder.lower())
+    return None if name is None else importlib.import_module(f"feeders.{name}")
+
+
+def network_member(feeder: str, df_historical: pd.DataFrame, steps: int = FORECAST_HOURS,
+                   start_datetime=None):
+    """
+    Batched forecast inputs of a feeder, or None if it needs its own forecast()
+
+    Args:
+        feeder: Feeder name (key of FEEDER_MODULES)
+        df_historical: DataFrame with DatetimeIndex and column 'arus'
+        steps: Forecast horizon
+        start_datetime: Passed on to the module (default: after its data)
+    """
+    module = _module(feeder)
+    if module is None or not hasattr(module, 'forecast_inputs') or not Path(module.MODEL_PATH).exists():
+        return None
+
+    results, future_index, exog = module.forecast_inputs(df_historical, steps, start_datetime)
+    compiled = compiled_forecaster(results, steps)
+    if compiled is None:
+        return None
+
+    filtered = results.filter_results
+    return NetworkMember(
+        feeder=feeder.lower(),
+        start=future_index[0],
+        compiled=compiled,
+        state=np.asarray(filtered.predicted_state[:, -1], dtype=float),
+        state_cov=np.asarray(filtered.predicted_state_cov[:, :, -1], dtype=float),
+        exog_term=compiled.exog_term(exog, steps),
+    )
+
+
+# ============================================================
+# STACKED FORECAST
+# ============================================================
+
+_STACKS = {}
+_STACK_LOCK = threading.Lock()
+_STACK_MAX = 32
+
+
+def _stacked(compiled: tuple, steps: int) -> tuple:
+    """Stacked powers, intercepts and noise variances of a group (cached per model set)"""
+    key = (tuple(id(c) for c in compiled), steps)
+    with _STACK_LOCK:
+        hit = _STACKS.get(key)
+    # Objek compiled ikut disimpan, jadi id() tidak bisa dipakai ulang selama entri ada
+    if hit is not None and all(a is b for a, b in zip(hit[0], compiled)):
+        return hit[1]
+
+    stacked = (
+        np.stack([c.powers[:steps] for c in compiled]),     # (G, steps, k)
+        np.stack([c.intercept[:steps] for c in compiled]),  # (G, steps)
+        np.stack([c.noise_var[:steps] for c in compiled]),  # (G, steps)
+    )
+    with _STACK_LOCK:
+        if len(_STACKS) >= _STACK_MAX:
+            _STACKS.pop(next(iter(_STACKS)))
+        _STACKS[key] = (compiled, stacked)
+    return stacked
+
+
+def forecast_members(members, steps: int = FORECAST_HOURS, alpha: float = FORECAST_INTERVAL_ALPHA) -> dict:
+    """
+    Forecast many feeders at once, grouped by state dimension
+
+    Within a group of G models with k states the mean and variance of all
+    horizons are two einsum calls over stacked (G, steps, k) matrices.
+    Forecasts are clipped at 0 like the feeder modules do.
+
+    Returns:
+        Dict feeder -> ForecastResult with prediction band
+    """
+    groups = defaultdict(list)
+    for member in members:
+        groups[len(member.state)].append(member)
+
+    z = z_score(alpha)
+    forecasts = {}
+    for group in groups.values():
+        powers, intercept, noise_var = _stacked(tuple(m.compiled for m in group), steps)
+        states = np.stack([m.state for m in group])                  # (G, k)
+        state_cov = np.stack([m.state_cov for m in group])           # (G, k, k)
+        exog_term = np.stack([m.exog_term for m in group])           # (G, steps)
+
+        mean = np.einsum('ghk,gk->gh', powers, states) + intercept + exog_term
+        variance = np.einsum('ghk,gkl,ghl->gh', powers, state_cov, powers) + noise_var
+        half_width = z * np.sqrt(variance)
+
+        for i, member in enumerate(group):
+            forecasts[member.feeder] = make_forecast(
+                member.start,
+                np.maximum(mean[i], 0),
+                lower=np.maximum(mean[i] - half_width[i], 0),
+                upper=np.maximum(mean[i] + half_width[i], 0),
+            )
+    return forecasts
+
+
+def network_forecast(histories: dict, steps: int = FORECAST_HOURS, start_datetime=None,
+                     alpha: float = FORECAST_INTERVAL_ALPHA) -> NetworkForecast:
+    """
+    Forecast every feeder of the network in one pass
+
+    Args:
+        histories: Dict feeder -> DataFrame (DatetimeIndex, column 'arus')
+        steps: Forecast horizon
+        start_datetime: Forecast start passed to every module (default: after each feeder's data)
+        alpha: 1 - coverage of the prediction band
+
+    Returns:
+        NetworkForecast
+    """
+    started = time.perf_counter()
+    members, others = [], []
+    for feeder, df in histories.items():
+        feeder = feeder.lower()
+        try:
+            member = network_member(feeder, df, steps, start_datetime)
+        except Exception as e:
+            print(f"Warning: input forecast '{feeder}' gagal ({e}), memakai forecast() modul")
+            member = None
+        if member is None:
+            others.append(feeder)
+        else:
+            members.append(member)
+
+    forecasts = forecast_members(members, steps, alpha)
+
+    for feeder in others:
+        df = histories[feeder]
+        module = _module(feeder)
+        try:
+            if module is None or not Path(module.MODEL_PATH).exists():
+                forecasts[feeder] = baseline_forecast.forecast(feeder, df, steps, start_datetime)
+                continue
+            forecasts[feeder] = module.forecast(df, steps=steps, start_datetime=start_datetime)
+        except Exception as e:
+            print(f"Warning: forecast '{feeder}' gagal ({e}), memakai baseline")
+            fallback = baseline_forecast.forecast(feeder, df, steps, start_datetime)
+            forecasts[feeder] = fallback.replace(degraded='error')
+
+    return NetworkForecast(
+        forecasts=forecasts,
+        batched=[m.feeder for m in members],
+        elapsed_ms=(time.perf_counter() - started) * 1000,
+    )
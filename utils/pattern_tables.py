@@ -0,0 +1,142 @@
+"""
+Compiled Hourly Pattern Tables
+Turns the nested pattern dicts stored with a feeder model into fixed-size
+lookup arrays so pattern blending, smoothing and clipping run as array ops.
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+
+# ============================================================
+# TABLE STRUCTURE
+# ============================================================
+
+class PatternTables(NamedTuple):
+    """Lookup arrays indexed by [is_weekend, hour] or [hour]"""
+    level: np.ndarray    # (2, 24) pattern level, NaN where the model has no pattern
+    weight: np.ndarray   # (24,) weight of the SARIMAX forecast in the blend
+    lower: np.ndarray    # (24,) lower clip bound
+    upper: np.ndarray    # (24,) upper clip bound
+
+
+def compile_pattern_tables(
+    model_data: dict,
+    default_weight: float = 0.45,
+    hour_weights: Optional[dict] = None,
+    default_lower: float = 80.0,
+    default_upper: float = 180.0,
+    bound_overrides: Optional[dict] = None,
+) -> PatternTables:
+    """
+    Compile the 'patterns'/'weekday'/'weekend' dicts of a model into arrays
+
+    Lookup priority per cell follows the original per-hour loops: the
+    weekend (or weekday) pattern of that hour, then the 'median' of the
+    hourly pattern, otherwise NaN so the caller can choose its default.
+
+    Args:
+        model_data: Model dict with optional 'patterns', 'weekday', 'weekend'
+        default_weight: SARIMAX weight for hours without a specific weight
+        hour_weights: Mapping of hour tuple -> SARIMAX weight
+        default_lower: Lower bound when the hourly pattern has no 'min'
+        default_upper: Upper bound when the hourly pattern has no 'max'
+        bound_overrides: Mapping of hour tuple -> (lower, upper), applied last
+
+    Returns:
+        PatternTables
+    """
+    hourly_patterns = model_data.get('patterns', {}) or {}
+    weekday_patterns = model_data.get('weekday', {}) or {}
+    weekend_patterns = model_data.get('weekend', {}) or {}
+
+    level = np.full((2, 24), np.nan)
+    lower = np.full(24, float(default_lower))
+    upper = np.full(24, float(default_upper))
+
+    for h in range(24):
+        hourly = hourly_patterns.get(h)
+        median = hourly.get('median', 115) if hourly is not None else np.nan
+        level[0, h] = weekday_patterns[h] if h in weekday_patterns else median
+        level[1, h] = weekend_patterns[h] if h in weekend_patterns else median
+        if hourly is not None:
+            lower[h] = hourly.get('min', default_lower)
+            upper[h] = hourly.get('max', default_upper)
+
+    weight = np.full(24, float(default_weight))
+    for hours, value in (hour_weights or {}).items():
+        weight[list(hours)] = value
+
+    for hours, (lo, hi) in (bound_overrides or {}).items():
+        lower[list(hours)] = lo
+        upper[list(hours)] = hi
+
+    return PatternTables(level=level, weight=weight, lower=lower, upper=upper)
+
+
+# ============================================================
+# VECTORIZED OPERATIONS
+# ============================================================
+
+def lookup_pattern(tables: PatternTables, datetime_index: pd.DatetimeIndex, default=115.0) -> np.ndarray:
+    """
+    Gather the pattern level for each timestamp
+
+    Args:
+        tables: Compiled pattern tables
+        datetime_index: Timestamps to look up
+        default: Scalar or (24,) array used where the model has no pattern
+
+    Returns:
+        Array of pattern levels, one per timestamp
+    """
+    hours = datetime_index.hour.values
+    is_weekend = (datetime_index.dayofweek.values >= 5).astype(np.intp)
+    pattern = tables.level[is_weekend, hours]
+
+    missing = np.isnan(pattern)
+    if missing.any():
+        default = np.broadcast_to(np.asarray(default, dtype=float), (24,))
+        pattern[missing] = default[hours[missing]]
+    return pattern
+
+
+def smooth_daily(values: np.ndarray, alpha: float = 0.08, period: int = 24) -> np.ndarray:
+    """
+    Blend each point with the (already smoothed) point one period earlier
+
+    Equivalent to ``values[i] = (1 - alpha) * values[i] + alpha * values[i - period]``
+    applied sequentially, but done one whole period at a time.
+    """
+    values = np.array(values, dtype=float)
+    for start in range(period, len(values), period):
+        stop = min(start + period, len(values))
+        values[start:stop] = (1 - alpha) * values[start:stop] + alpha * values[start - period:stop - period]
+    return values
+
+
+def blend_with_patterns(base_forecast: np.ndarray, datetime_index: pd.DatetimeIndex,
+                        tables: PatternTables, default=115.0, alpha: float = 0.08) -> np.ndarray:
+    """
+    Weighted ensemble of a model forecast with the hourly pattern, smoothed and clipped
+
+    Args:
+        base_forecast: Model forecast values
+        datetime_index: Timestamps of the forecast
+        tables: Compiled pattern tables
+        default: Pattern level used where the model has no pattern
+        alpha: Day-to-day smoothing factor
+
+    Returns:
+        Blended forecast array
+    """
+    hours = datetime_index.hour.values
+    pattern = lookup_pattern(tables, datetime_index, default)
+    w_sar = tables.weight[hours]
+
+    ensemble = w_sar * np.asarray(base_forecast, dtype=float) + (1 - w_sar) * pattern
+    ensemble = smooth_daily(ensemble, alpha)
+
+    return np.clip(ensemble, tables.lower[hours], tables.upper[hours])
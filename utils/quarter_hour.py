@@ -0,0 +1,253 @@
+"""
+Quarter-Hour Transfer Check
+Hourly forecasts hide the 15-minute peaks that trip protection. Each feeder
+gets an intra-hour profile learned from the 96 HH_MM columns of
+data_bebanrst: per hour of day, the ratio of the :00, :15, :30 and :45
+readings to the on-the-hour reading. Disaggregating all forecasts is one
+(feeders x hours x 4) multiply, and the combined loads are judged with the
+same transfer matrix at 15-minute spacing, so the check costs about as
+much as the hourly one.
+"""
+
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from constants import (
+    FEEDER_PAIRS,
+    QUARTER_PEAK_QUANTILE,
+    QUARTER_PROFILE_DAYS,
+    QUARTER_RETRY_SECONDS,
+)
+from design_system import STATUS_LEVELS
+from utils.capacity import NO_DATA
+from utils.forecast_contract import HOUR, align_forecasts, make_forecast
+from utils.transfer_matrix import TransferMatrix, transfer_matrix
+
+QUARTER = pd.Timedelta(minutes=15)
+STEPS_PER_HOUR = 4
+
+# Kolom 15 menit data_bebanrst; 23_59 adalah pembacaan 00:00 hari berikutnya
+QUARTER_COLUMNS = [f"{h:02d}_{m:02d}" for h in range(24) for m in (0, 15, 30, 45)][1:] + ["23_59"]
+
+
+# ============================================================
+# INTRA-HOUR PROFILES
+# ============================================================
+
+class IntraHourProfile(NamedTuple):
+    """Ratio of each quarter-hour reading to the on-the-hour reading"""
+    feeders: list           # Row order, lowercase
+    ratio: np.ndarray       # (F, 24, 4) median ratio per hour of day and quarter
+    high: np.ndarray        # (F, 24, 4) QUARTER_PEAK_QUANTILE of the ratio
+    days: np.ndarray        # (F,) days with readings behind each profile
+
+    def rows(self, feeders) -> np.ndarray:
+        """Profile row of each feeder; unknown feeders get the flat profile (last row)"""
+        position = {feeder: i for i, feeder in enumerate(self.feeders)}
+        return np.array([position.get(f.lower(), len(self.feeders)) for f in feeders], dtype=np.intp)
+
+    def tables(self, feeders) -> tuple:
+        """(ratio, high) arrays of shape (len(feeders), 24, 4)"""
+        flat = np.ones((1, 24, STEPS_PER_HOUR))
+        rows = self.rows(feeders)
+        return (np.concatenate([self.ratio, flat])[rows],
+                np.concatenate([self.high, flat])[rows])
+
+
+def build_intra_hour_profile(readings: pd.DataFrame,
+                             quantile: float = QUARTER_PEAK_QUANTILE) -> IntraHourProfile:
+    """
+    Learn intra-hour profiles from wide 15-minute readings
+
+    Args:
+        readings: DataFrame with 'tanggal', 'feeder' and QUARTER_COLUMNS
+            (as returned by db_util.get_quarter_hour_data)
+        quantile: Ratio quantile kept as the high profile
+
+    Returns:
+        IntraHourProfile; hours without usable readings keep ratio 1
+    """
+    readings = readings.assign(
+        feeder=readings["feeder"].str.lower(),
+        tanggal=pd.to_datetime(readings["tanggal"]).dt.normalize(),
+    ).drop_duplicates(["feeder", "tanggal"], keep="last")
+    feeders = sorted(readings["feeder"].unique())
+    if not feeders:
+        empty = np.empty((0, 24, STEPS_PER_HOUR))
+        return IntraHourProfile([], empty, empty, np.empty(0, dtype=int))
+
+    # Kubus (feeder, hari, 96) di atas kalender penuh, hari kosong = NaN
+    dates = pd.date_range(readings["tanggal"].min(), readings["tanggal"].max(), freq="D")
+    grid = pd.MultiIndex.from_product([feeders, dates], names=["feeder", "tanggal"])
+    cube = (readings.set_index(["feeder", "tanggal"])[QUARTER_COLUMNS]
+            .apply(pd.to_numeric, errors="coerce")
+            .reindex(grid)
+            .to_numpy(dtype=float)
+            .reshape(len(feeders), len(dates), 96))
+
+    # Pembacaan 00:00 = kolom 23_59 hari sebelumnya
+    midnight = np.concatenate([np.full((len(feeders), 1), np.nan), cube[:, :-1, -1]], axis=1)
+    day = np.concatenate([midnight[..., None], cube[..., :-1]], axis=2)
+    day = day.reshape(len(feeders), len(dates), 24, STEPS_PER_HOUR)
+
+    base = day[..., :1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(base > 0, day / base, np.nan)
+    valid = ~np.isnan(ratio).all(axis=1)  # (F, 24, 4)
+    ratio[:, 0][~valid] = 1.0  # nanquantile butuh minimal satu nilai
+    median, high = np.nanquantile(ratio, [0.5, quantile], axis=1)
+    median = np.where(valid, median, 1.0)
+    high = np.where(valid, np.maximum(high, median), 1.0)
+    days = (~np.isnan(cube).all(axis=2)).sum(axis=1)
+    return IntraHourProfile(feeders, median, high, days)
+
+
+_PROFILE = None   # (IntraHourProfile, retry time or None)
+_PROFILE_LOCK = threading.Lock()
+
+
+def intra_hour_profile() -> IntraHourProfile:
+    """
+    Intra-hour profiles from the database, built on first use
+
+    If the readings query fails, the flat profile is served for
+    QUARTER_RETRY_SECONDS and the query is retried after that.
+    """
+    global _PROFILE
+    with _PROFILE_LOCK:
+        if _PROFILE is not None and (_PROFILE[1] is None or time.monotonic() < _PROFILE[1]):
+            return _PROFILE[0]
+
+    retry = None
+    try:
+        from utils.db_util import get_quarter_hour_data
+        readings = get_quarter_hour_data(QUARTER_PROFILE_DAYS)
+    except Exception as e:
+        print(f"Warning: data 15 menit gagal dimuat ({e}), memakai profil datar")
+        readings = pd.DataFrame(columns=["tanggal", "feeder"] + QUARTER_COLUMNS)
+        retry = time.monotonic() + QUARTER_RETRY_SECONDS
+
+    profile = build_intra_hour_profile(readings)
+    with _PROFILE_LOCK:
+        _PROFILE = (profile, retry)
+    return profile
+
+
+def clear_intra_hour_profile() -> None:
+    """Rebuild the profiles on next use (after new readings)"""
+    global _PROFILE
+    with _PROFILE_LOCK:
+        _PROFILE = None
+
+
+# ============================================================
+# DISAGGREGATION
+# ============================================================
+
+def disaggregate(forecasts: dict, start, steps: int, profile: IntraHourProfile = None) -> dict:
+    """
+    Quarter-hour forecasts of several feeders in one vectorized pass
+
+    Args:
+        forecasts: Dict feeder -> hourly ForecastResult
+        start: First hour of the grid
+        steps: Hours in the grid
+        profile: Intra-hour profiles (default: intra_hour_profile())
+
+    Returns:
+        Dict feeder -> ForecastResult with 15-minute spacing and 4 * steps
+        values; the upper band uses the high profile
+    """
+    profile = intra_hour_profile() if profile is None else profile
+    start = pd.Timestamp(start).floor("H")
+    feeders, values = align_forecasts(forecasts, start, steps)
+    _, lower = align_forecasts(forecasts, start, steps, feeders, field="lower")
+    _, upper = align_forecasts(forecasts, start, steps, feeders, field="upper")
+
+    ratio, high = profile.tables(feeders)
+    hours = (start.hour + np.arange(steps)) % 24
+    ratio, high = ratio[:, hours], high[:, hours]  # (F, H, 4)
+
+    def spread(hourly, table):
+        # (F, H) x (F, H, 4) -> (F, 4H)
+        return (hourly[..., None] * table).reshape(len(feeders), -1)
+
+    quarter_values = spread(values, ratio)
+    quarter_lower = spread(lower, ratio)
+    quarter_upper = spread(upper, high)
+    return {
+        feeder: make_forecast(
+            start, quarter_values[i],
+            lower=None if forecasts[feeder].lower is None else quarter_lower[i],
+            upper=None if forecasts[feeder].upper is None else quarter_upper[i],
+            freq=QUARTER, model_version=forecasts[feeder].model_version,
+        )
+        for i, feeder in enumerate(feeders) if forecasts.get(feeder) is not None
+    }
+
+
+# ============================================================
+# QUARTER-HOUR CHECK
+# ============================================================
+
+class QuarterHourCheck(NamedTuple):
+    """Hourly and 15-minute transfer matrices of the same edges"""
+    hourly: TransferMatrix
+    quarter: TransferMatrix
+    exceedances: np.ndarray  # (E,) 15-minute steps above the partner capacity
+
+    def hidden(self) -> np.ndarray:
+        """Edges whose 15-minute status is worse than the hourly status"""
+        return np.flatnonzero((self.quarter.status > self.hourly.status)
+                              & (self.hourly.status != NO_DATA))
+
+    def table(self) -> pd.DataFrame:
+        """One row per edge: hourly and 15-minute peak and status"""
+        def names(status):
+            return [STATUS_LEVELS[s] if s != NO_DATA else None for s in status]
+
+        return pd.DataFrame({
+            "source": [self.quarter.source(e) for e in range(len(self.quarter))],
+            "partner": [self.quarter.partner(e) for e in range(len(self.quarter))],
+            "hourly_peak": self.hourly.peak,
+            "quarter_peak": self.quarter.peak,
+            "quarter_peak_time": [self.quarter.peak_time(e) for e in range(len(self.quarter))],
+            "exceedances": self.exceedances,
+            "hourly_status": names(self.hourly.status),
+            "quarter_status": names(self.quarter.status),
+        })
+
+
+def quarter_hour_check(forecasts: dict, start, steps: int, pairs: dict = FEEDER_PAIRS,
+                       profile: IntraHourProfile = None, hourly: TransferMatrix = None) -> QuarterHourCheck:
+    """
+    Transfer check at 15-minute resolution next to the hourly one
+
+    Args:
+        forecasts: Dict feeder -> hourly ForecastResult (lowercase names)
+        start: First hour of the evaluated period
+        steps: Hours in the period
+        pairs: Directed edges, source -> list of partners
+        profile: Intra-hour profiles (default: intra_hour_profile())
+        hourly: Hourly matrix of the same forecasts and period, if already built
+
+    Returns:
+        QuarterHourCheck
+    """
+    start = pd.Timestamp(start).floor("H")
+    forecasts = {feeder: fc for feeder, fc in forecasts.items() if fc is not None}
+    if hourly is None:
+        hourly = transfer_matrix(forecasts, start, steps, pairs)
+    quarter = transfer_matrix(disaggregate(forecasts, start, steps, profile), start,
+                              steps * STEPS_PER_HOUR, pairs, freq=QUARTER)
+    if quarter.feeders != hourly.feeders or not np.array_equal(quarter.src, hourly.src):
+        raise ValueError("Matriks per jam tidak sesuai dengan forecast yang diberikan")
+
+    judged = np.fmax(quarter.load, quarter.upper)
+    with np.errstate(invalid="ignore"):
+        exceedances = (judged > quarter.capacity[:, None]).sum(axis=1)
+    return QuarterHourCheck(hourly, quarter, exceedances)
@@ -0,0 +1,131 @@
+"""
+Range-Max Index
+Sparse table over hourly curves: level k holds the maximum (and its
+position) of every run of 2**k values, so the maximum of any [first, last]
+range is the larger of two overlapping runs. After an O(n log n) build each
+query is O(1), also for many ranges or many curves at once. NaN values are
+ignored; a range without values returns NaN and position -1. A prefix count
+of the NaN positions lets best_window() accept only runs without gaps.
+"""
+
+import numpy as np
+
+
+class RangeMax:
+    """
+    Max / argmax index over the last axis of a curve or a stack of curves
+
+    ``window(first, stop)`` returns an index of a sub-range that shares the
+    tables, so slicing a period does not rebuild anything.
+    """
+    __slots__ = ("table", "positions", "gaps", "offset", "length")
+
+    def __init__(self, values, _tables=None, offset: int = 0, length: int = None):
+        if _tables is None:
+            _tables = self._build(np.asarray(values, dtype=float))
+        self.table, self.positions, self.gaps = _tables
+        self.offset = offset
+        self.length = self.table.shape[-1] - offset if length is None else length
+
+    @staticmethod
+    def _build(values: np.ndarray) -> tuple:
+        """
+        Tables of shape (*rows, levels, n), -inf / -1 beyond each level's end,
+        and the NaN count before each position, shape (*rows, n + 1)
+        """
+        n = values.shape[-1]
+        levels = max(int(n).bit_length(), 1)
+        table = np.full(values.shape[:-1] + (levels, n), -np.inf)
+        positions = np.full(table.shape, -1, dtype=np.intp)
+
+        table[..., 0, :] = np.where(np.isnan(values), -np.inf, values)
+        positions[..., 0, :] = np.arange(n)
+        span = 1
+        for k in range(1, levels):
+            width = n - 2 * span + 1
+            left, right = table[..., k - 1, :width], table[..., k - 1, span:span + width]
+            take_right = right > left  # Seri: posisi paling awal, seperti np.argmax
+            table[..., k, :width] = np.where(take_right, right, left)
+            positions[..., k, :width] = np.where(
+                take_right, positions[..., k - 1, span:span + width], positions[..., k - 1, :width]
+            )
+            span *= 2
+
+        gaps = np.zeros(values.shape[:-1] + (n + 1,), dtype=np.intp)
+        np.cumsum(np.isnan(values), axis=-1, out=gaps[..., 1:])
+        return table, positions, gaps
+
+    def __len__(self) -> int:
+        return self.length
+
+    def window(self, first: int, stop: int) -> "RangeMax":
+        """Index of positions [first, stop) of this index (shares the tables)"""
+        first = min(max(first, 0), self.length)
+        stop = min(max(stop, first), self.length)
+        return RangeMax(None, (self.table, self.positions, self.gaps), self.offset + first, stop - first)
+
+    def query(self, first, last) -> tuple:
+        """
+        Maximum of positions [first, last] (inclusive, clipped to the index)
+
+        Args:
+            first, last: Ints or equally shaped int arrays
+
+        Returns:
+            Tuple of (max, argmax) with shape ``rows + shape(first)``;
+            argmax is relative to this index, -1 where the range is empty
+        """
+        if self.table.shape[-1] == 0:
+            shape = self.table.shape[:-2] + np.shape(first)
+            return np.full(shape, np.nan), np.full(shape, -1)
+
+        first = np.clip(np.asarray(first), 0, None)
+        last = np.clip(np.asarray(last), None, self.length - 1)
+        size = last - first + 1
+        empty = size <= 0
+        size = np.where(empty, 1, size)
+
+        level = np.frexp(size)[1] - 1  # floor(log2(size)), eksak untuk int
+        lo = np.where(empty, 0, self.offset + first)
+        hi = np.where(empty, 0, self.offset + first + size - (1 << level))
+
+        a, b = self.table[..., level, lo], self.table[..., level, hi]
+        pa, pb = self.positions[..., level, lo], self.positions[..., level, hi]
+        take_b = b > a
+        peak = np.where(take_b, b, a)
+        position = np.where(take_b, pb, pa) - self.offset
+
+        missing = empty | np.isneginf(peak)
+        return np.where(missing, np.nan, peak), np.where(missing, -1, position)
+
+    def maximum(self) -> tuple:
+        """(max, argmax) of the whole index"""
+        return self.query(0, self.length - 1)
+
+    def window_max(self, width: int) -> tuple:
+        """(max, argmax) of every run of ``width`` positions, one column per start"""
+        starts = np.arange(max(self.length - width + 1, 0))
+        return self.query(starts, starts + width - 1)
+
+    def best_window(self, width: int) -> tuple:
+        """
+        Run of ``width`` positions with the lowest maximum
+
+        Only runs where every position has a value are candidates, so a run
+        reaching past the end of one of the summed forecasts is never chosen.
+
+        Returns:
+            Tuple of (start position, max within the run) per row; -1 / NaN
+            if no run is complete
+        """
+        peaks, _ = self.window_max(width)
+        if peaks.shape[-1] == 0:
+            shape = peaks.shape[:-1]
+            return np.full(shape, -1), np.full(shape, np.nan)
+        first = self.offset + np.arange(peaks.shape[-1])
+        gaps = self.gaps[..., first + width] - self.gaps[..., first]
+        peaks = np.where(gaps > 0, np.nan, peaks)
+        filled = np.where(np.isnan(peaks), np.inf, peaks)
+        start = np.argmin(filled, axis=-1)
+        best = np.take_along_axis(peaks, start[..., None], axis=-1)[..., 0]
+        return np.where(np.isnan(best), -1, start), best
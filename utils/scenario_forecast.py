@@ -0,0 +1,84 @@
+"""
+Monte Carlo Scenario Forecasting
+Evaluates many realizations of stochastic exogenous features through one
+state-space forecast, for feeders whose exog contains random event flags.
+"""
+
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from constants import SCENARIO_QUANTILES
+from utils.forecast_contract import ForecastResult, make_forecast
+from utils.state_space import has_separable_exog, exog_coefficients, forecast_mean
+
+
+# ============================================================
+# SEEDING
+# ============================================================
+
+def stable_seed(*parts) -> int:
+    """
+    Deterministic 32-bit seed from arbitrary values
+
+    Unlike ``hash()``, the result does not change between processes
+    (PYTHONHASHSEED), so every worker draws the same realization.
+    """
+    key = "|".join(str(p) for p in parts)
+    return zlib.crc32(key.encode("utf-8"))
+
+
+# ============================================================
+# SCENARIO EVALUATION
+# ============================================================
+
+def scenario_paths(results, steps: int, exog_base: pd.DataFrame, exog_scenarios: np.ndarray) -> np.ndarray:
+    """
+    Forecast every exog realization with a single state-space forecast
+
+    The state path does not depend on future exog, so only the regression
+    term differs between scenarios: ``base + (X_s - X_base) @ beta``.
+    Models where exog is not separable fall back to one forecast per scenario.
+
+    Args:
+        results: Fitted statsmodels SARIMAX results object
+        steps: Forecast horizon
+        exog_base: Exog frame (steps x k) used for the reference forecast
+        exog_scenarios: Array (n_scenarios, steps, k) in the same column order
+
+    Returns:
+        Array (n_scenarios, steps) of forecast paths
+    """
+    base = forecast_mean(results, steps, exog_base)
+    exog_scenarios = np.asarray(exog_scenarios, dtype=float)
+
+    if has_separable_exog(results):
+        beta = exog_coefficients(results)
+        delta = exog_scenarios - exog_base.to_numpy(dtype=float)[None, :, :]
+        return base[None, :] + delta @ beta
+
+    paths = np.empty(exog_scenarios.shape[:2])
+    for i, exog in enumerate(exog_scenarios):
+        frame = pd.DataFrame(exog, index=exog_base.index, columns=exog_base.columns)
+        paths[i] = forecast_mean(results, steps, frame)
+    return paths
+
+
+def summarize_paths(future_index: pd.DatetimeIndex, paths: np.ndarray,
+                    quantiles=SCENARIO_QUANTILES) -> ForecastResult:
+    """
+    Reduce scenario paths to a mean forecast with a quantile band
+
+    Args:
+        future_index: Forecast timestamps
+        paths: Array (n_scenarios, steps)
+        quantiles: Quantile levels; the lowest and highest form the band,
+            e.g. (0.1, 0.5, 0.9)
+
+    Returns:
+        ForecastResult with the scenario mean as values and the band as lower/upper
+    """
+    low, high = np.quantile(paths, [min(quantiles), max(quantiles)], axis=0)
+    return make_forecast(future_index[0], paths.mean(axis=0).round(2), lower=low.round(2),
+                         upper=high.round(2), model_version="scenarios")
@@ -0,0 +1,122 @@
+"""
+SARIMAX State Refresh
+Extends a fitted model with the observations that arrived after training,
+using a filter-only pass with the fitted parameters (no refit), so forecasts
+start from the latest data instead of from the end of the training sample.
+"""
+
+import threading
+from typing import Callable, NamedTuple, Optional
+
+import pandas as pd
+
+
+# ============================================================
+# STATE CACHE
+# ============================================================
+
+class RefreshedState(NamedTuple):
+    """Extended results for one feeder, valid for one artifact and high-water mark"""
+    artifact: tuple
+    hwm: pd.Timestamp
+    results: object
+
+
+_STATES = {}
+_LOCK = threading.Lock()
+
+
+def training_end(results) -> Optional[pd.Timestamp]:
+    """
+    Last timestamp seen by a fitted model
+
+    Returns:
+        Timestamp, or None if the model was not fitted on an hourly DatetimeIndex
+    """
+    index = getattr(getattr(results, 'model', None), '_index', None)
+    if not isinstance(index, pd.DatetimeIndex) or len(index) == 0 or index.freq is None:
+        return None
+    if pd.Timedelta(index.freq) != pd.Timedelta(hours=1):
+        return None
+    return index[-1]
+
+
+def _extend(results, start, hwm, history, exog_builder, exog_names):
+    """Filter the fitted model over the hourly grid (start, hwm]"""
+    grid = pd.date_range(start=start + pd.Timedelta(hours=1), end=hwm, freq='H')
+    endog = history.reindex(grid)  # Missing hours stay NaN and are skipped by the filter
+
+    exog = None
+    model = results.model
+    if getattr(model, 'k_exog', 0):
+        if exog_builder is None:
+            raise ValueError("Model memakai exog tetapi exog_builder tidak diberikan")
+        exog = exog_builder(pd.DataFrame({'arus': endog}, index=grid))
+        exog = exog[exog_names].to_numpy(dtype=float)
+
+    # Plain arrays: the grid is already aligned, so skip statsmodels' index handling
+    return results.extend(endog.to_numpy(dtype=float), exog=exog)
+
+
+def refresh_state(feeder: str, results, history: pd.Series,
+                  exog_builder: Optional[Callable] = None, artifact: tuple = None):
+    """
+    Bring a fitted SARIMAX model up to the latest observation
+
+    The extended results are cached per feeder together with the artifact
+    identity and the high-water mark (last timestamp of ``history``). A later
+    call with newer data only filters the points after the cached high-water
+    mark. If the model cannot be extended (no hourly DatetimeIndex, no new
+    data, or a filter error) the original results are returned unchanged.
+
+    Args:
+        feeder: Feeder name (cache key)
+        results: Fitted statsmodels results object loaded from the artifact
+        history: Hourly load series ('arus') with a DatetimeIndex
+        exog_builder: Callable taking a DataFrame (index datetime, column
+            'arus') and returning the historical exog frame
+        artifact: Artifact identity from utils.model_store.artifact_key
+
+    Returns:
+        Results object whose forecast starts right after the high-water mark
+    """
+    history = history.dropna().sort_index()
+    if history.empty:
+        return results
+
+    train_end = training_end(results)
+    hwm = history.index.max()
+    if train_end is None or hwm <= train_end:
+        return results
+
+    key = feeder.lower()
+    with _LOCK:
+        cached = _STATES.get(key)
+
+    base, base_end = results, train_end
+    if cached is not None and cached.artifact == artifact:
+        if cached.hwm == hwm:
+            return cached.results
+        if cached.hwm < hwm:
+            base, base_end = cached.results, cached.hwm
+
+    try:
+        # Hasil extend memakai array, jadi nama kolom exog diambil dari model asli
+        exog_names = list(results.model.exog_names or [])
+        extended = _extend(base, base_end, hwm, history, exog_builder, exog_names)
+    except Exception as e:
+        print(f"Warning: Refresh state '{feeder}' gagal ({e}), memakai state hasil training.")
+        return results
+
+    with _LOCK:
+        _STATES[key] = RefreshedState(artifact=artifact, hwm=hwm, results=extended)
+    return extended
+
+
+def clear_state_cache(feeder: str = None) -> None:
+    """Drop refreshed state for one feeder, or for all feeders"""
+    with _LOCK:
+        if feeder is None:
+            _STATES.clear()
+        else:
+            _STATES.pop(feeder.lower(), None)
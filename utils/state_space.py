@@ -0,0 +1,434 @@
+"""
+State-Space Model Helpers
+Shared access to the pieces of fitted statsmodels SARIMAX results that the
+feeder modules need outside of a plain ``forecast()`` call, and a compiled
+numpy forecaster that replaces ``get_forecast()`` for time-invariant models.
+"""
+
+import threading
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+import numpy as np
+from scipy.stats import norm
+
+from constants import COMPILED_FORECASTER, FORECAST_HOURS, FORECAST_INTERVAL_ALPHA
+
+
+# ============================================================
+# REGRESSION TERMS
+# ============================================================
+
+def has_separable_exog(results) -> bool:
+    """
+    Check whether exog enters the model only through a fixed regression term
+
+    For SARIMAX fitted with ``mle_regression=True`` (the default) the forecast
+    is the ARIMA forecast of ``y - X @ beta`` plus ``X_future @ beta``, so two
+    forecasts that differ only in their future exog differ by exactly
+    ``(X_a - X_b) @ beta``.
+
+    Args:
+        results: Fitted statsmodels results object
+
+    Returns:
+        True if the regression term can be evaluated separately
+    """
+    model = getattr(results, 'model', None)
+    if model is None or not getattr(model, 'k_exog', 0):
+        return False
+    return (
+        bool(getattr(model, 'mle_regression', False))
+        and not getattr(model, 'state_regression', False)
+        and not getattr(model, 'time_varying_regression', False)
+    )
+
+
+def exog_coefficients(results) -> np.ndarray:
+    """
+    Get the exog regression coefficients (beta) of a fitted SARIMAX model
+
+    Args:
+        results: Fitted statsmodels SARIMAX results object
+
+    Returns:
+        Array of shape (k_exog,) in the model's exog column order
+    """
+    if not has_separable_exog(results):
+        raise ValueError("Model tidak memiliki koefisien exog yang terpisah")
+
+    model = results.model
+    params = np.asarray(results.params, dtype=float)
+    k_trend = getattr(model, 'k_trend', 0)
+    return params[k_trend:k_trend + model.k_exog]
+
+
+# ============================================================
+# COMPILED FORECASTER
+# ============================================================
+
+class CompiledForecaster(NamedTuple):
+    """
+    Forecast matrices of one fitted parameter set
+
+    With time-invariant system matrices the h-step forecast from the
+    predicted state a (covariance P) after the last observation is
+
+        mean_h = Z T^(h-1) a + intercept_h + x_h @ beta
+        var_h  = Z T^(h-1) P (Z T^(h-1))' + noise_var_h
+
+    Everything except a, P and x depends only on the parameters, so it is
+    computed once per model and each forecast is a few array products.
+    """
+    powers: np.ndarray           # (horizon, k) Z T^(h-1), h = 1..horizon
+    intercept: np.ndarray        # (horizon,) observation + propagated state intercept
+    noise_var: np.ndarray        # (horizon,) variance from future shocks + measurement error
+    beta: Optional[np.ndarray]   # (k_exog,) exog coefficients, None without exog
+
+    @property
+    def horizon(self) -> int:
+        return len(self.intercept)
+
+    def exog_term(self, exog, steps: int) -> np.ndarray:
+        """Regression contribution x_h @ beta, zeros for models without exog"""
+        if self.beta is not None:
+            return _exog_array(exog, steps, len(self.beta)) @ self.beta
+        if exog is not None and np.size(exog):
+            raise ValueError("Model tidak memakai exog, tetapi exog diberikan")
+        return np.zeros(steps)
+
+    def mean(self, state: np.ndarray, steps: int, exog=None) -> np.ndarray:
+        """Point forecast from the predicted state"""
+        return self.powers[:steps] @ state + self.intercept[:steps] + self.exog_term(exog, steps)
+
+    def variance(self, state_cov: np.ndarray, steps: int) -> np.ndarray:
+        """Forecast error variance (does not depend on the exog values)"""
+        powers = self.powers[:steps]
+        return np.einsum('hk,kl,hl->h', powers, state_cov, powers) + self.noise_var[:steps]
+
+
+def _exog_array(exog, steps: int, k_exog: int) -> np.ndarray:
+    """Future exog as a (steps, k_exog) float array, same checks as statsmodels"""
+    if exog is None:
+        raise ValueError("Model memakai exog, tetapi exog untuk periode forecast tidak diberikan")
+    exog = np.asarray(exog, dtype=float)
+    if exog.ndim == 1:
+        exog = exog.reshape(-1, k_exog) if k_exog > 1 else exog[:, None]
+    if exog.shape != (steps, k_exog):
+        raise ValueError(
+            f"Provided exogenous values are not of the appropriate shape. "
+            f"Required {(steps, k_exog)}, got {exog.shape}."
+        )
+    return exog
+
+
+def _invariant(matrix) -> Optional[np.ndarray]:
+    """Matrix without its time axis, None if it changes over time"""
+    matrix = np.asarray(matrix, dtype=float)
+    if matrix.ndim == 3:
+        if matrix.shape[2] > 1 and np.ptp(matrix, axis=2).any():
+            return None
+        matrix = matrix[:, :, 0]
+    return matrix
+
+
+def _invariant_vector(vector) -> Optional[np.ndarray]:
+    """Intercept vector without its time axis, None if it changes over time"""
+    vector = np.asarray(vector, dtype=float)
+    if vector.ndim == 2:
+        if vector.shape[1] > 1 and np.ptp(vector, axis=1).any():
+            return None
+        vector = vector[:, 0]
+    return vector
+
+
+def compile_forecaster(results, horizon: int = FORECAST_HOURS) -> Optional[CompiledForecaster]:
+    """
+    Extract the forecast matrices of fitted state-space results
+
+    Args:
+        results: Fitted statsmodels SARIMAX (or other MLE state-space) results
+        horizon: Longest forecast the matrices are built for
+
+    Returns:
+        CompiledForecaster, or None for systems the recursion does not cover
+        (time-varying matrices, time trends, exog outside the fixed
+        regression term, non state-space models)
+    """
+    filtered = getattr(results, 'filter_results', None)
+    model = getattr(results, 'model', None)
+    if filtered is None or model is None:
+        return None
+
+    k_exog = getattr(model, 'k_exog', 0)
+    if k_exog and not has_separable_exog(results):
+        return None
+
+    design = _invariant(filtered.design)
+    transition = _invariant(filtered.transition)
+    selection = _invariant(filtered.selection)
+    state_cov = _invariant(filtered.state_cov)
+    obs_cov = _invariant(filtered.obs_cov)
+    state_intercept = _invariant_vector(filtered.state_intercept)
+    if any(m is None for m in (design, transition, selection, state_cov, obs_cov, state_intercept)):
+        return None
+    if design.shape[0] != 1:
+        return None
+
+    # Tanpa exog intercept observasi harus konstan; dengan exog isinya X beta
+    obs_intercept = 0.0
+    if not k_exog:
+        obs_vector = _invariant_vector(filtered.obs_intercept)
+        if obs_vector is None:
+            return None
+        obs_intercept = float(obs_vector[0])
+
+    # Z T^(h-1) untuk h = 1..horizon
+    powers = np.empty((horizon, transition.shape[0]))
+    row = design[0]
+    for h in range(horizon):
+        powers[h] = row
+        row = row @ transition
+
+    shocks = selection @ state_cov @ selection.T
+    shock_var = np.einsum('hk,kl,hl->h', powers, shocks, powers)
+    noise_var = obs_cov[0, 0] + np.concatenate([[0.0], np.cumsum(shock_var[:-1])])
+    intercept = obs_intercept + np.concatenate([[0.0], np.cumsum(powers[:-1] @ state_intercept)])
+
+    return CompiledForecaster(
+        powers=powers,
+        intercept=intercept,
+        noise_var=noise_var,
+        beta=exog_coefficients(results) if k_exog else None,
+    )
+
+
+_COMPILED = {}
+_COMPILED_LOCK = threading.Lock()
+_COMPILED_MAX = 64
+
+
+def _compiled_key(results) -> tuple:
+    """Identity of a parameter set (shared by all results extended from one fit)"""
+    model = results.model
+    spec = tuple(
+        repr(getattr(model, name, None))
+        for name in ('order', 'seasonal_order', 'trend', 'k_exog', 'k_states', 'measurement_error')
+    )
+    params = getattr(results, '_results', results).params  # tanpa wrapper pandas
+    return (type(model).__name__, spec, np.asarray(params, dtype=float).tobytes())
+
+
+def _matches_statsmodels(results, compiled: CompiledForecaster, steps: int) -> bool:
+    """Compare the compiled recursion with get_forecast() once (zero exog)"""
+    k_exog = len(compiled.beta) if compiled.beta is not None else 0
+    exog = np.zeros((steps, k_exog)) if k_exog else None
+    reference = results.get_forecast(steps=steps, exog=exog)
+    expected_mean = np.asarray(reference.predicted_mean, dtype=float)
+    expected_var = np.asarray(reference.var_pred_mean, dtype=float)
+
+    filtered = results.filter_results
+    mean = compiled.mean(filtered.predicted_state[:, -1], steps, exog)
+    variance = compiled.variance(filtered.predicted_state_cov[:, :, -1], steps)
+    return (
+        np.allclose(mean, expected_mean, rtol=1e-6, atol=1e-6)
+        and np.allclose(variance, expected_var, rtol=1e-6, atol=1e-6)
+    )
+
+
+def compiled_forecaster(results, steps: int = FORECAST_HOURS) -> Optional[CompiledForecaster]:
+    """
+    Cached CompiledForecaster for the parameters of ``results``
+
+    The first compile of a parameter set is checked against statsmodels;
+    parameter sets the recursion does not reproduce are remembered as
+    unsupported and keep using ``get_forecast()``.
+    """
+    if not COMPILED_FORECASTER or getattr(results, 'filter_results', None) is None:
+        return None
+    try:
+        key = _compiled_key(results)
+    except Exception:
+        return None
+
+    with _COMPILED_LOCK:
+        hit = _COMPILED.get(key, False)
+    if hit is None or (hit is not False and hit.horizon >= steps):
+        return hit
+
+    horizon = max(steps, FORECAST_HOURS)
+    try:
+        compiled = compile_forecaster(results, horizon)
+        if compiled is not None and not _matches_statsmodels(results, compiled, horizon):
+            print(f"Warning: forecaster numpy tidak sama dengan statsmodels untuk {type(results.model).__name__}, "
+                  f"memakai get_forecast()")
+            compiled = None
+    except Exception as e:
+        print(f"Warning: forecaster numpy tidak dapat dibuat ({e}), memakai get_forecast()")
+        compiled = None
+
+    with _COMPILED_LOCK:
+        if len(_COMPILED) >= _COMPILED_MAX:
+            _COMPILED.pop(next(iter(_COMPILED)))
+        _COMPILED[key] = compiled
+    return compiled
+
+
+def clear_compiled_forecasters() -> None:
+    with _COMPILED_LOCK:
+        _COMPILED.clear()
+
+
+# ============================================================
+# PREDICTION INTERVALS
+# ============================================================
+
+@lru_cache(maxsize=16)
+def z_score(alpha: float) -> float:
+    """Two-sided normal quantile of the prediction interval"""
+    return float(norm.ppf(1 - alpha / 2))
+
+
+def forecast_mean(results, steps: int, exog=None) -> np.ndarray:
+    """
+    Point forecast, through the compiled forecaster when the model allows
+
+    Drop-in replacement for ``results.forecast(steps, exog=exog)`` returning
+    a plain array.
+    """
+    compiled = compiled_forecaster(results, steps)
+    if compiled is None:
+        return np.asarray(results.forecast(steps=steps, exog=exog), dtype=float)
+    return compiled.mean(results.filter_results.predicted_state[:, -1], steps, exog)
+
+
+def forecast_with_intervals(results, steps: int, exog=None, alpha: float = FORECAST_INTERVAL_ALPHA) -> tuple:
+    """
+    Point forecast and analytic prediction interval from one forecast pass
+
+    Uses the compiled numpy forecaster when the model allows it, otherwise
+    ``get_forecast()``, which runs the same state-space recursion and also
+    carries the forecast error variance, so the band costs nothing extra
+    compared to the point forecast alone.
+
+    Args:
+        results: Fitted statsmodels results object
+        steps: Forecast horizon
+        exog: Future exog (steps x k), or None for models without exog
+        alpha: 1 - coverage of the interval (0.10 = 90% band)
+
+    Returns:
+        Tuple of arrays (mean, lower, upper), each of shape (steps,)
+    """
+    compiled = compiled_forecaster(results, steps)
+    if compiled is None:
+        fc = results.get_forecast(steps=steps, exog=exog)
+        mean = np.asarray(fc.predicted_mean, dtype=float)
+        ci = np.asarray(fc.conf_int(alpha=alpha), dtype=float)
+        return mean, ci[:, 0], ci[:, 1]
+
+    filtered = results.filter_results
+    mean = compiled.mean(filtered.predicted_state[:, -1], steps, exog)
+    half_width = z_score(alpha) * np.sqrt(compiled.variance(filtered.predicted_state_cov[:, :, -1], steps))
+    return mean, mean - half_width, mean + half_width
+
+
+def interval_half_width(results, steps: int, alpha: float = FORECAST_INTERVAL_ALPHA) -> np.ndarray:
+    """
+    Half width of the h-step prediction interval, h = 1..steps
+
+    The forecast error variance of a SARIMAX model does not depend on the
+    future exog values, so a zero exog is used. Meant for forecasters that
+    build their mean path outside ``get_forecast()``.
+    """
+    compiled = compiled_forecaster(results, steps)
+    if compiled is not None:
+        variance = compiled.variance(results.filter_results.predicted_state_cov[:, :, -1], steps)
+    else:
+        k_exog = getattr(results.model, 'k_exog', 0)
+        exog = np.zeros((steps, k_exog)) if k_exog else None
+        fc = results.get_forecast(steps=steps, exog=exog)
+        variance = np.asarray(fc.var_pred_mean, dtype=float)
+    return z_score(alpha) * np.sqrt(variance)
+
+
+# ============================================================
+# MULTI-ORIGIN FORECASTING
+# ============================================================
+
+def multi_origin_forecast(results, endog, origins, steps: int, exog=None) -> np.ndarray:
+    """
+    Forecasts from many origins with one Kalman filter pass
+
+    The fitted parameters are applied to ``endog`` once. The predicted state
+    a(p+1 | p) stored by the filter at every position only depends on data
+    up to p, so it is exactly the starting state of a forecast made at
+    origin p. With time-invariant design Z and transition T the h-step
+    forecast is ``Z T^(h-1) a + intercept terms``, so all origins and all
+    horizons come out of a single matrix product.
+
+    Missing endog values (NaN) are skipped by the filter: pad ``endog`` with
+    NaN to forecast past the end of the data (exog must cover the padding).
+
+    Args:
+        results: Fitted statsmodels SARIMAX results object
+        endog: Hourly series (array or Series) covering every forecast target
+        origins: Integer positions in ``endog`` of the last observation of
+            each forecast
+        steps: Forecast horizon
+        exog: Exog rows aligned to ``endog`` (None for models without exog)
+
+    Returns:
+        Array (n_origins, steps); row i forecasts positions origins[i] + 1..steps
+    """
+    endog = np.asarray(endog, dtype=float)
+    origins = np.asarray(origins, dtype=np.intp)
+    if exog is not None:
+        exog = np.asarray(exog, dtype=float)
+    if origins.size and (origins.min() < 0 or origins.max() + steps >= len(endog)):
+        raise ValueError("Origin + horizon harus berada di dalam endog (tambahkan NaN untuk masa depan)")
+
+    filtered = results.apply(endog, exog=exog)
+    ssm = filtered.model.ssm
+    design = np.asarray(ssm['design'])
+    transition = np.asarray(ssm['transition'])
+    if design.ndim != 2 or transition.ndim != 2:
+        return _multi_origin_loop(filtered, origins, steps)
+
+    design = design[0]                                     # (k,)
+    states = filtered.predicted_state[:, origins + 1]      # (k, n) = a(p+1 | p)
+    targets = origins[:, None] + np.arange(1, steps + 1)   # (n, steps)
+
+    # Z T^(h-1) untuk h = 1..steps, satu baris per horizon
+    powers = np.empty((steps, len(design)))
+    row = design
+    for h in range(steps):
+        powers[h] = row
+        row = row @ transition
+    forecasts = states.T @ powers.T                        # (n, steps)
+
+    # Intercept observasi (termasuk X beta untuk exog) di jam target
+    obs_intercept = np.asarray(ssm['obs_intercept'], dtype=float).reshape(-1)
+    forecasts += obs_intercept[targets] if obs_intercept.size > 1 else obs_intercept[0]
+
+    # Intercept state (trend): c(p+j) disebarkan lewat Z T^(h-1-j)
+    state_intercept = np.asarray(ssm['state_intercept'], dtype=float)
+    if state_intercept.ndim == 2 and state_intercept.shape[1] > 1:
+        if np.ptp(state_intercept, axis=1).any():
+            return _multi_origin_loop(filtered, origins, steps)
+        state_intercept = state_intercept[:, 0]
+    state_intercept = state_intercept.reshape(-1)
+    if state_intercept.any():
+        offsets = np.concatenate([[0.0], np.cumsum(powers[:-1] @ state_intercept)])
+        forecasts += offsets
+
+    return forecasts
+
+
+def _multi_origin_loop(filtered, origins, steps: int) -> np.ndarray:
+    """Dynamic in-sample prediction per origin, for time-varying systems"""
+    forecasts = np.empty((len(origins), steps))
+    for i, origin in enumerate(origins):
+        prediction = filtered.get_prediction(start=origin + 1, end=origin + steps, dynamic=0)
+        forecasts[i] = np.asarray(prediction.predicted_mean, dtype=float)
+    return forecasts
@@ -0,0 +1,252 @@
+"""
+Transfer Matrix
+Load-transfer check for every maneuver edge of the network at once. All
+feeder forecasts are held as one aligned (feeders x hours) array; the
+combined load of every directed edge in FEEDER_PAIRS is a single gather
+and add, and peaks, peak hours and status codes are reductions over the
+resulting (edges x hours) array. The dashboard then only looks up the
+edges of the selected feeder. The curves carry range-max indexes, so peaks of
+any sub-period are O(1) lookups instead of new reductions. Each edge is
+judged against the limits of its receiving partner from the capacity index.
+The grid is hourly by default; quarter-hour forecasts give the same matrix
+at 15-minute resolution.
+"""
+
+import threading
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from constants import FEEDER_PAIRS, MAX_CAPACITY, WARNING_THRESHOLD
+from design_system import STATUS_LEVELS, status_style
+from utils.capacity import NO_DATA, capacity_index, load_status
+from utils.forecast_contract import HOUR, align_forecasts, make_forecast, period_slice
+from utils.range_max import RangeMax
+
+
+class TransferMatrix(NamedTuple):
+    """Combined-load curves and peaks of all maneuver edges"""
+    feeders: list                     # Row order of the aligned forecasts
+    start: pd.Timestamp               # Time of column 0
+    src: np.ndarray                   # (E,) feeder giving up its load
+    dst: np.ndarray                   # (E,) partner taking the load
+    load: np.ndarray                  # (E, H) combined forecast, NaN outside both forecasts
+    upper: np.ndarray                 # (E, H) combined upper band, NaN where a band is missing
+    peak: np.ndarray                  # (E,) max combined load, NaN without data
+    peak_hour: np.ndarray             # (E,) column of the peak, -1 without data
+    upper_peak: np.ndarray            # (E,) max combined upper band, NaN without bands
+    status: np.ndarray                # (E,) index into STATUS_LEVELS, NO_DATA without data
+    warning: np.ndarray               # (E,) warning level of the receiving partner (A)
+    capacity: np.ndarray              # (E,) capacity of the receiving partner (A)
+    load_index: RangeMax              # Range-max index of load
+    upper_index: RangeMax             # Range-max index of upper
+    freq: pd.Timedelta = HOUR         # Column spacing
+
+    def __len__(self) -> int:
+        return len(self.src)
+
+    def source(self, e: int) -> str:
+        return self.feeders[self.src[e]]
+
+    def partner(self, e: int) -> str:
+        return self.feeders[self.dst[e]]
+
+    def edges_from(self, source: str) -> np.ndarray:
+        """Edge indices of one source feeder, in FEEDER_PAIRS order"""
+        if source.lower() not in self.feeders:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero(self.src == self.feeders.index(source.lower()))
+
+    def peak_time(self, e: int) -> Optional[pd.Timestamp]:
+        hour = int(self.peak_hour[e])
+        return None if hour < 0 else self.start + hour * self.freq
+
+    def status_style(self, e: int) -> tuple:
+        """(status, color, label) of an edge, like design_system.get_status_color"""
+        return status_style(STATUS_LEVELS[self.status[e]]) if self.status[e] != NO_DATA else None
+
+    def curve(self, e: int):
+        """Combined load of one edge as a ForecastResult (upper band only)"""
+        return make_forecast(self.start, self.load[e], lower=self.load[e], upper=self.upper[e],
+                             freq=self.freq)
+
+    def between(self, period_start, period_end) -> "TransferMatrix":
+        """Same edges restricted to [period_start, period_end], peaks from the index (O(E))"""
+        grid = make_forecast(self.start, np.empty(self.load.shape[1]), freq=self.freq)
+        columns = period_slice(grid, period_start, period_end)
+        return self._matrix(
+            self.feeders, self.start + columns.start * self.freq, self.src, self.dst,
+            self.load[:, columns], self.upper[:, columns],
+            self.load_index.window(columns.start, columns.stop),
+            self.upper_index.window(columns.start, columns.stop),
+            self.warning, self.capacity, self.freq,
+        )
+
+    def best_window(self, e: int, hours: int) -> tuple:
+        """
+        Run of ``hours`` consecutive hours with the lowest combined peak on an edge
+
+        Returns:
+            Tuple of (first hour as Timestamp, peak), (None, nan) if the
+            period has no complete run with data
+        """
+        starts, peaks = self.load_index.best_window(int(hours * HOUR // self.freq))
+        if starts[e] < 0:
+            return None, float("nan")
+        return self.start + int(starts[e]) * self.freq, float(peaks[e])
+
+    @staticmethod
+    def _matrix(feeders, start, src, dst, load, upper, load_index, upper_index,
+                warning, capacity, freq=HOUR) -> "TransferMatrix":
+        peak, peak_hour = load_index.maximum()
+        upper_peak, _ = upper_index.maximum()
+        return TransferMatrix(
+            feeders, start, src, dst, load, upper, peak, peak_hour, upper_peak,
+            edge_status(peak, upper_peak, warning, capacity), warning, capacity,
+            load_index, upper_index, freq,
+        )
+
+    def table(self) -> pd.DataFrame:
+        """One row per edge: source, partner, peak, peak time, upper peak, capacity, status"""
+        return pd.DataFrame({
+            'source': [self.feeders[i] for i in self.src],
+            'partner': [self.feeders[i] for i in self.dst],
+            'peak': self.peak,
+            'peak_time': [self.peak_time(e) for e in range(len(self))],
+            'upper_peak': self.upper_peak,
+            'capacity': self.capacity,
+            'status': [STATUS_LEVELS[s] if s != NO_DATA else None for s in self.status],
+        })
+
+
+def edge_arrays(feeders: list, pairs: dict = FEEDER_PAIRS) -> tuple:
+    """
+    Row indices of all directed edges whose feeders are both in ``feeders``
+
+    Returns:
+        Tuple of int arrays (src, dst)
+    """
+    position = {feeder: i for i, feeder in enumerate(feeders)}
+    edges = [
+        (position[source], position[partner])
+        for source, partners in pairs.items() if source in position
+        for partner in partners if partner in position
+    ]
+    edges = np.array(edges, dtype=np.intp).reshape(-1, 2)
+    return edges[:, 0], edges[:, 1]
+
+
+def edge_limits(feeders: list, dst: np.ndarray, warning: float = None, capacity: float = None,
+                limits=None) -> tuple:
+    """
+    Per-edge (warning, capacity) arrays
+
+    Limits not given are those of the receiving partner in ``limits`` (a
+    CapacityIndex, default: capacity_index()); a given scalar applies to
+    every edge.
+    """
+    if warning is None or capacity is None:
+        index_warning, index_capacity = (limits or capacity_index()).lookup(feeders)
+    warning = index_warning[dst] if warning is None else np.full(len(dst), float(warning))
+    capacity = index_capacity[dst] if capacity is None else np.full(len(dst), float(capacity))
+    return warning, capacity
+
+
+def edge_status(peak: np.ndarray, upper_peak: np.ndarray, warning=WARNING_THRESHOLD,
+                capacity=MAX_CAPACITY) -> np.ndarray:
+    """
+    Status codes of edge peaks
+
+    The status is judged on max(peak, upper_peak) with the same thresholds
+    as design_system.get_status_color; warning and capacity are scalars or
+    per-edge arrays.
+    """
+    status = load_status(np.fmax(peak, upper_peak), warning, capacity)
+    return np.where(np.isnan(peak), NO_DATA, status).astype(np.int8)
+
+
+def edge_peaks(load: np.ndarray, upper: np.ndarray, warning: float = WARNING_THRESHOLD,
+               capacity: float = MAX_CAPACITY) -> tuple:
+    """
+    Peaks and status codes of combined-load curves, without building an index
+
+    Returns:
+        Tuple of (peak, peak_hour, upper_peak, status), each of shape (E,)
+    """
+    has_data = ~np.isnan(load).all(axis=1)
+    peak_hour = np.where(has_data, np.argmax(np.where(np.isnan(load), -np.inf, load), axis=1), -1)
+    peak = np.where(has_data, load[np.arange(len(load)), np.maximum(peak_hour, 0)], np.nan)
+
+    has_band = ~np.isnan(upper).all(axis=1)
+    upper_peak = np.where(has_band, np.max(np.where(np.isnan(upper), -np.inf, upper), axis=1), np.nan)
+    return peak, peak_hour, upper_peak, edge_status(peak, upper_peak, warning, capacity)
+
+
+def transfer_matrix(forecasts: dict, start, steps: int, pairs: dict = FEEDER_PAIRS,
+                    warning: float = None, capacity: float = None, freq=HOUR,
+                    limits=None) -> TransferMatrix:
+    """
+    Evaluate every maneuver edge between the given feeder forecasts
+
+    Args:
+        forecasts: Dict feeder -> ForecastResult (lowercase names)
+        start: First hour of the evaluated grid
+        steps: Columns in the grid
+        pairs: Directed edges, source -> list of partners
+        warning, capacity: Status thresholds (A) for every edge (default:
+            limits of the receiving partner from the capacity index)
+        freq: Column spacing, must equal the spacing of the forecasts
+        limits: CapacityIndex for the per-partner limits (default: capacity_index())
+
+    Returns:
+        TransferMatrix
+    """
+    freq = pd.Timedelta(freq)
+    feeders, values = align_forecasts(forecasts, start, steps, freq=freq)
+    _, upper = align_forecasts(forecasts, start, steps, feeders, field="upper", freq=freq)
+    src, dst = edge_arrays(feeders, pairs)
+
+    # Satu gather + add untuk semua edge
+    load = values[src] + values[dst]
+    upper_load = upper[src] + upper[dst]
+
+    return TransferMatrix._matrix(
+        feeders, pd.Timestamp(start).floor(freq), src, dst, load, upper_load,
+        RangeMax(load), RangeMax(upper_load), *edge_limits(feeders, dst, warning, capacity, limits), freq,
+    )
+
+
+_MATRICES = {}
+_MATRIX_LOCK = threading.Lock()
+_MATRIX_MAX = 16
+
+
+def cached_transfer_matrix(forecasts: dict, start, steps: int, pairs: dict = FEEDER_PAIRS,
+                           warning: float = None, capacity: float = None) -> TransferMatrix:
+    """
+    transfer_matrix() for the full horizon, reused while the forecasts are the same objects
+
+    Cached forecasts are shared between dashboard reruns, so changing only
+    the period pickers reuses the matrix and its indexes; use
+    ``.between(period_start, period_end)`` for the period.
+    """
+    items = tuple(sorted(forecasts.items()))
+    limits = capacity_index() if warning is None or capacity is None else None
+    key = (
+        tuple((feeder, id(fc)) for feeder, fc in items),
+        pd.Timestamp(start), steps, warning, capacity,
+        tuple((source, tuple(partners)) for source, partners in pairs.items()),
+    )
+    with _MATRIX_LOCK:
+        hit = _MATRICES.get(key)
+    # Forecast ikut disimpan, jadi id() tidak bisa dipakai ulang selama entri ada
+    if hit is not None and hit[1] is limits and all(a is b for (_, a), (_, b) in zip(hit[0], items)):
+        return hit[2]
+
+    matrix = transfer_matrix(forecasts, start, steps, pairs, warning, capacity)
+    with _MATRIX_LOCK:
+        if len(_MATRICES) >= _MATRIX_MAX:
+            _MATRICES.pop(next(iter(_MATRICES)))
+        _MATRICES[key] = (items, limits, matrix)
+    return matrix
@@ -0,0 +1,150 @@
+"""
+What-If Transfer Scenarios
+Evaluates every FEEDER_PAIRS transfer under many load perturbations at
+once. A scenario scales and shifts the forecast of each feeder
+(load * scale + shift); the (scenarios x feeders) perturbations are
+broadcast against the aligned (feeders x hours) forecasts, so all
+combined loads are one (scenarios x edges x hours) array and hundreds of
+scenarios cost about as much as one. Edges are judged like the transfer
+matrix, against the limits of the receiving partner.
+"""
+
+from itertools import product
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from constants import FEEDER_PAIRS
+from design_system import STATUS_LEVELS
+from utils.forecast_contract import align_forecasts
+from utils.transfer_matrix import edge_arrays, edge_limits, edge_status
+
+
+class WhatIfResult(NamedTuple):
+    """Peaks and status of every edge in every scenario"""
+    scenarios: list         # Scenario names, row order
+    feeders: list           # Row order of the aligned forecasts
+    src: np.ndarray         # (E,) source feeder of each edge
+    dst: np.ndarray         # (E,) partner of each edge
+    peak: np.ndarray        # (S, E) combined peak, NaN without data
+    upper_peak: np.ndarray  # (S, E) combined upper-band peak, NaN without bands
+    status: np.ndarray      # (S, E) index into STATUS_LEVELS, -1 without data
+    warning: np.ndarray     # (E,) warning level of the partner (A)
+    capacity: np.ndarray    # (E,) capacity of the partner (A)
+
+    def edge_labels(self) -> list:
+        return [f"{self.feeders[s]} -> {self.feeders[d]}" for s, d in zip(self.src, self.dst)]
+
+    def status_matrix(self) -> pd.DataFrame:
+        """Scenarios x edges table of status names"""
+        names = np.array(STATUS_LEVELS + (None,), dtype=object)[self.status]  # -1 -> None
+        return pd.DataFrame(names, index=self.scenarios, columns=self.edge_labels())
+
+    def changed(self, reference: int = 0) -> pd.DataFrame:
+        """Scenarios x edges mask of a status different from the reference scenario"""
+        return pd.DataFrame(self.status != self.status[reference], index=self.scenarios,
+                            columns=self.edge_labels())
+
+    def table(self) -> pd.DataFrame:
+        """Long table: one row per scenario and edge"""
+        n_scenarios, n_edges = self.peak.shape
+        judged = np.fmax(self.peak, self.upper_peak)
+        return pd.DataFrame({
+            "scenario": np.repeat(self.scenarios, n_edges),
+            "source": np.tile([self.feeders[i] for i in self.src], n_scenarios),
+            "partner": np.tile([self.feeders[i] for i in self.dst], n_scenarios),
+            "peak": self.peak.ravel(),
+            "upper_peak": self.upper_peak.ravel(),
+            "utilization": (judged / self.capacity).ravel(),
+            "status": self.status_matrix().to_numpy().ravel(),
+        })
+
+
+def perturbation_grid(growth=(1.0,), offsets: dict = None, feeders=None) -> tuple:
+    """
+    Cartesian grid of perturbations
+
+    Args:
+        growth: Load factors applied to ``feeders`` (e.g. (1.0, 1.05, 1.1))
+        offsets: Dict feeder -> list of additive offsets in A (e.g. {'labang': [0, 20]})
+        feeders: Feeders the growth applies to (default: all in FEEDER_PAIRS)
+
+    Returns:
+        Tuple of DataFrames (scale, shift), scenarios x feeders
+    """
+    feeders = [f.lower() for f in (feeders or FEEDER_PAIRS)]
+    offsets = {f.lower(): list(v) for f, v in (offsets or {}).items()}
+    columns = sorted(set(feeders) | set(offsets))
+
+    names, scale_rows, shift_rows = [], [], []
+    for factor, *shifts in product(growth, *offsets.values()):
+        scale_rows.append([factor if f in feeders else 1.0 for f in columns])
+        shift = dict(zip(offsets, shifts))
+        shift_rows.append([shift.get(f, 0.0) for f in columns])
+        label = [f"x{factor:g}"] + [f"{f}{a:+g}A" for f, a in shift.items() if a]
+        names.append(", ".join(label))
+
+    return (pd.DataFrame(scale_rows, index=names, columns=columns, dtype=float),
+            pd.DataFrame(shift_rows, index=names, columns=columns, dtype=float))
+
+
+def evaluate_scenarios(forecasts: dict, start, steps: int, scale: pd.DataFrame = None,
+                       shift: pd.DataFrame = None, pairs: dict = FEEDER_PAIRS) -> WhatIfResult:
+    """
+    Combined peaks and status of all edges under every scenario
+
+    Args:
+        forecasts: Dict feeder -> ForecastResult (lowercase names)
+        start: First hour of the evaluated period
+        steps: Hours in the period
+        scale: Scenarios x feeders load factors (missing feeders: 1)
+        shift: Scenarios x feeders offsets in A (missing feeders: 0); same
+            scenarios as ``scale`` when both are given
+        pairs: Directed transfer graph
+
+    Returns:
+        WhatIfResult
+    """
+    frames = [f for f in (scale, shift) if f is not None]
+    if not frames:
+        raise ValueError("Skenario kosong: berikan scale dan/atau shift")
+    scenarios = list(frames[0].index)
+    if len(frames) == 2 and list(shift.index) != scenarios:
+        raise ValueError("Indeks skenario scale dan shift tidak sama")
+
+    feeders, values = align_forecasts(forecasts, start, steps)
+    _, upper = align_forecasts(forecasts, start, steps, feeders, field="upper")
+    src, dst = edge_arrays(feeders, pairs)
+
+    def grid(frame, fill):
+        if frame is None:
+            return np.full((len(scenarios), len(feeders)), fill)
+        frame = frame.rename(columns=str.lower)
+        return frame.reindex(columns=feeders, fill_value=fill).to_numpy(dtype=float)
+
+    a, b = grid(scale, 1.0), grid(shift, 0.0)  # (S, F)
+
+    def combined(curves):
+        # (S, E, H): (beban * a + b) sumber + (beban * a + b) partner
+        return (curves[src] * a[:, src, None] + b[:, src, None]
+                + curves[dst] * a[:, dst, None] + b[:, dst, None])
+
+    def peaks(load):
+        has_data = ~np.isnan(load).all(axis=2)
+        return np.where(has_data, np.max(np.where(np.isnan(load), -np.inf, load), axis=2), np.nan)
+
+    peak = peaks(combined(values))
+    upper_peak = peaks(combined(upper))
+    warning, capacity = edge_limits(feeders, dst)
+    return WhatIfResult(
+        scenarios=scenarios,
+        feeders=feeders,
+        src=src,
+        dst=dst,
+        peak=peak,
+        upper_peak=upper_peak,
+        status=edge_status(peak, upper_peak, warning, capacity),
+        warning=warning,
+        capacity=capacity,
+    )
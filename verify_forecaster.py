@@ -0,0 +1,96 @@
+"""
+Compiled Forecaster Check
+Compares the numpy forecast recursion (utils.state_space) with statsmodels
+get_forecast() for every feeder model artifact: mean, prediction band and
+time per call. Run it after a refit or a statsmodels upgrade.
+
+Usage:
+    python verify_forecaster.py
+    python verify_forecaster.py --feeders birem gegger --steps 168
+"""
+
+import argparse
+import importlib
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from constants import FEEDER_MODULES, FORECAST_HOURS, FORECAST_INTERVAL_ALPHA
+from utils.model_store import load_artifact, unwrap_results
+from utils.state_space import compiled_forecaster, forecast_with_intervals
+
+TOLERANCE = 1e-6
+
+
+def _per_call_ms(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def verify_feeder(feeder: str, steps: int, repeat: int = 20) -> dict:
+    """Compare both backends on one feeder model (exog = last training rows)"""
+    module = importlib.import_module(f"feeders.{FEEDER_MODULES[feeder]}")
+    row = {'feeder': feeder, 'backend': None, 'max_error': np.nan,
+           'statsmodels_ms': np.nan, 'numpy_ms': np.nan}
+    if not Path(module.MODEL_PATH).exists():
+        row['backend'] = 'no model'
+        return row
+
+    results, _ = unwrap_results(load_artifact(module.MODEL_PATH))
+    if results is None or not hasattr(results, 'get_forecast'):
+        row['backend'] = 'not state-space'
+        return row
+
+    k_exog = getattr(results.model, 'k_exog', 0)
+    exog = None
+    if k_exog:
+        train_exog = np.asarray(results.model.exog, dtype=float)
+        exog = np.resize(train_exog[-steps:], (steps, k_exog))
+
+    def reference():
+        fc = results.get_forecast(steps=steps, exog=exog)
+        ci = np.asarray(fc.conf_int(alpha=FORECAST_INTERVAL_ALPHA), dtype=float)
+        return np.asarray(fc.predicted_mean, dtype=float), ci[:, 0], ci[:, 1]
+
+    compiled = compiled_forecaster(results, steps)
+    row['backend'] = 'numpy' if compiled is not None else 'statsmodels'
+    row['max_error'] = max(
+        float(np.max(np.abs(a - b)))
+        for a, b in zip(forecast_with_intervals(results, steps, exog), reference())
+    )
+    row['statsmodels_ms'] = _per_call_ms(reference, repeat)
+    row['numpy_ms'] = _per_call_ms(lambda: forecast_with_intervals(results, steps, exog), repeat)
+    return row
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cek forecaster numpy terhadap statsmodels")
+    parser.add_argument("--feeders", nargs="+", choices=sorted(FEEDER_MODULES),
+                        metavar="FEEDER", help="Feeder yang dicek (default: semua)")
+    parser.add_argument("--steps", type=int, default=FORECAST_HOURS,
+                        help="Horizon forecast yang dibandingkan")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for feeder in args.feeders or list(FEEDER_MODULES):
+        try:
+            rows.append(verify_feeder(feeder, args.steps))
+        except Exception as e:
+            rows.append({'feeder': feeder, 'backend': f"error: {e}"})
+    report = pd.DataFrame(rows)
+
+    with pd.option_context("display.width", 160, "display.float_format", "{:.3g}".format):
+        print(report.to_string(index=False))
+
+    mismatch = report['max_error'] > TOLERANCE
+    errors = report['backend'].astype(str).str.startswith('error')
+    return 1 if (mismatch | errors).any() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())